@@ -16,9 +16,11 @@ from typing import List, Dict, Optional
 class AudioManager:
     """Verwaltet Audio-Eingabe und Mikrofon-Erkennung für Live-Transkription"""
     
-    def __init__(self, sample_rate: int = 16000, channels: int = 1, dtype=np.float32):
+    def __init__(self, sample_rate: int = 16000, channels: int = 1, dtype=np.float32,
+                 keep_channels: bool = False):
         self.sample_rate = sample_rate
         self.channels = channels
+        self.keep_channels = keep_channels  # Mehrkanal-Blöcke (n, Kanäle) statt Mono einreihen
         self.dtype = dtype
         self.stream = None
         self.audio_queue = queue.Queue(maxsize=100)  # Begrenzte Queue-Größe
@@ -70,8 +72,8 @@ class AudioManager:
                 # Audio-Daten normalisieren und in Queue einreihen
                 audio_data = indata.copy().astype(self.dtype)
                 
-                # Mono-Konvertierung falls nötig
-                if audio_data.ndim > 1:
+                # Mono-Konvertierung falls nötig (Kanal-Diarisierung braucht die Einzelkanäle)
+                if audio_data.ndim > 1 and not (self.keep_channels and audio_data.shape[1] > 1):
                     audio_data = np.mean(audio_data, axis=1)
                 
                 # Queue-Überlauf vermeiden
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Benchmark DSP-Kernel gegen librosa
+Misst die Zeit bis zum ersten Ergebnis (Import + erster Aufruf in einem frischen
+Interpreter; librosa lädt Untermodule erst beim Zugriff und kompiliert mit numba)
+und die Laufzeit der Features, die das Marker-System nutzte, pro Analysefenster.
+
+Aufruf:
+    python benchmark_dsp.py [--seconds 1.0] [--repeat 200]
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def cold_start_time(module: str) -> float:
+    """Import + erster Feature-Aufruf in einem frischen Python-Prozess (Sekunden)"""
+    code = (
+        "import time; s = time.perf_counter()\n"
+        f"import numpy as np, {module} as backend\n"
+        "from benchmark_dsp import features\n"
+        "features(backend, np.random.default_rng(0).standard_normal(16000).astype(np.float32))\n"
+        "print(time.perf_counter() - s)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def features(backend, y: np.ndarray):
+    """Die Feature-Aufrufe des ursprünglichen Marker-Systems"""
+    backend_features = backend.feature if hasattr(backend, "feature") else backend
+    backend_features.rms(y=y)
+    backend_features.zero_crossing_rate(y)
+    backend_features.spectral_centroid(y=y, sr=SAMPLE_RATE)
+    backend_features.spectral_rolloff(y=y, sr=SAMPLE_RATE)
+    backend.piptrack(y=y, sr=SAMPLE_RATE, threshold=0.1, fmin=80, fmax=400)
+
+
+def run(backend, y: np.ndarray, repeat: int) -> float:
+    features(backend, y)  # Aufwärmen (numba-JIT, FFT-Pläne)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        features(backend, y)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=1.0, help="Fensterlänge in Sekunden")
+    parser.add_argument("--repeat", type=int, default=200, help="Wiederholungen je Backend")
+    args = parser.parse_args()
+
+    t = np.arange(int(args.seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    y = (0.4 * np.sin(2 * np.pi * 180 * t) + 0.05 * np.random.default_rng(0).standard_normal(len(t))).astype(np.float32)
+
+    import dsp
+    rows = [("dsp (" + dsp.FFT_BACKEND + ".fft)", cold_start_time("dsp"), run(dsp, y, args.repeat))]
+    try:
+        import librosa
+        rows.append(("librosa", cold_start_time("librosa"), run(librosa, y, args.repeat)))
+    except ImportError:
+        print("librosa nicht installiert - nur dsp wird gemessen")
+
+    print(f"{'Backend':<22}{'Kaltstart (ms)':>16}{'ms/Fenster':>14}")
+    print("=" * 52)
+    for name, cold_seconds, per_window in rows:
+        print(f"{name:<22}{1000 * cold_seconds:>16.0f}{1000 * per_window:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
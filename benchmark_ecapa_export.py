@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Benchmark exportiertes ECAPA gegen SpeechBrain float32
+Misst die Startzeit (Import + Laden + erstes Embedding in einem frischen
+Interpreter), die Latenz je Fenster für verschiedene Batch-Größen und die
+Kosinus-Übereinstimmung der Embeddings.
+
+Voraussetzung ist ein Export mit ecapa_export.py. Ohne ladbares SpeechBrain
+wird nur das exportierte Modell gemessen.
+
+Aufruf:
+    python benchmark_ecapa_export.py [--export models/ecapa-export] [--batches 1 4 8]
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from ecapa_export import ExportedEcapaEncoder, check_agreement, evaluation_segments
+from inference_workers import encode_batch_with_ecapa
+
+SPEECHBRAIN_LOAD = (
+    "from speechbrain.pretrained import EncoderClassifier\n"
+    "model = EncoderClassifier.from_hparams(source='{model}', "
+    "savedir='models/{savedir}', run_opts={{'device': 'cpu'}})\n"
+)
+EXPORTED_LOAD = (
+    "from ecapa_export import ExportedEcapaEncoder\n"
+    "model = ExportedEcapaEncoder('{export}')\n"
+)
+
+
+def cold_start_time(load: str) -> float:
+    """Import + Laden + erstes Embedding in einem frischen Python-Prozess (Sekunden)"""
+    code = (
+        "import time; s = time.perf_counter()\n"
+        "import numpy as np\n"
+        "from inference_workers import encode_batch_with_ecapa\n"
+        + load +
+        "encode_batch_with_ecapa(model, [np.random.default_rng(0).uniform(-1, 1, 24000).astype(np.float32)], 'cpu')\n"
+        "print(time.perf_counter() - s)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def latency(model, segments, batch_size: int, repeats: int) -> float:
+    """Millisekunden je Fenster bei gegebener Batch-Größe"""
+    encode_batch_with_ecapa(model, segments[:batch_size], "cpu")  # Warmup
+    start = time.perf_counter()
+    done = 0
+    for _ in range(repeats):
+        for offset in range(0, len(segments), batch_size):
+            encode_batch_with_ecapa(model, segments[offset:offset + batch_size], "cpu")
+            done += len(segments[offset:offset + batch_size])
+    return 1000.0 * (time.perf_counter() - start) / done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exportiertes ECAPA gegen SpeechBrain float32")
+    parser.add_argument("--export", default="models/ecapa-export", help="Exportverzeichnis oder Artefakt")
+    parser.add_argument("--model", default="speechbrain/spkrec-ecapa-voxceleb")
+    parser.add_argument("--windows", type=int, default=32, help="Fenster je Durchlauf")
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    from thread_budget import apply_torch_threads
+    apply_torch_threads()
+
+    models = {"int8 (Export)": ExportedEcapaEncoder(args.export)}
+    loads = {"int8 (Export)": EXPORTED_LOAD.format(export=args.export)}
+    try:
+        from speechbrain.pretrained import EncoderClassifier
+        savedir = args.model.split('/')[-1]
+        models["float32 (SpeechBrain)"] = EncoderClassifier.from_hparams(
+            source=args.model, savedir=f"models/{savedir}", run_opts={"device": "cpu"}
+        )
+        loads["float32 (SpeechBrain)"] = SPEECHBRAIN_LOAD.format(model=args.model, savedir=savedir)
+    except Exception as e:
+        print(f"⚠️ SpeechBrain-Modell nicht verfügbar ({e}) - messe nur den Export")
+
+    segments = evaluation_segments(count=args.windows)
+    print(f"{args.windows} Fenster à 1.5s (70-100 % Länge), Export: {models['int8 (Export)'].path}")
+    print(f"{'Modell':<22} {'Start':>7} " + " ".join(f"{'B=' + str(b):>8}" for b in args.batches) + "  (ms/Fenster)")
+    for name, model in models.items():
+        start = cold_start_time(loads[name])
+        timings = [latency(model, segments, batch_size, args.repeats) for batch_size in args.batches]
+        print(f"{name:<22} {start:>6.2f}s " + " ".join(f"{t:>8.2f}" for t in timings))
+
+    if len(models) > 1:
+        exported, reference = models.values()
+        agreement = check_agreement(
+            lambda batch: np.stack(encode_batch_with_ecapa(reference, batch, "cpu")),
+            lambda batch: np.stack(encode_batch_with_ecapa(exported, batch, "cpu")),
+            segments
+        )
+        print(f"Kosinus-Übereinstimmung int8/float32: Mittel {agreement['mean']:.4f}, "
+              f"Minimum {agreement['min']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
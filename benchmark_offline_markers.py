@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Benchmark Offline-Marker-Extraktion
+Vergleicht die blockweise Auswertung über MarkerSystem.process_audio_chunk
+(ein Aufruf pro Hop) mit OfflineMarkerExtractor (wenige vektorisierte Durchläufe).
+
+Aufruf:
+    python benchmark_offline_markers.py [--minutes 10] [--live-minutes 1]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from marker_system import MarkerSystem
+from offline_markers import OfflineMarkerExtractor
+
+SAMPLE_RATE = 16000
+
+
+def synthetic_session(minutes: float, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Harmonische 'Sprache' mit gleitender F0 und regelmäßigen Pausen"""
+    t = np.arange(int(minutes * 60 * sample_rate)) / sample_rate
+    f0 = 150 + 40 * np.sin(2 * np.pi * 0.1 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    voice = sum((0.3 / k) * np.sin(k * phase) for k in range(1, 6))
+    gate = np.sin(2 * np.pi * 0.15 * t) > -0.2
+    noise = 0.003 * np.random.default_rng(0).standard_normal(len(t))
+    return (voice * gate + noise).astype(np.float32)
+
+
+def run_live(signal: np.ndarray):
+    marker_system = MarkerSystem(sample_rate=SAMPLE_RATE)
+    marker_system.is_active = True
+    start = time.perf_counter()
+    for i in range(0, len(signal), marker_system.hop_size):
+        marker_system.process_audio_chunk(signal[i:i + marker_system.hop_size])
+    return time.perf_counter() - start, len(marker_system.timeline)
+
+
+def run_offline(signal: np.ndarray):
+    extractor = OfflineMarkerExtractor(sample_rate=SAMPLE_RATE)
+    start = time.perf_counter()
+    timeline = extractor.extract(signal)
+    return time.perf_counter() - start, len(timeline)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=10.0, help="Länge der Offline-Aufnahme")
+    parser.add_argument("--live-minutes", type=float, default=1.0,
+                        help="Länge für die (langsame) blockweise Auswertung")
+    args = parser.parse_args()
+
+    print(f"{'Verfahren':<26}{'Audio (s)':>10}{'Zeilen':>9}{'Rechenzeit (s)':>16}{'x Echtzeit':>12}")
+    print("=" * 73)
+    for name, minutes, runner in (("process_audio_chunk", args.live_minutes, run_live),
+                                  ("OfflineMarkerExtractor", args.minutes, run_offline)):
+        signal = synthetic_session(minutes)
+        duration = len(signal) / SAMPLE_RATE
+        elapsed, rows = runner(signal)
+        print(f"{name:<26}{duration:>10.0f}{rows:>9}{elapsed:>16.2f}{duration / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
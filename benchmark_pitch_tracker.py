@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Benchmark F0-Tracker
+Vergleicht die bisherige Pitch-Extraktion (piptrack über 1 s + Python-Schleife,
+bei jedem 1024er Block) mit dem inkrementellen YIN-Tracker (nur neue Frames je Hop).
+
+Aufruf:
+    python benchmark_pitch_tracker.py [--duration 30]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import dsp
+from ring_buffer import AudioRingBuffer
+from pitch_tracker import StreamingPitchTracker
+
+SAMPLE_RATE = 16000
+BLOCK_SIZE = 1024
+
+
+def synthetic_voice(duration: float, sample_rate: int = SAMPLE_RATE):
+    """Harmonisches Signal mit gleitender F0 (110-220 Hz) und leisem Rauschen"""
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    f0 = 165 + 55 * np.sin(2 * np.pi * 0.2 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    signal = sum((0.6 / k) * np.sin(k * phase) for k in range(1, 6))
+    signal += 0.01 * np.random.default_rng(0).standard_normal(len(t))
+    return signal.astype(np.float32), f0
+
+
+def cents_error(estimate: np.ndarray, reference: np.ndarray) -> float:
+    valid = estimate > 0
+    if not np.any(valid):
+        return float("nan")
+    return float(np.median(np.abs(1200 * np.log2(estimate[valid] / reference[valid]))))
+
+
+def run_piptrack(signal: np.ndarray, f0_true: np.ndarray):
+    buffer = []
+    timings, errors = [], []
+    for i in range(0, len(signal), BLOCK_SIZE):
+        buffer.extend(signal[i:i + BLOCK_SIZE])
+        buffer = buffer[-2 * SAMPLE_RATE:]
+        if len(buffer) < SAMPLE_RATE:
+            continue
+
+        start = time.perf_counter()
+        segment = np.array(buffer[-SAMPLE_RATE:], dtype=np.float32)
+        pitches, magnitudes = dsp.piptrack(y=segment, sr=SAMPLE_RATE, threshold=0.1, fmin=80, fmax=400)
+        values = []
+        for t in range(pitches.shape[1]):
+            index = magnitudes[:, t].argmax()
+            if pitches[index, t] > 0:
+                values.append(pitches[index, t])
+        timings.append(time.perf_counter() - start)
+
+        end = i + BLOCK_SIZE
+        if values:
+            errors.append(cents_error(np.array([np.mean(values)]), np.array([np.mean(f0_true[end - SAMPLE_RATE:end])])))
+
+    return timings, float(np.nanmedian(errors)) if errors else float("nan")
+
+
+def run_yin(signal: np.ndarray, f0_true: np.ndarray, hop_seconds: float = 0.25):
+    ring = AudioRingBuffer(2 * SAMPLE_RATE)
+    tracker = StreamingPitchTracker(sample_rate=SAMPLE_RATE)
+    hop_samples = int(hop_seconds * SAMPLE_RATE)
+
+    timings, estimates, references = [], [], []
+    pending = 0
+    for i in range(0, len(signal), BLOCK_SIZE):
+        ring.write(signal[i:i + BLOCK_SIZE])
+        pending += BLOCK_SIZE
+        if pending < hop_samples:
+            continue
+        pending = 0
+
+        start = time.perf_counter()
+        n_new = tracker.update(ring)
+        timings.append(time.perf_counter() - start)
+
+        starts, f0, _ = tracker.window_pitch(n_new)
+        centers = np.minimum(starts + tracker.frame_length // 2, len(f0_true) - 1)
+        estimates.append(f0)
+        references.append(f0_true[centers])
+
+    return timings, cents_error(np.concatenate(estimates), np.concatenate(references))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=30.0, help="Sekunden Testsignal")
+    args = parser.parse_args()
+
+    signal, f0_true = synthetic_voice(args.duration)
+
+    print(f"Testsignal: {args.duration:.0f} s, F0 110-220 Hz")
+    print("=" * 72)
+    print(f"{'Verfahren':<28}{'Aufrufe':>8}{'ms/Aufruf':>12}{'% Echtzeit':>12}{'Fehler (ct)':>12}")
+
+    rows = []
+    run_piptrack(signal[:SAMPLE_RATE * 2], f0_true)  # Aufwärmen (FFT-Caches)
+    rows.append(("piptrack + Schleife", *run_piptrack(signal, f0_true)))
+
+    rows.append(("YIN inkrementell (250 ms)", *run_yin(signal, f0_true)))
+
+    for name, timings, error in rows:
+        total = sum(timings)
+        print(f"{name:<28}{len(timings):>8}{1000 * total / max(len(timings), 1):>12.2f}"
+              f"{100 * total / args.duration:>12.2f}{error:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Benchmark Thread-Budget
+Vergleicht Latenzen unter gleichzeitiger Last (BLAS + torch + optional Whisper)
+mit Bibliotheks-Standard-Threads gegen das zentrale Thread-Budget.
+
+Aufruf:
+    python benchmark_thread_budget.py [--duration 10] [--whisper-model tiny]
+
+Jede Konfiguration läuft in einem eigenen Prozess, da BLAS-/OpenMP-Pools
+prozessweit beim Import festgelegt werden.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import thread_budget
+
+
+def _percentiles(samples):
+    if not samples:
+        return {"n": 0, "p50_ms": 0.0, "p95_ms": 0.0}
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+    }
+
+
+def run_worker(mode: str, duration: float, whisper_model: str):
+    """Lastlauf im Kindprozess, Ergebnis als JSON auf stdout"""
+    import numpy as np
+
+    budget = thread_budget.get_thread_budget()
+    if mode == "budget":
+        thread_budget.apply_blas_limits(budget)
+
+    lanes = {}
+    stop = threading.Event()
+
+    def lane(name, fn):
+        timings = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        lanes[name] = timings
+
+    # Marker-Analyse (BLAS/FFT über numpy)
+    rng = np.random.default_rng(0)
+    blas_a = rng.standard_normal((384, 384)).astype(np.float32)
+    audio = rng.standard_normal(16000).astype(np.float32)
+
+    def marker_work():
+        np.abs(np.fft.rfft(audio.reshape(-1, 500), axis=1))
+        blas_a @ blas_a
+
+    workers = [threading.Thread(target=lane, args=("marker_blas", marker_work))]
+
+    # ECAPA-Stellvertreter (torch Conv1d auf 1.5 s Fenster)
+    try:
+        import torch
+        if mode == "budget":
+            thread_budget.apply_torch_threads(budget)
+        conv = torch.nn.Sequential(
+            torch.nn.Conv1d(80, 512, 5, padding=2), torch.nn.ReLU(),
+            torch.nn.Conv1d(512, 512, 3, padding=1), torch.nn.ReLU(),
+            torch.nn.Conv1d(512, 192, 1)
+        ).eval()
+        features = torch.randn(1, 80, 150)
+
+        def ecapa_work():
+            with torch.no_grad():
+                conv(features)
+
+        workers.append(threading.Thread(target=lane, args=("ecapa_torch", ecapa_work)))
+    except ImportError:
+        pass
+
+    # Whisper (nur wenn ein Modell lokal ladbar ist)
+    if whisper_model:
+        try:
+            from faster_whisper import WhisperModel
+            model = WhisperModel(
+                whisper_model, device="cpu", compute_type="int8",
+                cpu_threads=budget.whisper_threads if mode == "budget" else 0,
+                download_root="./models"
+            )
+            chunk = (0.05 * rng.standard_normal(16000 * 3)).astype(np.float32)
+
+            def whisper_work():
+                segments, _ = model.transcribe(chunk, beam_size=1, vad_filter=False)
+                list(segments)
+
+            workers.append(threading.Thread(target=lane, args=("whisper_ct2", whisper_work)))
+        except Exception as e:
+            print(f"Whisper-Lane übersprungen: {e}", file=sys.stderr)
+
+    for worker in workers:
+        worker.start()
+    time.sleep(duration)
+    stop.set()
+    for worker in workers:
+        worker.join()
+
+    print(json.dumps({name: _percentiles(t) for name, t in lanes.items()}))
+
+
+def run_mode(mode: str, duration: float, whisper_model: str) -> dict:
+    env = os.environ.copy()
+    for var in thread_budget.BLAS_ENV_VARS:
+        env.pop(var, None)
+    if mode == "budget":
+        budget = thread_budget.get_thread_budget()
+        for var in thread_budget.BLAS_ENV_VARS:
+            env[var] = str(budget.blas_threads)
+
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", mode,
+         "--duration", str(duration), "--whisper-model", whisper_model or ""],
+        env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10.0, help="Sekunden pro Konfiguration")
+    parser.add_argument("--whisper-model", default="", help="z.B. tiny oder base (optional)")
+    parser.add_argument("--worker", choices=["default", "budget"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.duration, args.whisper_model)
+        return
+
+    budget = thread_budget.get_thread_budget()
+    print(f"Kerne: {budget.total} | Budget Whisper/torch/BLAS: "
+          f"{budget.whisper_threads}/{budget.torch_threads}/{budget.blas_threads}")
+    print("=" * 64)
+
+    results = {mode: run_mode(mode, args.duration, args.whisper_model)
+               for mode in ("default", "budget")}
+
+    print(f"{'Lane':<14}{'Modus':<10}{'Aufrufe':>9}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+    for lane in results["default"]:
+        for mode in ("default", "budget"):
+            stats = results[mode].get(lane, {"n": 0, "p50_ms": 0.0, "p95_ms": 0.0})
+            print(f"{lane:<14}{mode:<10}{stats['n']:>9}{stats['p50_ms']:>12.2f}{stats['p95_ms']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Diarisierung über Kanalenergie (ein Mikrofon je Sprecher)
+Entscheidet frameweise über das dominante Mikrofon, mit Übersprech-Unterdrückung
+und Hysterese, nur in Sprachbereichen des gemeinsamen VAD. Kein neuronales
+Modell; gleiche Signale wie SpeakerRecognitionSystem.
+"""
+
+import time
+import collections
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+def frame_energies(audio: np.ndarray, frame_length: int) -> np.ndarray:
+    """Mittlere Leistung je Frame und Kanal: (n_samples, C) -> (n_samples // frame_length, C)"""
+    n = len(audio) // frame_length
+    frames = audio[:n * frame_length].reshape(n, frame_length, -1)
+    return np.mean(np.square(frames, dtype=np.float32), axis=1)
+
+
+def dominant_channels(energies: np.ndarray, crosstalk: float = 0.3, dominance: float = 0.6,
+                      silence: float = 1e-6) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Dominanter Kanal je Frame
+
+    Von jeder Kanalleistung wird der erwartete Übersprech-Anteil der anderen
+    Kanäle (crosstalk × deren Leistung) abgezogen; der Kanal mit dem größten
+    Anteil an der bereinigten Gesamtleistung gewinnt, wenn dieser Anteil
+    mindestens dominance beträgt und der Frame nicht still ist.
+
+    Returns:
+        (Kanal je Frame, -1 = unentschieden; Anteil des gewinnenden Kanals)
+    """
+    others = energies.sum(axis=1, keepdims=True) - energies
+    clean = np.maximum(energies - crosstalk * others, 0.0)
+    shares = clean / np.maximum(clean.sum(axis=1, keepdims=True), 1e-12)
+    candidates = np.argmax(shares, axis=1)
+    confidence = shares[np.arange(len(shares)), candidates]
+    undecided = (confidence < dominance) | (energies.max(axis=1) < silence)
+    return np.where(undecided, -1, candidates), confidence
+
+
+def apply_hysteresis(candidates: np.ndarray, current: int, min_frames: int) -> Tuple[np.ndarray, int]:
+    """
+    Sprecherwechsel erst nach min_frames Frames in Folge übernehmen
+
+    Unentschiedene Frames behalten die vorige Stimme; kürzere Läufe eines
+    anderen Kanals werden dem davorliegenden stabilen Sprecher zugeschlagen.
+    Ein stabiler Wechsel gilt rückwirkend ab Beginn seines Laufs.
+
+    Returns:
+        (Sprecher je Frame, Index ab dem der letzte Lauf noch offen ist;
+         len(candidates), wenn alles entschieden ist)
+    """
+    n = len(candidates)
+    if n == 0:
+        return candidates.copy(), 0
+
+    # Unentschiedene Frames: letzte Stimme fortschreiben (anfangs current)
+    voted = np.where(candidates >= 0, np.arange(n), -1)
+    np.maximum.accumulate(voted, out=voted)
+    filled = np.where(voted >= 0, candidates[np.maximum(voted, 0)], current)
+
+    run_starts = np.flatnonzero(np.r_[True, filled[1:] != filled[:-1]])
+    run_lengths = np.diff(np.r_[run_starts, n])
+    run_labels = filled[run_starts]
+    stable = run_lengths >= min_frames
+    stable[0] |= run_labels[0] == current
+
+    # Instabile Läufe erben den letzten stabilen Sprecher davor
+    last_stable = np.where(stable, np.arange(len(run_starts)), -1)
+    np.maximum.accumulate(last_stable, out=last_stable)
+    resolved = np.where(last_stable >= 0, run_labels[np.maximum(last_stable, 0)], current)
+
+    # Ein offener letzter Lauf eines anderen Sprechers kann noch stabil werden
+    open_from = n
+    if not stable[-1] and run_labels[-1] != resolved[-1]:
+        open_from = int(run_starts[-1])
+    return np.repeat(resolved, run_lengths), open_from
+
+
+class ChannelEnergyDiarizer(QObject):
+    """
+    Diarisierung für Aufnahmen mit einem Mikrofon je Sprecher
+
+    process_channels() bekommt die Mehrkanal-Blöcke auf der Sample-Uhr und
+    legt die Frame-Energien in einem Ring ab; process_speech_segment() (als
+    Sprach-Listener des LiveTranscriber) entscheidet für die Sprach-Frames
+    über den Sprecher und meldet Läufe als speaker_segment. Sprecher-ID =
+    Kanalindex, die Rolle kommt aus channel_roles.
+    """
+
+    # Qt Signale (wie SpeakerRecognitionSystem)
+    speaker_detected = pyqtSignal(int, float, str)  # speaker_id, confidence, speaker_type
+    speaker_changed = pyqtSignal(int, int)          # old_speaker_id, new_speaker_id
+    speaker_segment = pyqtSignal(int, int, int, float)  # start_sample, end_sample, speaker_id, confidence
+
+    def __init__(self, sample_rate: int = 16000, channel_roles: Optional[List[str]] = None,
+                 frame_duration: float = 0.02, crosstalk: float = 0.3, dominance: float = 0.6,
+                 silence: float = 1e-6, min_switch: float = 0.3, history: float = 60.0,
+                 latency_budget: float = 0.5):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.channel_roles = channel_roles or ['therapist', 'patient']
+        self.frame_length = int(frame_duration * sample_rate)
+        self.crosstalk = crosstalk
+        self.dominance = dominance
+        self.silence = silence
+        self.min_frames = max(1, int(min_switch / frame_duration))
+        self.latency_budget = latency_budget
+        self.capacity = int(history / frame_duration)
+        self.is_processing = False
+
+        self.processing_times = collections.deque(maxlen=100)
+        self.reset()
+
+    def reset(self):
+        self._energies = None                 # Ring (capacity, C), angelegt beim ersten Block
+        self._remainder = np.zeros((0, 0), dtype=np.float32)
+        self._frames_done = 0                 # Frames mit Energie (absoluter Index)
+        self._next_frame = 0                  # erster noch nicht gemeldeter Sprach-Frame
+        self._speech_until = 0                # Ende des letzten Sprachstücks (Frame)
+        self.current_speaker = -1
+        self.speaking_time: Dict[int, float] = {}
+
+    # ---------------------------------------------------------------- Pipeline
+
+    def start_processing(self) -> bool:
+        self.reset()
+        self.is_processing = True
+        return True
+
+    def stop_processing(self):
+        if self.is_processing:
+            self.end_speech_segment()
+        self.is_processing = False
+
+    def shutdown(self):
+        self.stop_processing()
+
+    def process_channels(self, start_sample: int, block: np.ndarray):
+        """Mehrkanal-Block (n_samples, C) ab start_sample in Frame-Energien umrechnen"""
+        if not self.is_processing:
+            return
+        block = np.asarray(block, dtype=np.float32)
+        if block.ndim == 1:
+            block = block[:, None]
+        if self._energies is None:
+            self._energies = np.zeros((self.capacity, block.shape[1]), dtype=np.float32)
+            self._remainder = np.zeros((0, block.shape[1]), dtype=np.float32)
+            # Frame-Raster an der Sample-Uhr ausrichten
+            skip = -start_sample % self.frame_length
+            block = block[skip:]
+            self._frames_done = (start_sample + skip) // self.frame_length
+
+        audio = np.concatenate([self._remainder, block]) if len(self._remainder) else block
+        energies = frame_energies(audio, self.frame_length)
+        self._remainder = audio[len(energies) * self.frame_length:]
+
+        slots = (self._frames_done + np.arange(len(energies))) % self.capacity
+        self._energies[slots] = energies
+        self._frames_done += len(energies)
+
+    def process_speech_segment(self, start_sample: int, audio_data: np.ndarray) -> Dict:
+        """Sprachstück des gemeinsamen VAD: Sprecher für dessen Frames bestimmen"""
+        if not self.is_processing or self._energies is None:
+            return self.get_current_speaker_data()
+
+        start_time = time.perf_counter()
+        first = start_sample // self.frame_length
+        last = min(-(-(start_sample + len(audio_data)) // self.frame_length), self._frames_done)
+        if first > self._next_frame:
+            self.end_speech_segment()  # Lücke: offenen Lauf abschließen
+            self._next_frame = first
+        self._next_frame = max(self._next_frame, self._frames_done - self.capacity)
+        self._speech_until = max(self._speech_until, last)
+        self._decide(last, final=False)
+        self.processing_times.append(time.perf_counter() - start_time)
+        return self.get_current_speaker_data()
+
+    def end_speech_segment(self):
+        """Sprachsegment beendet: offenen Lauf dem aktuellen Sprecher zuschlagen"""
+        if self._energies is not None and self._next_frame < self._speech_until:
+            self._decide(self._speech_until, final=True)
+
+    def refine_speakers(self, *args, **kwargs) -> Tuple[np.ndarray, np.ndarray]:
+        """Kein Nachclustering nötig: Sprecher = Kanal"""
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    # -------------------------------------------------------------- Entscheidung
+
+    def _decide(self, last: int, final: bool):
+        """Frames [_next_frame, last) entscheiden und als Läufe melden"""
+        first = self._next_frame
+        if last <= first:
+            return
+        slots = np.arange(first, last) % self.capacity
+        candidates, confidence = dominant_channels(
+            self._energies[slots], self.crosstalk, self.dominance, self.silence
+        )
+        labels, open_from = apply_hysteresis(candidates, self.current_speaker, self.min_frames)
+        if final:
+            open_from = len(labels)  # offener Lauf bleibt beim stabilen Sprecher davor
+        if open_from == 0:
+            return
+
+        labels, confidence = labels[:open_from], confidence[:open_from]
+        run_starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+        run_ends = np.r_[run_starts[1:], len(labels)]
+        run_confidence = np.add.reduceat(confidence, run_starts) / (run_ends - run_starts)
+        for run_start, run_end, conf in zip(run_starts, run_ends, run_confidence):
+            self._emit_run(first + int(run_start), first + int(run_end), int(labels[run_start]), float(conf))
+        self._next_frame = first + open_from
+
+    def _emit_run(self, first: int, last: int, speaker_id: int, confidence: float):
+        if speaker_id < 0:
+            return  # noch kein Sprecher entschieden
+        previous = self.current_speaker
+        self.current_speaker = speaker_id
+        self.speaking_time[speaker_id] = self.speaking_time.get(speaker_id, 0.0) + \
+            (last - first) * self.frame_length / self.sample_rate
+
+        self.speaker_detected.emit(speaker_id, confidence, self._speaker_type(speaker_id))
+        if previous >= 0 and previous != speaker_id:
+            self.speaker_changed.emit(previous, speaker_id)
+        self.speaker_segment.emit(first * self.frame_length, last * self.frame_length, speaker_id, confidence)
+
+    def _speaker_type(self, speaker_id: int) -> str:
+        return self.channel_roles[speaker_id] if speaker_id < len(self.channel_roles) else 'unknown'
+
+    # ---------------------------------------------------------------- Abfragen
+
+    def get_current_speaker_data(self) -> Dict:
+        """Aktuelle Speaker-Daten (gleiche Felder wie SpeakerRecognitionSystem)"""
+        speaker_id = self.current_speaker
+        speaker_type = self._speaker_type(speaker_id) if speaker_id >= 0 else 'unknown'
+        return {
+            'speaker_id': max(speaker_id, 0),
+            'confidence': 1.0 if speaker_id >= 0 else 0.0,
+            'speaker_type': speaker_type,
+            'is_enrolled': speaker_type in ['therapist', 'patient'],
+            'total_speakers': len(self.speaking_time)
+        }
+
+    def get_performance_stats(self) -> Dict:
+        times = list(self.processing_times) or [0.0]
+        return {
+            'avg_processing_time': float(np.mean(times)),
+            'max_processing_time': float(np.max(times)),
+            'frames_processed': self._frames_done
+        }
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Schlanke DSP-Kernel (NumPy / scipy.fft)
+Die von TransRapport genutzten librosa-Features (stft, rms, zero_crossing_rate,
+spectral_centroid, spectral_rolloff, piptrack) ohne librosa-Import.
+Konventionen (Achsen, Zentrierung, Padding, Fenster) wie librosa 0.10/0.11;
+librosa dient nur noch als Referenz in Tests und Benchmarks.
+"""
+
+import numpy as np
+from typing import Optional, Tuple
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    # scipy.fft rechnet float32 auch in einfacher Genauigkeit (numpy.fft immer in float64)
+    from scipy import fft as _fft
+    FFT_BACKEND = "scipy"
+except ImportError:
+    _fft = np.fft
+    FFT_BACKEND = "numpy"
+
+
+def rfft(x: np.ndarray, n: Optional[int] = None, axis: int = -1) -> np.ndarray:
+    return _fft.rfft(x, n=n, axis=axis)
+
+
+def irfft(x: np.ndarray, n: Optional[int] = None, axis: int = -1) -> np.ndarray:
+    return _fft.irfft(x, n=n, axis=axis)
+
+
+def rfftfreq(n_fft: int, sample_rate: float) -> np.ndarray:
+    return np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+
+
+def hann_window(length: int) -> np.ndarray:
+    """Periodisches Hann-Fenster (wie scipy.signal.get_window('hann', fftbins=True))"""
+    return (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(length) / length)).astype(np.float32)
+
+
+def frame(y: np.ndarray, frame_length: int, hop_length: int) -> np.ndarray:
+    """Frames als (n_frames, frame_length)-View ohne Kopie"""
+    return sliding_window_view(y, frame_length)[::hop_length]
+
+
+def _center(y: np.ndarray, n_fft: int, center: bool, pad_mode: str) -> np.ndarray:
+    return np.pad(y, n_fft // 2, mode=pad_mode) if center else y
+
+
+def _magnitude(y: Optional[np.ndarray], S: Optional[np.ndarray], n_fft: int, hop_length: int,
+               center: bool, pad_mode: str) -> Tuple[np.ndarray, int]:
+    """Betragsspektrum (bins, frames) aus y oder übergebenem S"""
+    if S is not None:
+        return np.abs(S), 2 * (S.shape[-2] - 1)
+    return np.abs(stft(y, n_fft=n_fft, hop_length=hop_length, center=center, pad_mode=pad_mode)), n_fft
+
+
+# ---------------------------------------------------------------- Spektrum
+
+def stft(y: np.ndarray, n_fft: int = 2048, hop_length: Optional[int] = None,
+         center: bool = True, pad_mode: str = "constant") -> np.ndarray:
+    """
+    Kurzzeit-Fouriertransformation mit periodischem Hann-Fenster
+
+    Returns:
+        Komplexes Spektrum (1 + n_fft // 2, n_frames) wie librosa.stft
+    """
+    hop_length = n_fft // 4 if hop_length is None else hop_length
+    y = _center(np.asarray(y, dtype=np.float32), n_fft, center, pad_mode)
+    frames = frame(y, n_fft, hop_length) * hann_window(n_fft)
+    return rfft(frames, axis=1).T
+
+
+def rms(y: Optional[np.ndarray] = None, S: Optional[np.ndarray] = None, frame_length: int = 2048,
+        hop_length: int = 512, center: bool = True, pad_mode: str = "constant") -> np.ndarray:
+    """RMS-Energie je Frame, Form (1, n_frames) wie librosa.feature.rms"""
+    if y is not None:
+        frames = frame(_center(np.asarray(y, dtype=np.float32), frame_length, center, pad_mode),
+                       frame_length, hop_length)
+        power = np.mean(np.square(frames, dtype=np.float32), axis=1)
+    elif S is not None:
+        power_spec = np.square(np.abs(S))
+        power_spec[0] *= 0.5
+        if frame_length % 2 == 0:
+            power_spec[-1] *= 0.5
+        power = 2 * power_spec.sum(axis=0) / frame_length ** 2
+    else:
+        raise ValueError("Entweder y oder S muss übergeben werden")
+    return np.sqrt(power)[np.newaxis, :]
+
+
+def zero_crossing_rate(y: np.ndarray, frame_length: int = 2048, hop_length: int = 512,
+                       center: bool = True, threshold: float = 1e-10) -> np.ndarray:
+    """
+    Anteil der Nulldurchgänge je Frame, Form (1, n_frames) wie librosa.feature.zero_crossing_rate
+
+    Werte mit |y| <= threshold zählen als 0 (positiv); das erste Sample eines Frames zählt nie.
+    """
+    y = np.asarray(y, dtype=np.float32)
+    if center:
+        y = np.pad(y, frame_length // 2, mode="edge")
+    frames = frame(y, frame_length, hop_length)
+    negative = frames < -threshold
+    crossings = np.count_nonzero(negative[:, 1:] != negative[:, :-1], axis=1)
+    return (crossings / frame_length)[np.newaxis, :]
+
+
+def spectral_centroid(y: Optional[np.ndarray] = None, sr: int = 22050, S: Optional[np.ndarray] = None,
+                      n_fft: int = 2048, hop_length: int = 512, center: bool = True,
+                      pad_mode: str = "constant") -> np.ndarray:
+    """Spektraler Schwerpunkt (Hz) je Frame, Form (1, n_frames)"""
+    S, n_fft = _magnitude(y, S, n_fft, hop_length, center, pad_mode)
+    freqs = rfftfreq(n_fft, sr)
+    totals = S.sum(axis=0)
+    # Spalten ohne Energie bleiben (wie bei librosa.util.normalize) unnormiert, also ~0
+    safe = np.where(totals < np.finfo(S.dtype).tiny, 1.0, totals)
+    return ((freqs @ S) / safe)[np.newaxis, :]
+
+
+def spectral_rolloff(y: Optional[np.ndarray] = None, sr: int = 22050, S: Optional[np.ndarray] = None,
+                     n_fft: int = 2048, hop_length: int = 512, center: bool = True,
+                     pad_mode: str = "constant", roll_percent: float = 0.85) -> np.ndarray:
+    """Frequenz, unterhalb der roll_percent der Spektralenergie liegen, Form (1, n_frames)"""
+    S, n_fft = _magnitude(y, S, n_fft, hop_length, center, pad_mode)
+    freqs = rfftfreq(n_fft, sr)
+    cumulative = np.cumsum(S, axis=0)
+    reached = cumulative >= roll_percent * cumulative[-1]
+    return freqs[np.argmax(reached, axis=0)][np.newaxis, :]
+
+
+def piptrack(y: Optional[np.ndarray] = None, sr: int = 22050, S: Optional[np.ndarray] = None,
+             n_fft: int = 2048, hop_length: Optional[int] = None, fmin: float = 150.0,
+             fmax: float = 4000.0, threshold: float = 0.1, center: bool = True,
+             pad_mode: str = "constant") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parabolisch interpolierte Spektralspitzen wie librosa.piptrack
+
+    Returns:
+        (pitches, magnitudes) - je (bins, frames), 0 außerhalb der Spitzen
+    """
+    hop_length = n_fft // 4 if hop_length is None else hop_length
+    S, n_fft = _magnitude(y, S, n_fft, hop_length, center, pad_mode)
+    fmin, fmax = max(fmin, 0.0), min(fmax, sr / 2.0)
+    freqs = rfftfreq(n_fft, sr)
+
+    # Parabolische Verschiebung je Bin (0 wenn das Optimum außerhalb [n-1, n+1] läge)
+    a = S[2:] + S[:-2] - 2 * S[1:-1]
+    b = 0.5 * (S[2:] - S[:-2])
+    shift = np.zeros_like(S)
+    inside = np.abs(b) < np.abs(a)
+    shift[1:-1] = np.where(inside, -b / np.where(inside, a, 1), 0)
+    dskew = 0.5 * np.gradient(S, axis=0) * shift
+
+    # Lokale Maxima über der Schwelle (relativ zum Maximum je Frame) im Frequenzbereich
+    masked = S * (S > threshold * S.max(axis=0, keepdims=True))
+    peaks = np.zeros_like(S, dtype=bool)
+    peaks[1:-1] = (masked[1:-1] > masked[:-2]) & (masked[1:-1] >= masked[2:])
+    peaks[-1] = masked[-1] > masked[-2]
+    peaks &= ((fmin <= freqs) & (freqs < fmax))[:, np.newaxis]
+
+    bins, frames_idx = np.nonzero(peaks)
+    pitches = np.zeros_like(S)
+    magnitudes = np.zeros_like(S)
+    pitches[bins, frames_idx] = (bins + shift[bins, frames_idx]) * float(sr) / n_fft
+    magnitudes[bins, frames_idx] = S[bins, frames_idx] + dskew[bins, frames_idx]
+    return pitches, magnitudes
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Export des ECAPA-Sprechermodells für schnelle CPU-Inferenz
+Bildet Feature-Extraktion (STFT, Mel-Filterbank, Satz-Mittelwert-Normierung)
+und ECAPA-TDNN als einen Graphen ab, exportiert ihn als ONNX (int8 dynamisch
+quantisiert über onnxruntime) oder TorchScript (Linear-Schichten int8) und
+prüft die Übereinstimmung mit dem float32-Modell über Kosinus-Ähnlichkeit.
+
+Zur Laufzeit lädt ExportedEcapaEncoder nur das Artefakt: für ONNX genügt
+onnxruntime, SpeechBrain und (ohne TorchScript) torch werden nicht importiert.
+
+Aufruf:
+    python ecapa_export.py [--format onnx|torchscript] [--output models/ecapa-export] [--audio datei.wav]
+"""
+
+import os
+import json
+import contextlib
+import time
+import argparse
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+METADATA_FILE = "ecapa_export.json"
+ARTIFACTS = {"onnx": "ecapa_int8.onnx", "torchscript": "ecapa_int8.pt"}
+
+# Mindest-Übereinstimmung mit float32 (Kosinus-Ähnlichkeit der Embeddings)
+MIN_MEAN_AGREEMENT = 0.99
+MIN_WORST_AGREEMENT = 0.97
+
+
+def build_export_module(classifier):
+    """
+    ECAPA-Encoder eines SpeechBrain-EncoderClassifier als exportierbares Modul
+
+    forward(wavs (B, T), wav_lens (B,)) -> Embeddings (B, 1, D), wie encode_batch.
+    torch.stft lässt sich nicht nach ONNX exportieren; die STFT wird daher als
+    Faltung mit fester DFT-Basis (gefenstert, gleiche Frames wie center=True,
+    pad_mode='constant') gerechnet. Filterbank und Embedding-Netz sind die
+    Module des Classifiers, die Normierung folgt InputNormalization(norm_type='sentence').
+    """
+    import torch
+    from speechbrain.processing.features import spectral_magnitude
+
+    features = classifier.mods.compute_features
+    stft = features.compute_STFT
+    normalization = classifier.mods.mean_var_norm
+
+    class EcapaExport(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.n_fft = int(stft.n_fft)
+            self.hop_length = int(stft.hop_length)
+            self.std_norm = bool(getattr(normalization, "std_norm", False))
+            self.eps = float(getattr(normalization, "eps", 1e-10))
+            self.register_buffer("dft_basis", dft_basis(stft.window, self.n_fft))
+            self.compute_fbanks = features.compute_fbanks
+            self.embedding_model = classifier.mods.embedding_model
+
+        def forward(self, wavs: torch.Tensor, wav_lens: torch.Tensor) -> torch.Tensor:
+            spectrum = dft_stft(wavs, self.dft_basis, self.hop_length)
+            feats = self.compute_fbanks(spectral_magnitude(spectrum))
+            feats = sentence_normalize(feats, wav_lens, self.std_norm, self.eps)
+            return self.embedding_model(feats, wav_lens)
+
+    return EcapaExport().eval()
+
+
+def dft_basis(window, n_fft: int):
+    """Gefensterte DFT-Basis (Realteile, dann Imaginärteile) als conv1d-Gewicht (2F, 1, n_fft)"""
+    import torch
+
+    window = window.detach().float().cpu()
+    if len(window) < n_fft:  # torch.stft zentriert kürzere Fenster im FFT-Rahmen
+        left = (n_fft - len(window)) // 2
+        window = torch.nn.functional.pad(window, (left, n_fft - len(window) - left))
+    n = torch.arange(n_fft, dtype=torch.float64)
+    k = torch.arange(n_fft // 2 + 1, dtype=torch.float64)[:, None]
+    angle = 2.0 * np.pi * k * n / n_fft
+    basis = torch.cat([torch.cos(angle), -torch.sin(angle)]) * window.double()
+    return basis.float().unsqueeze(1)
+
+
+def dft_stft(wavs, basis, hop_length: int):
+    """
+    STFT als Faltung: (B, T) -> (B, Frames, F, 2)
+
+    Entspricht torch.view_as_real(torch.stft(..., center=True, pad_mode='constant'))
+    mit vertauschter Zeit-/Frequenzachse, wie SpeechBrains STFT-Modul sie liefert.
+    """
+    import torch
+
+    n_fft = basis.shape[-1]
+    padded = torch.nn.functional.pad(wavs.unsqueeze(1), (n_fft // 2, n_fft // 2))
+    spectrum = torch.nn.functional.conv1d(padded, basis, stride=hop_length)
+    bins = spectrum.shape[1] // 2
+    return torch.stack([spectrum[:, :bins], spectrum[:, bins:]], dim=-1).transpose(1, 2)
+
+
+def sentence_normalize(feats, wav_lens, std_norm: bool = False, eps: float = 1e-10):
+    """Mittelwert (optional Standardabweichung) je Satz über die gültigen Frames abziehen"""
+    import torch
+
+    frames = feats.shape[1]
+    valid = torch.round(wav_lens * frames)
+    mask = (torch.arange(frames, device=feats.device)[None, :] < valid[:, None]).to(feats.dtype)[..., None]
+    count = valid[:, None, None].clamp(min=1.0)
+    mean = (feats * mask).sum(dim=1, keepdim=True) / count
+    if not std_norm:
+        return feats - mean
+    variance = (((feats - mean) * mask) ** 2).sum(dim=1, keepdim=True) / (count - 1.0).clamp(min=1.0)
+    return (feats - mean) / variance.sqrt().clamp(min=eps)
+
+
+def traceable_length_to_mask(length, max_len=None, dtype=None, device=None):
+    """
+    length_to_mask ohne Python-len(): SpeechBrains Version würde beim Tracen die
+    Batch-Größe des Beispiel-Batches als Konstante in den Graphen schreiben
+    """
+    import torch
+
+    if max_len is None:
+        max_len = length.max().long().item()
+    mask = torch.arange(max_len, device=length.device, dtype=length.dtype)[None, :] < length[:, None]
+    return mask.to(dtype=dtype or length.dtype, device=device or length.device)
+
+
+@contextlib.contextmanager
+def traceable_masks():
+    """Während des Exports die Masken in SE-Blöcken und Attentive Pooling tracebar rechnen"""
+    from speechbrain.lobes.models import ECAPA_TDNN
+
+    original = ECAPA_TDNN.length_to_mask
+    ECAPA_TDNN.length_to_mask = traceable_length_to_mask
+    try:
+        yield
+    finally:
+        ECAPA_TDNN.length_to_mask = original
+
+
+# ---------------------------------------------------------------------- Export
+
+def export_onnx(module, output_dir: str, example_seconds: float = 1.5) -> Dict[str, str]:
+    """float32-ONNX exportieren und die Gewichte des Embedding-Netzes dynamisch int8-quantisieren"""
+    import torch
+    import onnx
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    float_path = os.path.join(output_dir, "ecapa_fp32.onnx")
+    quantized_path = os.path.join(output_dir, ARTIFACTS["onnx"])
+    wavs = torch.zeros(2, int(example_seconds * SAMPLE_RATE))
+    wav_lens = torch.ones(2)
+    with traceable_masks():
+        torch.onnx.export(
+            module, (wavs, wav_lens), float_path,
+            input_names=["wavs", "wav_lens"], output_names=["embeddings"],
+            dynamic_axes={"wavs": {0: "batch", 1: "samples"}, "wav_lens": {0: "batch"},
+                          "embeddings": {0: "batch"}},
+            opset_version=17, dynamo=False
+        )
+
+    # Nur das Embedding-Netz quantisieren: DFT-Basis und Filterbank bleiben float32,
+    # sonst verschiebt der Quantisierungsfehler die log-Mel-Features
+    graph = onnx.load(float_path).graph
+    exclude = [node.name for node in graph.node if not node.name.startswith("/embedding_model/")]
+    quantize_dynamic(float_path, quantized_path, weight_type=QuantType.QInt8,
+                     op_types_to_quantize=["Conv", "MatMul", "Gemm"], nodes_to_exclude=exclude)
+    return {"float32": float_path, "int8": quantized_path}
+
+
+def export_torchscript(module, output_dir: str, example_seconds: float = 1.5) -> Dict[str, str]:
+    """
+    Linear-Schichten dynamisch int8-quantisieren und als TorchScript tracen
+
+    Die dynamische Quantisierung von torch deckt nur Linear/LSTM ab; die
+    Faltungen des TDNN bleiben float32. Für int8-Faltungen das ONNX-Format nutzen.
+    """
+    import torch
+
+    quantized_path = os.path.join(output_dir, ARTIFACTS["torchscript"])
+    module.embedding_model = torch.ao.quantization.quantize_dynamic(
+        module.embedding_model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    wavs = torch.zeros(2, int(example_seconds * SAMPLE_RATE))
+    with torch.no_grad(), traceable_masks():
+        traced = torch.jit.trace(module, (wavs, torch.ones(2)), check_trace=False)
+    traced.save(quantized_path)
+    return {"int8": quantized_path}
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    return np.sum(a * b, axis=1)
+
+
+def check_agreement(reference: Callable, candidate: Callable, segments: List[np.ndarray],
+                    batch_size: int = 8) -> Dict[str, float]:
+    """
+    Kosinus-Ähnlichkeit der Embeddings zweier Encoder auf denselben Segmenten
+
+    reference/candidate bekommen eine Liste von Segmenten und liefern (n, D).
+    """
+    similarities = []
+    for offset in range(0, len(segments), batch_size):
+        batch = segments[offset:offset + batch_size]
+        similarities.append(_cosine(np.asarray(reference(batch)), np.asarray(candidate(batch))))
+    similarities = np.concatenate(similarities)
+    return {"mean": float(similarities.mean()), "min": float(similarities.min()),
+            "segments": len(similarities)}
+
+
+def evaluation_segments(audio: Optional[np.ndarray] = None, count: int = 48,
+                        window: float = 1.5, seed: int = 0) -> List[np.ndarray]:
+    """
+    Prüfsegmente in Fensterlänge (auch verkürzte Rest-Fenster), peak-normalisiert wie
+    in der Sprechererkennung; ohne Audio synthetische Stimm-ähnliche Signale
+    """
+    rng = np.random.default_rng(seed)
+    length = int(window * SAMPLE_RATE)
+    segments = []
+    for _ in range(count):
+        size = int(length * rng.uniform(0.7, 1.0))
+        if audio is not None and len(audio) > size:
+            offset = int(rng.integers(0, len(audio) - size))
+            segment = np.asarray(audio[offset:offset + size], dtype=np.float32)
+        else:
+            # Harmonische mit schwankender Grundfrequenz plus Rauschen
+            t = np.arange(size) / SAMPLE_RATE
+            f0 = rng.uniform(90, 250) * (1 + 0.05 * np.sin(2 * np.pi * rng.uniform(2, 6) * t))
+            phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+            segment = sum(np.sin(h * phase) / h for h in range(1, 12))
+            segment = (segment + 0.05 * rng.standard_normal(size)).astype(np.float32)
+        peak = np.max(np.abs(segment))
+        segments.append(segment / peak if peak > 0 else segment)
+    return segments
+
+
+def export_ecapa(classifier, output_dir: str, export_format: str = "onnx",
+                 segments: Optional[List[np.ndarray]] = None,
+                 min_mean: float = MIN_MEAN_AGREEMENT, min_worst: float = MIN_WORST_AGREEMENT,
+                 source: str = "") -> Dict:
+    """
+    Classifier exportieren, gegen float32 prüfen und Metadaten schreiben
+
+    Liegt die Übereinstimmung unter min_mean/min_worst, wird das Artefakt
+    gelöscht und ValueError ausgelöst - ein schlechtes Modell soll nicht
+    unbemerkt die Sprechererkennung übernehmen.
+
+    Returns:
+        Metadaten (auch in ecapa_export.json abgelegt)
+    """
+    import torch
+    from inference_workers import encode_batch_with_ecapa
+
+    if export_format not in ARTIFACTS:
+        raise ValueError(f"Unbekanntes Exportformat: {export_format}")
+    os.makedirs(output_dir, exist_ok=True)
+    segments = segments if segments is not None else evaluation_segments()
+    device = torch.device("cpu")
+
+    module = build_export_module(classifier)
+    export = export_onnx if export_format == "onnx" else export_torchscript
+    paths = export(module, output_dir)
+
+    encoder = ExportedEcapaEncoder(paths["int8"])
+    agreement = check_agreement(
+        lambda batch: np.stack(encode_batch_with_ecapa(classifier, batch, device)),
+        lambda batch: np.stack(encode_batch_with_ecapa(encoder, batch, device)),
+        segments
+    )
+    metadata = {
+        "format": export_format,
+        "artifact": os.path.basename(paths["int8"]),
+        "source": source,
+        "sample_rate": SAMPLE_RATE,
+        "embedding_dim": int(encode_batch_with_ecapa(encoder, segments[:1], device)[0].shape[-1]),
+        "agreement": agreement,
+        "created": datetime.now().isoformat(),
+    }
+    if agreement["mean"] < min_mean or agreement["min"] < min_worst:
+        os.remove(paths["int8"])
+        raise ValueError(f"Export verworfen: Übereinstimmung mit float32 zu gering ({agreement})")
+
+    with open(os.path.join(output_dir, METADATA_FILE), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=1)
+    return metadata
+
+
+# --------------------------------------------------------------------- Laufzeit
+
+class ExportedEcapaEncoder:
+    """
+    Exportierter ECAPA-Encoder (ONNX über onnxruntime oder TorchScript)
+
+    Gleiche Schnittstelle wie EncoderClassifier.encode_batch, aber mit NumPy
+    ein und aus (numpy_io); encode_batch_with_ecapa reicht die Batches direkt durch.
+    path ist ein Artefakt oder ein Exportverzeichnis mit ecapa_export.json.
+    Mit require_agreement (Sprechererkennung) wird nur ein Exportverzeichnis
+    akzeptiert, dessen Übereinstimmungsprüfung gegen float32 bestanden ist.
+    """
+
+    numpy_io = True
+
+    def __init__(self, path: str, num_threads: int = 0, require_agreement: bool = False):
+        if os.path.isdir(path):
+            with open(os.path.join(path, METADATA_FILE), 'r', encoding='utf-8') as f:
+                self.metadata = json.load(f)
+            path = os.path.join(path, self.metadata["artifact"])
+        else:
+            self.metadata = {}
+        if require_agreement:
+            agreement = self.metadata.get("agreement") or {}
+            if agreement.get("mean", 0.0) < MIN_MEAN_AGREEMENT or agreement.get("min", 0.0) < MIN_WORST_AGREEMENT:
+                raise ValueError(f"{path}: keine bestandene Übereinstimmungsprüfung gegen float32 "
+                                 f"(mit ecapa_export.py exportieren)")
+        self.path = path
+        self.format = "onnx" if path.endswith(".onnx") else "torchscript"
+
+        if self.format == "onnx":
+            import onnxruntime as ort
+
+            options = ort.SessionOptions()
+            if num_threads > 0:
+                options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+            self._session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        else:
+            import torch
+
+            if num_threads > 0:
+                torch.set_num_threads(num_threads)
+            self._module = torch.jit.load(path, map_location="cpu").eval()
+
+    def encode_batch(self, wavs: np.ndarray, wav_lens: Optional[np.ndarray] = None) -> np.ndarray:
+        """(B, T) float32 und relative Längen (B,) -> Embeddings (B, 1, D)"""
+        wavs = np.ascontiguousarray(wavs, dtype=np.float32)
+        wav_lens = np.ones(len(wavs), dtype=np.float32) if wav_lens is None else \
+            np.asarray(wav_lens, dtype=np.float32)
+        if self.format == "onnx":
+            return self._session.run(None, {"wavs": wavs, "wav_lens": wav_lens})[0]
+
+        import torch
+
+        with torch.no_grad():
+            return self._module(torch.from_numpy(wavs), torch.from_numpy(wav_lens)).numpy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ECAPA-Sprechermodell quantisiert exportieren")
+    parser.add_argument("--model", default="speechbrain/spkrec-ecapa-voxceleb")
+    parser.add_argument("--output", default="models/ecapa-export")
+    parser.add_argument("--format", choices=sorted(ARTIFACTS), default="onnx")
+    parser.add_argument("--audio", help="Audiodatei für die Übereinstimmungsprüfung (sonst synthetisch)")
+    parser.add_argument("--segments", type=int, default=48)
+    args = parser.parse_args()
+
+    from speechbrain.pretrained import EncoderClassifier
+    from thread_budget import apply_torch_threads
+
+    apply_torch_threads()
+    start = time.perf_counter()
+    classifier = EncoderClassifier.from_hparams(
+        source=args.model, savedir=f"models/{args.model.split('/')[-1]}", run_opts={"device": "cpu"}
+    )
+    print(f"🔄 Modell geladen in {time.perf_counter() - start:.1f}s: {args.model}")
+
+    audio = None
+    if args.audio:
+        from offline_markers import load_audio
+        audio = load_audio(args.audio, SAMPLE_RATE)
+    segments = evaluation_segments(audio, args.segments)
+
+    try:
+        metadata = export_ecapa(classifier, args.output, args.format, segments, source=args.model)
+    except ValueError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    agreement = metadata["agreement"]
+    print(f"✅ Export: {os.path.join(args.output, metadata['artifact'])}")
+    print(f"   Kosinus-Übereinstimmung mit float32: Mittel {agreement['mean']:.4f}, "
+          f"Minimum {agreement['min']:.4f} ({agreement['segments']} Segmente)")
+    print("   Latenz: python benchmark_ecapa_export.py --export " + args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Inhaltsadressierter Cache für Sprecher-Embeddings
+Schlüssel ist ein BLAKE2b-Hash des PCM-Fensters; je Modell (Name + Version)
+ein eigenes Verzeichnis. Embeddings liegen als float16-Zeilen in einer
+memory-mapped Matrix, der Index (Hash -> Zeile, letzter Zugriff) daneben.
+Bei Erreichen der Größengrenze werden die am längsten unbenutzten Einträge
+verdrängt (LRU). Standardmäßig aus ([SPEAKERS] embedding_cache leer); lohnt
+sich nur, wenn dasselbe Audio erneut ausgewertet wird (Nachanalyse, Enrollment).
+"""
+
+import os
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+EMBEDDINGS_FILE = "embeddings.npy"
+INDEX_FILE = "index.npz"
+KEY_BYTES = 16
+
+
+def audio_key(audio: np.ndarray) -> bytes:
+    """128-Bit-BLAKE2b über die float32-Samples des Fensters"""
+    audio = np.ascontiguousarray(audio, dtype=np.float32)
+    return hashlib.blake2b(audio.view(np.uint8), digest_size=KEY_BYTES).digest()
+
+
+def model_directory(root: str, model_key: str) -> str:
+    """Cache-Verzeichnis eines Modells (Name + Version, z.B. Artefakt und Änderungszeit)"""
+    digest = hashlib.blake2b(model_key.encode('utf-8'), digest_size=8).hexdigest()
+    return os.path.join(root, digest)
+
+
+class EmbeddingCache:
+    """
+    Embedding-Cache eines Modells auf der Festplatte
+
+    Die float16-Matrix wächst durch Verdoppeln bis max_bytes; danach macht
+    jede Verdrängung Platz für evict_fraction der Einträge auf einmal, damit
+    die O(n)-Auswahl der ältesten Zeilen nicht bei jedem Einfügen anfällt.
+    Der Index wird mit flush() (und alle flush_interval Einfügungen) atomar
+    geschrieben; die Matrix ist memory-mapped.
+    """
+
+    def __init__(self, root: str, model_key: str, max_bytes: int = 256 * 1024 * 1024,
+                 evict_fraction: float = 0.125, flush_interval: int = 256):
+        self.directory = model_directory(root, model_key)
+        self.model_key = model_key
+        self.max_bytes = max_bytes
+        self.evict_fraction = evict_fraction
+        self.flush_interval = flush_interval
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._dirty = 0
+
+        self._matrix: Optional[np.ndarray] = None
+        self._rows: Dict[bytes, int] = {}           # Hash -> Zeile
+        self._keys = np.zeros((0, KEY_BYTES), dtype=np.uint8)  # Hash je Zeile
+        self._last_used = np.zeros(0, dtype=np.int64)
+        self._free: List[int] = []
+        self._tick = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        embeddings_path = os.path.join(self.directory, EMBEDDINGS_FILE)
+        if os.path.exists(index_path) and os.path.exists(embeddings_path):
+            with np.load(index_path) as index:
+                self._keys = index['keys']
+                self._last_used = index['last_used']
+                self._tick = int(index['tick'])
+            self._matrix = np.load(embeddings_path, mmap_mode='r+')
+            # Zeilen, die nach dem letzten Index-Schreiben angelegt wurden, sind frei
+            missing = len(self._matrix) - len(self._keys)
+            if missing > 0:
+                self._keys = np.concatenate([self._keys, np.zeros((missing, KEY_BYTES), dtype=np.uint8)])
+                self._last_used = np.concatenate([self._last_used, np.full(missing, -1, dtype=np.int64)])
+            for row, key in enumerate(self._keys):
+                if self._last_used[row] >= 0:
+                    self._rows[key.tobytes()] = row
+                else:
+                    self._free.append(row)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def max_entries(self) -> int:
+        if self._matrix is None:
+            return 0
+        return max(1, self.max_bytes // (2 * self._matrix.shape[1]))
+
+    # ------------------------------------------------------------------ Zugriff
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        """Embedding (float32) zum Schlüssel oder None"""
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._tick += 1
+            self._last_used[row] = self._tick
+            return self._matrix[row].astype(np.float32)
+
+    def put(self, key: bytes, embedding: np.ndarray):
+        """Embedding als float16 ablegen (vorhandene Einträge werden überschrieben)"""
+        embedding = np.asarray(embedding, dtype=np.float32).ravel()
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = self._create_matrix(os.path.join(self.directory, EMBEDDINGS_FILE),
+                                                   min(64, self.max_bytes // (2 * len(embedding)) or 1),
+                                                   len(embedding))
+                self._keys = np.zeros((len(self._matrix), KEY_BYTES), dtype=np.uint8)
+                self._last_used = np.full(len(self._matrix), -1, dtype=np.int64)
+                self._free = list(range(len(self._matrix) - 1, -1, -1))
+            if len(embedding) != self._matrix.shape[1]:
+                raise ValueError(f"Embedding-Dimension {len(embedding)} statt {self._matrix.shape[1]}")
+
+            row = self._rows.get(key)
+            if row is None:
+                row = self._allocate()
+                self._rows[key] = row
+                self._keys[row] = np.frombuffer(key, dtype=np.uint8)
+            self._tick += 1
+            self._last_used[row] = self._tick
+            self._matrix[row] = embedding
+
+            self._dirty += 1
+            if self._dirty >= self.flush_interval:
+                self._write_index()
+
+    def flush(self):
+        with self._lock:
+            if self._matrix is not None and self._dirty:
+                self._write_index()
+
+    # --------------------------------------------------------------- Speicher
+
+    def _create_matrix(self, path: str, capacity: int, dim: int) -> np.ndarray:
+        return np.lib.format.open_memmap(path, mode='w+', dtype=np.float16, shape=(capacity, dim))
+
+    def _allocate(self) -> int:
+        if not self._free:
+            if len(self._matrix) < self.max_entries:
+                self._grow(min(2 * len(self._matrix), self.max_entries))
+            else:
+                self._evict()
+        return self._free.pop()
+
+    def _grow(self, capacity: int):
+        """Kapazität erhöhen (neue Datei, Inhalt kopieren, atomar ersetzen)"""
+        path = os.path.join(self.directory, EMBEDDINGS_FILE)
+        temp_path = path + ".tmp.npy"
+        old = len(self._matrix)
+        grown = self._create_matrix(temp_path, capacity, self._matrix.shape[1])
+        grown[:old] = self._matrix
+        grown.flush()
+        del grown
+        self._matrix.flush()
+        self._matrix = None
+        os.replace(temp_path, path)
+        self._matrix = np.load(path, mmap_mode='r+')
+
+        self._keys = np.concatenate([self._keys, np.zeros((capacity - old, KEY_BYTES), dtype=np.uint8)])
+        self._last_used = np.concatenate([self._last_used, np.full(capacity - old, -1, dtype=np.int64)])
+        self._free.extend(range(capacity - 1, old - 1, -1))
+
+    def _evict(self):
+        """Die am längsten unbenutzten Einträge (evict_fraction) freigeben"""
+        count = max(1, int(len(self._matrix) * self.evict_fraction))
+        oldest = np.argpartition(self._last_used, count - 1)[:count]
+        for row in oldest.tolist():
+            del self._rows[self._keys[row].tobytes()]
+            self._last_used[row] = -1
+            self._free.append(row)
+        # Index sofort schreiben: nach einem Absturz darf kein alter Hash auf eine
+        # inzwischen neu belegte Zeile zeigen
+        self._write_index()
+
+    def _write_index(self):
+        """Index atomar schreiben, Matrix auf die Platte bringen"""
+        self._matrix.flush()
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + ".tmp", 'wb') as f:
+            np.savez(f, keys=self._keys, last_used=self._last_used, tick=self._tick)
+        os.replace(path + ".tmp", path)
+        self._dirty = 0
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
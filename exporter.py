@@ -169,6 +169,16 @@ class TranscriptExporter:
                         f.write(f"| Energie-Stabilität | {markers['prosody']['energy_stability']:.2f} |\n")
                     f.write("\n")
                 
+                # Verlauf in 5-Minuten-Abschnitten
+                if markers.get('timeline'):
+                    f.write("### Verlauf (5-Minuten-Abschnitte)\n\n")
+                    f.write("| Ab Minute | Ø Valenz | Ø Tonhöhe | Ø Energie |\n")
+                    f.write("|-----------|----------|-----------|-----------|\n")
+                    for section in markers['timeline']:
+                        f.write(f"| {section['start'] / 60:.0f} | {section['valence']:.2f} | "
+                                f"{section['pitch']:.0f} Hz | {section['energy']:.3f} |\n")
+                    f.write("\n")
+                
                 # Therapeutische Interpretation
                 f.write("### Therapeutische Hinweise\n\n")
                 f.write(self._generate_therapeutic_insights(markers))
@@ -216,6 +226,15 @@ class TranscriptExporter:
             if prosody.get('avg_energy', 0) < 0.1:
                 insights.append("**Stimmverhalten:** Niedrige Sprechenergie erkannt")
         
+        # Stimmungsverlauf über die Sitzung (erster vs. letzter 5-Minuten-Abschnitt)
+        sections = markers.get('timeline', [])
+        if len(sections) >= 2:
+            change = sections[-1]['valence'] - sections[0]['valence']
+            if abs(change) > 0.3:
+                direction = "stieg" if change > 0 else "sank"
+                insights.append(f"**Stimmungsverlauf:** Die Valenz {direction} im Sitzungsverlauf "
+                              f"um {abs(change):.2f}")
+        
         if not insights:
             insights.append("Keine besonderen Auffälligkeiten in den therapeutischen Markern erkannt.")
         
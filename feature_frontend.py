@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Gemeinsames Frame-Front-End für das Marker-System
+Framing, Fensterung und Betragsspektrum werden einmal pro Frame berechnet;
+alle Marker-Features (Energie, ZCR, Spektral-Features, F0) lesen daraus.
+"""
+
+import numpy as np
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from numpy.lib.stride_tricks import sliding_window_view
+
+import dsp
+from ring_buffer import AudioRingBuffer
+from pitch_tracker import StreamingPitchTracker
+
+
+def spectral_frame_features(frames: np.ndarray, window: np.ndarray, freqs: np.ndarray,
+                            roll_percent: float = 0.85,
+                            scratch: Optional[np.ndarray] = None) -> Tuple[np.ndarray, ...]:
+    """
+    Frame-Features für einen Stapel Frames (n_frames, n_fft) in einem FFT-Aufruf
+
+    Gemeinsame Rechenvorschrift für das Live-Front-End und die Offline-Auswertung.
+
+    Returns:
+        (magnitudes, rms, zcr, centroid, rolloff)
+    """
+    n = len(frames)
+    # Zeitbereich: Energie und Nulldurchgänge
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    signs = np.signbit(frames)
+    zcr = (np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frames.shape[1]).astype(np.float32)
+
+    # Frequenzbereich: gefensterte Frames (optional im Scratch-Buffer), ein FFT-Aufruf für alle Frames
+    windowed = scratch[:n] if scratch is not None else np.empty(frames.shape, dtype=np.float32)
+    np.multiply(frames, window, out=windowed)
+    magnitudes = np.abs(dsp.rfft(windowed, axis=1)).astype(np.float32)
+
+    totals = magnitudes.sum(axis=1)
+    safe_totals = np.maximum(totals, 1e-10)
+    centroid = (magnitudes @ freqs) / safe_totals
+
+    cumulative = np.cumsum(magnitudes, axis=1)
+    rolloff_bins = np.argmax(cumulative >= roll_percent * totals[:, None], axis=1)
+    return magnitudes, rms, zcr, centroid, freqs[rolloff_bins]
+
+
+@dataclass
+class FrameFeatures:
+    """Frame-Features eines Analysefensters (ältester Frame zuerst)"""
+    frame_starts: np.ndarray  # absolute Sample-Position je Frame (int64)
+    magnitudes: np.ndarray    # Betragsspektrum (n_frames, n_bins)
+    rms: np.ndarray           # RMS-Energie je Frame
+    zcr: np.ndarray           # Zero-Crossing-Rate je Frame
+    centroid: np.ndarray      # Spektraler Schwerpunkt (Hz)
+    rolloff: np.ndarray       # Spektraler Rolloff (Hz)
+    f0: Optional[np.ndarray]           # Grundfrequenz je Frame (Hz, 0 = stimmlos; None ohne F0)
+    voiced_prob: Optional[np.ndarray]  # Stimmhaftigkeit je Frame (0-1; None ohne F0)
+
+    @property
+    def n_frames(self) -> int:
+        return len(self.frame_starts)
+
+
+class FeatureFrontEnd:
+    """
+    Inkrementelles STFT-Front-End über einem AudioRingBuffer
+
+    Frame k beginnt bei Sample k * hop_length (absolute Sample-Uhr). update()
+    berechnet nur Frames, die seit dem letzten Aufruf vollständig geworden sind,
+    und legt sie in Frame-Ringen mit Platz für ein Analysefenster ab. Der
+    F0-Tracker läuft im selben Hop-Raster, aber mit längeren Frames
+    (pitch_frame_length), damit auch 80 Hz noch zwei Perioden umfassen. Seine
+    Frames sind so verschoben, dass die Frame-Mitten übereinstimmen: f0[i] und
+    rms[i] beschreiben denselben Zeitpunkt. Weil der längere Pitch-Frame erst
+    später vollständig ist, endet das Analysefenster pitch_lag Frames hinter
+    dem neuesten STFT-Frame.
+
+    F0 ist der teuerste Teil; update(ring, pitch=False) rechnet nur die STFT,
+    update_pitch() holt F0 bei Bedarf nach (z.B. nur wenn ein fälliger Marker
+    f0 anfordert).
+    """
+
+    def __init__(self, sample_rate: int = 16000, n_fft: int = 512, hop_length: int = 256,
+                 window_frames: int = 61, roll_percent: float = 0.85,
+                 pitch_frame_length: int = 1024, fmin: float = 80.0, fmax: float = 400.0):
+        self.sample_rate = sample_rate
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.window_frames = int(window_frames)
+        self.roll_percent = roll_percent
+        self.n_bins = n_fft // 2 + 1
+
+        # Vorberechnet: periodisches Hann-Fenster und Frequenzachse
+        self.window = dsp.hann_window(n_fft)
+        self.freqs = dsp.rfftfreq(n_fft, sample_rate).astype(np.float32)
+
+        # Mitten-Ausrichtung des F0-Trackers; der Ring hält zusätzlich die noch ungepaarten Frames
+        pitch_offset = (n_fft - pitch_frame_length) // 2
+        self.pitch_lag = max(0, -(pitch_offset // hop_length))
+        self.capacity = self.window_frames + self.pitch_lag
+
+        # Wiederverwendete Scratch-Buffer und Frame-Ringe
+        self._scratch = np.empty((self.capacity, n_fft), dtype=np.float32)
+        self._frame_starts = np.zeros(self.capacity, dtype=np.int64)
+        self._magnitudes = np.zeros((self.capacity, self.n_bins), dtype=np.float32)
+        self._rms = np.zeros(self.capacity, dtype=np.float32)
+        self._zcr = np.zeros(self.capacity, dtype=np.float32)
+        self._centroid = np.zeros(self.capacity, dtype=np.float32)
+        self._rolloff = np.zeros(self.capacity, dtype=np.float32)
+
+        self.next_frame = 0       # nächster zu berechnender Frame-Index
+        self.frames_computed = 0  # Frames im Ring (max. capacity)
+        self.samples_seen = 0     # Sample-Uhr beim letzten update()
+
+        self.pitch_tracker = StreamingPitchTracker(
+            sample_rate=sample_rate,
+            frame_length=pitch_frame_length,
+            hop_length=hop_length,
+            fmin=fmin,
+            fmax=fmax,
+            capacity=self.window_frames,
+            frame_offset=pitch_offset
+        )
+
+    def reset(self):
+        self.next_frame = 0
+        self.frames_computed = 0
+        self.samples_seen = 0
+        self.pitch_tracker.reset()
+
+    def update(self, ring: AudioRingBuffer, pitch: bool = True) -> int:
+        """Neue vollständige STFT-Frames (und optional F0) berechnen, gibt deren Anzahl zurück"""
+        self.samples_seen = ring.total_written
+        if pitch:
+            self.update_pitch(ring)
+
+        if ring.total_written < self.n_fft:
+            return 0
+
+        last_frame = (ring.total_written - self.n_fft) // self.hop_length
+        if last_frame < self.next_frame:
+            return 0
+
+        # Frames, deren Samples nicht mehr im Ring liegen oder nicht ins Fenster passen, überspringen
+        oldest_sample = ring.total_written - len(ring)
+        oldest_frame = -(-oldest_sample // self.hop_length)
+        first_frame = max(self.next_frame, oldest_frame, last_frame - self.capacity + 1)
+        n_new = last_frame - first_frame + 1
+        if first_frame > self.next_frame:
+            self.frames_computed = 0  # Lücke: ältere Frames gehören nicht mehr ins Fenster
+
+        start = first_frame * self.hop_length
+        audio = ring.read(start, (n_new - 1) * self.hop_length + self.n_fft)
+        frames = sliding_window_view(audio, self.n_fft)[::self.hop_length]
+
+        self._compute_frames(frames, first_frame)
+        self.next_frame = last_frame + 1
+        return n_new
+
+    def update_pitch(self, ring: AudioRingBuffer) -> int:
+        """F0 der seit dem letzten Aufruf vollständigen Pitch-Frames nachholen"""
+        return self.pitch_tracker.update(ring)
+
+    def _compute_frames(self, frames: np.ndarray, first_frame: int):
+        n = len(frames)
+        slots = (first_frame + np.arange(n)) % self.capacity
+
+        magnitudes, rms, zcr, centroid, rolloff = spectral_frame_features(
+            frames, self.window, self.freqs, self.roll_percent, self._scratch
+        )
+        self._magnitudes[slots] = magnitudes
+        self._rms[slots] = rms
+        self._zcr[slots] = zcr
+        self._centroid[slots] = centroid
+        self._rolloff[slots] = rolloff
+
+        self._frame_starts[slots] = (first_frame + np.arange(n)) * self.hop_length
+        self.frames_computed = min(self.capacity, self.frames_computed + n)
+
+    def window_features(self, n_frames: Optional[int] = None, pitch: bool = True) -> FrameFeatures:
+        """
+        Features der letzten n_frames Frames (Standard: ganzes Analysefenster)
+
+        Das Fenster endet unabhängig von pitch am neuesten Frame, für den auch
+        F0 vollständig wäre; ohne pitch bleiben f0 und voiced_prob None.
+        """
+        tracker = self.pitch_tracker
+        end = min(self.next_frame, tracker.frames_ready(self.samples_seen))
+        first = self.next_frame - self.frames_computed
+        if pitch:
+            end = min(end, tracker.next_frame)
+            first = max(first, tracker.next_frame - tracker.frames_computed)
+        n_frames = self.window_frames if n_frames is None else min(n_frames, self.window_frames)
+        n = max(0, min(n_frames, end - first))
+        order = (end - n + np.arange(n)) % self.capacity
+        f0 = voiced_prob = None
+        if pitch:
+            _, f0, voiced_prob = tracker.frame_range(end - n, n)
+
+        return FrameFeatures(
+            frame_starts=self._frame_starts[order],
+            magnitudes=self._magnitudes[order],
+            rms=self._rms[order],
+            zcr=self._zcr[order],
+            centroid=self._centroid[order],
+            rolloff=self._rolloff[order],
+            f0=f0,
+            voiced_prob=voiced_prob
+        )
@@ -21,6 +21,7 @@ from audio import AudioManager
 from live_transcriber import LiveTranscriber
 from exporter import TranscriptExporter
 from session_manager import SessionManager
+from marker_timeline import MarkerTimeline
 import configparser
 import os
 from datetime import datetime
@@ -30,8 +31,21 @@ class TransRapportMainWindow(QMainWindow):
     
     def __init__(self):
         super().__init__()
-        self.audio_manager = AudioManager()
-        self.live_transcriber = LiveTranscriber()
+        
+        # Konfiguration laden (vor Audio und Transcriber: Sprechererkennung ist optional)
+        self.load_config()
+        
+        # Kanal-Diarisierung braucht die Einzelkanäle (ein Mikrofon je Sprecher)
+        channel_mode = self.config.get('SPEAKERS', 'backend', fallback='ecapa') == 'channels'
+        self.audio_manager = AudioManager(
+            channels=self.config.getint('SPEAKERS', 'channels', fallback=2) if channel_mode else 1,
+            keep_channels=channel_mode
+        )
+        
+        self.live_transcriber = LiveTranscriber(
+            speaker_recognition=self.config.getboolean('SPEAKERS', 'enabled', fallback=False),
+            speaker_options=self.speaker_options()
+        )
         self.is_recording = False
         
         # Export und Session Management
@@ -39,9 +53,6 @@ class TransRapportMainWindow(QMainWindow):
         self.session_manager = SessionManager()
         self.current_session = None
         
-        # Konfiguration laden
-        self.load_config()
-        
         # GUI initialisieren
         self.init_ui()
         
@@ -55,15 +66,8 @@ class TransRapportMainWindow(QMainWindow):
         self.audio_level_timer = QTimer()
         self.audio_level_timer.timeout.connect(self.update_audio_level)
         
-        # Marker-Daten für Visualisierung
-        self.marker_data = {
-            'timestamps': [],
-            'emotions': [],
-            'pauses': [],
-            'pitch': [],
-            'energy': []
-        }
-        self.max_data_points = 100  # Maximale Anzahl Datenpunkte für Visualisierung
+        # Marker-Daten: vollständige Zeitleiste im MarkerSystem, Plots zeigen ein Fenster daraus
+        self.max_data_points = 100  # Datenpunkte im sichtbaren Plot-Fenster
         
         # Plot-Update-Konfiguration
         self.plot_update_rate = 100  # Millisekunden (10 Hz) (important-comment)
@@ -88,17 +92,46 @@ class TransRapportMainWindow(QMainWindow):
             with open(config_path, 'w') as f:
                 self.config.write(f)
     
+    def speaker_options(self) -> dict:
+        """Fenster und Latenzbudget der Sprechererkennung aus [SPEAKERS]"""
+        if self.config.get('SPEAKERS', 'backend', fallback='ecapa') == 'channels':
+            roles = self.config.get('SPEAKERS', 'channel_roles', fallback='therapist,patient')
+            return {
+                'backend': 'channels',
+                'channel_roles': [role.strip() for role in roles.split(',')],
+                'crosstalk': self.config.getfloat('SPEAKERS', 'crosstalk', fallback=0.3),
+                'min_switch': self.config.getfloat('SPEAKERS', 'min_switch', fallback=0.3),
+            }
+        return {
+            'window_duration': self.config.getfloat('SPEAKERS', 'window', fallback=1.5),
+            'window_hop': self.config.getfloat('SPEAKERS', 'hop', fallback=0.75),
+            'latency_budget': self.config.getfloat('SPEAKERS', 'latency_budget', fallback=2.0),
+            'voiceprint_directory': self.config.get('SPEAKERS', 'voiceprints', fallback='') or None,
+            'voiceprint_threshold': self.config.getfloat('SPEAKERS', 'voiceprint_threshold', fallback=0.75),
+            'refine_threshold': self.config.getfloat('SPEAKERS', 'refine_threshold', fallback=0.5),
+            'exported_model': self.config.get('SPEAKERS', 'exported_model', fallback='') or None,
+            'change_detection': self.config.getboolean('SPEAKERS', 'change_detection', fallback=True),
+            'keepalive': self.config.getfloat('SPEAKERS', 'keepalive', fallback=4.0),
+            'embedding_cache_directory': self.config.get('SPEAKERS', 'embedding_cache', fallback='') or None,
+            'embedding_cache_mb': self.config.getfloat('SPEAKERS', 'embedding_cache_mb', fallback=256.0),
+        }
+    
+    @property
+    def marker_timeline(self) -> MarkerTimeline:
+        """Marker-Zeitleiste der aktuellen Sitzung (einzige Quelle für Plots, Statistiken, Export)"""
+        return self.live_transcriber.marker_system.timeline
+    
     def setup_transcriber_signals(self):
         """Live-Transcriber Signale mit GUI verbinden"""
         self.live_transcriber.transcription_ready.connect(self.on_transcription_ready)
         self.live_transcriber.partial_transcription.connect(self.on_partial_transcription)
         self.live_transcriber.error_occurred.connect(self.on_transcription_error)
+        self.live_transcriber.transcript_segment.connect(self.on_transcript_segment)
         
-        # Marker-System Signale
+        # Marker-System Signale (gebündelt, max. ein Snapshot pro UI-Frame)
         self.live_transcriber.markers_updated.connect(self.on_markers_updated)
         self.live_transcriber.emotion_detected.connect(self.on_emotion_detected)
         self.live_transcriber.pause_detected.connect(self.on_pause_detected)
-        self.live_transcriber.prosody_updated.connect(self.on_prosody_updated)
     
     def init_ui(self):
         """Benutzeroberfläche initialisieren"""
@@ -766,8 +799,9 @@ class TransRapportMainWindow(QMainWindow):
                 self.current_session = self.session_manager.create_session()
                 self.setWindowTitle(f"TransRapport MVP - {self.current_session['name']}")
             
-            # Sitzung starten
+            # Sitzung starten, Marker-Zeitleiste während der Aufnahme inkrementell auf die Platte schreiben
             self.current_session = self.session_manager.start_session(self.current_session)
+            self.marker_timeline.set_storage(self.session_manager.markers_directory(self.current_session))
             
             # Audio-Stream starten mit Fallback auf andere Geräte
             try:
@@ -842,8 +876,12 @@ class TransRapportMainWindow(QMainWindow):
             # Audio-Stream stoppen
             self.audio_manager.stop_recording()
             
-            # Live-Transkription stoppen
+            # Live-Transkription stoppen, Sprecher nachclustern, angefangene Chunks auf die Platte schreiben
             self.live_transcriber.stop_transcription()
+            refined = self.live_transcriber.refine_speakers()
+            if refined:
+                print(f"🗣️ Nachclustering: {refined} Sprecherfenster neu zugeordnet")
+            self.marker_timeline.flush()
             
             # Audio-Level Timer stoppen
             self.audio_level_timer.stop()
@@ -905,6 +943,12 @@ class TransRapportMainWindow(QMainWindow):
             cursor.movePosition(QTextCursor.MoveOperation.End)
             self.transcript_text.setTextCursor(cursor)
     
+    def on_transcript_segment(self, start_sample, end_sample, text, speaker_id):
+        """Transkript-Segment mit Sprecher (aus dem Intervall-Join) empfangen"""
+        if speaker_id >= 0:
+            start = start_sample / self.live_transcriber.sample_rate
+            self.statusBar().showMessage(f"Sprecher {speaker_id + 1} ab {start:.1f}s: {text[:40]}")
+    
     def on_partial_transcription(self, text):
         """Partielle Transkription empfangen (optional für Echtzeit-Feedback)"""
         # Könnte für Live-Vorschau verwendet werden
@@ -915,32 +959,12 @@ class TransRapportMainWindow(QMainWindow):
         self.statusBar().showMessage(f"Transkriptionsfehler: {error_msg}")
         print(f"Transkriptionsfehler: {error_msg}")
     
-    def on_markers_updated(self, markers):
-        """Marker-Daten aktualisiert"""
-        if not markers or 'timestamp' not in markers:
+    def on_markers_updated(self, snapshot):
+        """Marker-Daten aktualisiert (MarkerSnapshot)"""
+        if snapshot is None:
             return
         
-        # Zeitstempel für X-Achse
-        current_time = len(self.marker_data['timestamps'])
-        self.marker_data['timestamps'].append(current_time)
-        
-        # Daten-Arrays begrenzen
-        if len(self.marker_data['timestamps']) > self.max_data_points:
-            for key in self.marker_data:
-                self.marker_data[key] = self.marker_data[key][-self.max_data_points:]
-        
-        # Emotion-Daten
-        if 'affect' in markers:
-            valence = markers['affect'].get('valence', 0.0)
-            self.marker_data['emotions'].append(valence)
-        
-        # Prosody-Daten
-        if 'prosody' in markers:
-            pitch = markers['prosody'].get('pitch_mean', 0.0)
-            energy = markers['prosody'].get('energy_mean', 0.0)
-            self.marker_data['pitch'].append(pitch)
-            self.marker_data['energy'].append(energy)
-        
+        # Die Daten selbst stehen bereits in der Marker-Zeitleiste
         # Plots aktualisieren (mit Throttling) (important-comment)
         self.update_marker_plots()
         
@@ -980,16 +1004,6 @@ class TransRapportMainWindow(QMainWindow):
             color = '#27ae60'  # Grün für kurze Pausen
         
         self.current_pause_label.setStyleSheet(f"color: {color}; padding: 5px; font-weight: bold;")
-        
-        # Pause zu Daten hinzufügen
-        self.marker_data['pauses'].append(pause_duration)
-        if len(self.marker_data['pauses']) > self.max_data_points:
-            self.marker_data['pauses'] = self.marker_data['pauses'][-self.max_data_points:]
-    
-    def on_prosody_updated(self, prosody_data):
-        """Prosodische Features aktualisiert"""
-        # Wird bereits in on_markers_updated behandelt
-        pass
     
     def update_marker_plots(self):
         """Marker-Plots aktualisieren - MIT SICHERHEITS-CHECKS"""
@@ -1004,48 +1018,26 @@ class TransRapportMainWindow(QMainWindow):
         self.last_plot_update = now
         
         try:
-            # Emotion-Plot aktualisieren (Valenz über Zeit)
-            if self.marker_data['timestamps'] and self.marker_data['emotions']:
-                timestamps = self.marker_data['timestamps'][-self.max_data_points:]
-                emotions = self.marker_data['emotions'][-self.max_data_points:]
-                
-                # Daten bereinigen (NaN/Inf entfernen)
-                valid_data = [(t, e) for t, e in zip(timestamps, emotions) if np.isfinite(e)]
-                if valid_data:
-                    valid_timestamps, valid_emotions = zip(*valid_data)
-                    x_data = np.arange(len(valid_timestamps))
-                    y_data = np.array(valid_emotions, dtype=np.float64)
-                    
-                    self.emotion_plot.clear()
-                    self.emotion_plot.plot(x_data, y_data, pen='c', symbol='o', symbolSize=5)
-                    self.emotion_plot.setLabel('left', 'Valenz', color='#ffffff')
-                    self.emotion_plot.setLabel('bottom', 'Zeit', color='#ffffff')
+            # Sichtbares Fenster aus der Zeitleiste, X-Achse in Sekunden Sitzungszeit
+            rows = self.marker_timeline.tail(self.max_data_points)
+            if len(rows) == 0:
+                return
+            times = self.marker_timeline.times(rows)
             
-            # Pausen-Plot aktualisieren
-            if self.marker_data['pauses']:
-                pauses = self.marker_data['pauses'][-self.max_data_points:]
-                valid_pauses = [p for p in pauses if np.isfinite(p)]
-                if valid_pauses:
-                    x_data = np.arange(len(valid_pauses))
-                    y_data = np.array(valid_pauses, dtype=np.float64)
-                    
-                    self.pause_plot.clear()
-                    self.pause_plot.plot(x_data, y_data, pen='y', symbol='s', symbolSize=5)
-                    self.pause_plot.setLabel('left', 'Dauer (s)', color='#ffffff')
-                    self.pause_plot.setLabel('bottom', 'Ereignis', color='#ffffff')
+            # Emotion-Plot (Valenz über Zeit)
+            valence = rows['valence'].astype(np.float64)
+            valid = np.isfinite(valence)
+            self.emotion_curve.setData(times[valid], valence[valid])
             
-            # Pitch-Plot aktualisieren
-            if self.marker_data['pitch']:
-                pitches = self.marker_data['pitch'][-self.max_data_points:]
-                valid_pitches = [p for p in pitches if np.isfinite(p) and p > 0]
-                if valid_pitches:
-                    x_data = np.arange(len(valid_pitches))
-                    y_data = np.array(valid_pitches, dtype=np.float64)
-                    
-                    self.pitch_plot.clear()
-                    self.pitch_plot.plot(x_data, y_data, pen='g', symbol='t', symbolSize=5)
-                    self.pitch_plot.setLabel('left', 'Pitch (Hz)', color='#ffffff')
-                    self.pitch_plot.setLabel('bottom', 'Zeit', color='#ffffff')
+            # Pitch-Plot (nur stimmhafte Analysen)
+            pitch = rows['pitch'].astype(np.float64)
+            voiced = np.isfinite(pitch) & (pitch > 0)
+            self.pitch_curve.setData(times[voiced], pitch[voiced])
+            
+            # Energie-Plot
+            energy = rows['energy'].astype(np.float64)
+            valid = np.isfinite(energy)
+            self.energy_curve.setData(times[valid], energy[valid])
                     
         except Exception as e:
             print(f"⚠️  Fehler beim Plot-Update (nicht kritisch): {e}")
@@ -1058,34 +1050,29 @@ class TransRapportMainWindow(QMainWindow):
                 self.plot_enabled = False
     
     def update_marker_statistics(self):
-        """Marker-Statistiken aktualisieren"""
+        """Marker-Statistiken über die ganze Sitzung aktualisieren"""
         try:
             stats_text = ""
+            stats = self.marker_timeline.stats()
+            recent = self.marker_timeline.stats(max(0.0, self.marker_timeline.duration - 60.0))
             
             # Emotion-Statistiken
-            if self.marker_data['emotions']:
-                avg_valence = np.mean(self.marker_data['emotions'])
-                stats_text += f"Ø Valenz: {avg_valence:.2f}\n"
+            if stats['valence'].count:
+                stats_text += f"Ø Valenz: {stats['valence'].mean:.2f} (letzte Min: {recent['valence'].mean:.2f})\n"
             
             # Pause-Statistiken
-            if self.marker_data['pauses']:
-                avg_pause = np.mean(self.marker_data['pauses'])
-                max_pause = np.max(self.marker_data['pauses'])
-                pause_count = len(self.marker_data['pauses'])
-                stats_text += f"Pausen: {pause_count}\n"
-                stats_text += f"Ø Pause: {avg_pause:.1f}s\n"
-                stats_text += f"Max Pause: {max_pause:.1f}s\n"
+            pauses = self.marker_timeline.pause_durations()
+            if len(pauses):
+                stats_text += f"Pausen: {len(pauses)}\n"
+                stats_text += f"Ø Pause: {np.mean(pauses):.1f}s\n"
+                stats_text += f"Max Pause: {np.max(pauses):.1f}s\n"
             
             # Prosody-Statistiken
-            if self.marker_data['pitch']:
-                valid_pitch = [p for p in self.marker_data['pitch'] if p > 0]
-                if valid_pitch:
-                    avg_pitch = np.mean(valid_pitch)
-                    stats_text += f"Ø Pitch: {avg_pitch:.0f} Hz\n"
+            if stats['pitch'].count:
+                stats_text += f"Ø Pitch: {stats['pitch'].mean:.0f} Hz (σ {stats['pitch'].std:.0f})\n"
             
-            if self.marker_data['energy']:
-                avg_energy = np.mean(self.marker_data['energy'])
-                stats_text += f"Ø Energie: {avg_energy:.3f}"
+            if stats['energy'].count:
+                stats_text += f"Ø Energie: {stats['energy'].mean:.3f}"
             
             if not stats_text:
                 stats_text = "Noch keine Daten..."
@@ -1179,11 +1166,13 @@ class TransRapportMainWindow(QMainWindow):
                 # Transkript laden
                 self.transcript_text.setPlainText(session.get('transcript', ''))
                 
-                # Marker-Daten laden
-                if 'markers_data' in session:
-                    self.marker_data = session['markers_data']
-                    self.update_marker_plots()
-                    self.update_marker_statistics()
+                # Marker-Zeitleiste und Transkript-Segmente laden (alte Sitzungen: aus markers_data übernommen)
+                self.live_transcriber.set_timeline(
+                    self.session_manager.load_markers(session),
+                    self.session_manager.load_transcript_segments(session)
+                )
+                self.update_marker_plots()
+                self.update_marker_statistics()
                 
                 # Einstellungen laden
                 if 'language' in session:
@@ -1211,11 +1200,12 @@ class TransRapportMainWindow(QMainWindow):
         try:
             # Session-Daten aktualisieren
             self.current_session = self.session_manager.update_session_transcript(
-                self.current_session, self.transcript_text.toPlainText()
+                self.current_session, self.transcript_text.toPlainText(),
+                self.live_transcriber.transcript_segments
             )
             
             self.current_session = self.session_manager.update_session_markers(
-                self.current_session, self.marker_data
+                self.current_session, self.marker_timeline
             )
             
             # Einstellungen speichern
@@ -1249,7 +1239,7 @@ class TransRapportMainWindow(QMainWindow):
             session_data = None
             if self.current_session:
                 session_data = self.current_session.copy()
-                session_data['markers_summary'] = self.session_manager._generate_markers_summary(self.marker_data)
+                session_data['markers_summary'] = self.session_manager._generate_markers_summary(self.marker_timeline)
             
             # Export durchführen
             if format == 'md':
@@ -1322,14 +1312,8 @@ class TransRapportMainWindow(QMainWindow):
         QMessageBox.about(self, "Über TransRapport MVP", about_text)
     
     def clear_marker_data(self):
-        """Marker-Daten zurücksetzen"""
-        self.marker_data = {
-            'timestamps': [],
-            'emotions': [],
-            'pauses': [],
-            'pitch': [],
-            'energy': []
-        }
+        """Marker-Daten zurücksetzen (neue, leere Zeitleiste; Dateien alter Sitzungen bleiben)"""
+        self.live_transcriber.set_timeline(MarkerTimeline(sample_rate=self.live_transcriber.sample_rate))
         
         # Plots leeren
         self.emotion_curve.setData([], [])
@@ -1365,6 +1349,7 @@ class TransRapportMainWindow(QMainWindow):
         """Beim Schließen der Anwendung"""
         if self.is_recording:
             self.stop_recording()
+        self.live_transcriber.shutdown()
         event.accept()
 
 
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Prozess-isolierte Inferenz-Worker
+Whisper-Dekodierung und ECAPA-Embeddings in eigenen Prozessen (kein GIL-Wettbewerb mit GUI/Audio)
+"""
+
+import os
+import queue
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from ring_buffer import AudioRingBuffer
+
+
+class WorkerCrashedError(RuntimeError):
+    """Worker-Prozess ist während eines Jobs abgestürzt"""
+
+
+class SharedAudioRing(AudioRingBuffer):
+    """
+    AudioRingBuffer in multiprocessing.shared_memory
+
+    Ein Schreiber (Hauptprozess), beliebig viele Leser (Worker). Schreibposition
+    (total_written) und Schreibgrenze (write_limit) liegen im Kopf des Segments;
+    ein Leser erkennt überschriebene und gerade überschriebene Bereiche selbst.
+    """
+
+    HEADER_BYTES = 64  # int64 Schreibposition, int64 Schreibgrenze + Reserve
+
+    def __init__(self, capacity: int, name: Optional[str] = None, create: bool = True):
+        capacity = int(capacity)
+        size = self.HEADER_BYTES + capacity * np.dtype(np.float32).itemsize
+        # Worker teilen sich den resource_tracker des Hauptprozesses; freigegeben wird nur vom Erzeuger
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+
+        self._header = np.ndarray((2,), dtype=np.int64, buffer=self.shm.buf, offset=0)
+        data = np.ndarray((capacity,), dtype=np.float32, buffer=self.shm.buf, offset=self.HEADER_BYTES)
+        if create:
+            super().__init__(capacity, data)
+        else:
+            # Leser: Schreibposition des Erzeugers nicht zurücksetzen
+            self.capacity = capacity
+            self._data = data
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def total_written(self) -> int:
+        return int(self._header[0])
+
+    @total_written.setter
+    def total_written(self, value: int):
+        self._header[0] = value
+
+    @property
+    def write_limit(self) -> int:
+        return int(self._header[1])
+
+    @write_limit.setter
+    def write_limit(self, value: int):
+        self._header[1] = value
+
+    def write(self, samples: np.ndarray) -> int:
+        """Samples anhängen; größere Blöcke als der Ring würden Leser-Jobs verlieren"""
+        samples = np.asarray(samples, dtype=np.float32).ravel()
+        if len(samples) > self.capacity:
+            raise ValueError(f"Block ({len(samples)} Samples) größer als Ring-Kapazität ({self.capacity})")
+        return super().write(samples)
+
+    def close(self):
+        """Eigene Views freigeben und Segment schließen"""
+        self._header = None
+        self._data = None
+        self.shm.close()
+
+    def unlink(self):
+        """Segment freigeben (nur vom Erzeuger aufrufen)"""
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+@dataclass
+class WorkerConfig:
+    """Konfiguration eines Inferenz-Worker-Prozesses"""
+    kind: str                                  # 'whisper' oder 'ecapa'
+    model_name: str
+    num_threads: int = 0                       # 0 = Bibliotheks-Standard
+    cpu_affinity: Optional[List[int]] = None   # CPU-Kerne für den Prozess
+    num_workers: int = 1                       # parallele Jobs im Prozess
+    options: Dict = field(default_factory=dict)
+    factory: Optional[Callable] = None         # eigene Handler-Fabrik (Modul-Funktion), statt kind
+
+
+def transcribe_with_whisper(model, audio_chunk: np.ndarray, language: Optional[str]) -> Optional[str]:
+    """Whisper-Transkription eines vorbereiteten Chunks (in- und out-of-process genutzt)"""
+    segments, info = model.transcribe(
+        audio_chunk,
+        language=language,
+        beam_size=1,  # Schneller für Live-Transkription
+        best_of=1,
+        temperature=0.0,
+        condition_on_previous_text=False,
+        vad_filter=False  # Chunks sind bereits Sprachsegmente des gemeinsamen Pipeline-VAD
+    )
+
+    # Text aus Segmenten extrahieren
+    text_parts = [segment.text.strip() for segment in segments if segment.text.strip()]
+    return " ".join(text_parts) if text_parts else None
+
+
+def length_buckets(lengths: List[int], max_padding: float = 0.25) -> List[List[int]]:
+    """
+    Indizes nach Länge gruppieren, sodass je Gruppe höchstens max_padding
+    (Anteil der längsten Eingabe) aufgefüllt werden muss
+    """
+    buckets: List[List[int]] = []
+    for index in sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True):
+        if buckets and lengths[index] >= (1.0 - max_padding) * lengths[buckets[-1][0]]:
+            buckets[-1].append(index)
+        else:
+            buckets.append([index])
+    return buckets
+
+
+def encode_batch_with_ecapa(model, segments: List[np.ndarray], device,
+                            max_padding: float = 0.25) -> List[np.ndarray]:
+    """
+    ECAPA-Embeddings mehrerer normalisierter Segmente mit einem encode_batch-Aufruf je Längen-Bucket
+
+    Kürzere Segmente werden mit Nullen aufgefüllt; wav_lens (relative Längen)
+    sorgt dafür, dass das Padding nicht in Features und Pooling eingeht.
+    Die Embeddings kommen in Eingabereihenfolge zurück. Modelle mit numpy_io
+    (exportierte Encoder aus ecapa_export) bekommen und liefern NumPy-Arrays.
+    """
+    numpy_io = getattr(model, "numpy_io", False)
+    if not numpy_io:
+        import torch
+
+    embeddings: List[Optional[np.ndarray]] = [None] * len(segments)
+    for bucket in length_buckets([len(segment) for segment in segments], max_padding):
+        longest = len(segments[bucket[0]])
+        batch = np.zeros((len(bucket), longest), dtype=np.float32)
+        for row, index in enumerate(bucket):
+            batch[row, :len(segments[index])] = segments[index]
+        wav_lens = np.array([len(segments[index]) / longest for index in bucket], dtype=np.float32)
+
+        if numpy_io:
+            result = np.asarray(model.encode_batch(batch, wav_lens)).reshape(len(bucket), -1)
+        else:
+            with torch.no_grad():
+                result = model.encode_batch(torch.from_numpy(batch).to(device),
+                                            torch.from_numpy(wav_lens).to(device))
+            result = result.reshape(len(bucket), -1).cpu().numpy()
+        for row, index in enumerate(bucket):
+            embeddings[index] = result[row]
+    return embeddings
+
+
+def encode_with_ecapa(model, audio_data: np.ndarray, device) -> np.ndarray:
+    """ECAPA-Embedding eines normalisierten Segments (in- und out-of-process genutzt)"""
+    return encode_batch_with_ecapa(model, [audio_data], device)[0]
+
+
+def apply_process_limits(num_threads: int = 0, cpu_affinity: Optional[List[int]] = None):
+    """
+    CPU-Affinität und Thread-Pools des aktuellen Prozesses setzen
+
+    numpy (und damit BLAS) ist beim Start des Workers schon importiert; dessen
+    Pools werden per threadpoolctl begrenzt. Die Umgebungsvariablen gelten nur
+    noch für die danach geladenen Bibliotheken (torch, CTranslate2).
+    """
+    if num_threads > 0:
+        for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+            os.environ[var] = str(num_threads)
+        try:
+            from threadpoolctl import threadpool_limits
+            threadpool_limits(limits=num_threads)
+        except ImportError:
+            pass
+
+    if cpu_affinity:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, set(cpu_affinity))
+        else:
+            try:
+                import psutil
+                psutil.Process().cpu_affinity(list(cpu_affinity))
+            except Exception:
+                # macOS kennt keine harte CPU-Affinität
+                pass
+
+
+def _init_whisper_handler(config: WorkerConfig) -> Callable:
+    from faster_whisper import WhisperModel
+
+    model = WhisperModel(
+        config.model_name,
+        device="cpu",
+        compute_type="int8",
+        cpu_threads=config.num_threads,
+        num_workers=config.num_workers,
+        download_root=config.options.get("download_root", "./models")
+    )
+
+    def handle(audio: np.ndarray, params: Dict):
+        return transcribe_with_whisper(model, audio, params.get("language"))
+
+    return handle
+
+
+def _init_ecapa_handler(config: WorkerConfig) -> Callable:
+    device = "cpu"
+    exported = config.options.get("exported_model")
+    if exported:
+        # Exportiertes Modell: nur onnxruntime (bzw. TorchScript), kein SpeechBrain
+        from ecapa_export import ExportedEcapaEncoder
+        model = ExportedEcapaEncoder(exported, num_threads=config.num_threads, require_agreement=True)
+    else:
+        import torch
+        from speechbrain.pretrained import EncoderClassifier
+
+        if config.num_threads > 0:
+            torch.set_num_threads(config.num_threads)
+        torch.set_num_interop_threads(1)
+
+        device = torch.device("cpu")
+        model = EncoderClassifier.from_hparams(
+            source=config.model_name,
+            savedir=config.options.get("savedir", f"models/{config.model_name.split('/')[-1]}"),
+            run_opts={"device": device}
+        )
+
+    def handle(audio: np.ndarray, params: Dict):
+        # Batch: Segmente liegen hintereinander im Ring, params["lengths"] trennt sie
+        lengths = params.get("lengths")
+        if lengths:
+            segments = np.split(audio, np.cumsum(lengths)[:-1])
+            return np.stack(encode_batch_with_ecapa(model, segments, device))
+        return encode_with_ecapa(model, audio, device)
+
+    return handle
+
+
+_HANDLER_FACTORIES = {
+    "whisper": _init_whisper_handler,
+    "ecapa": _init_ecapa_handler,
+}
+
+
+def _worker_main(config: WorkerConfig, ring_name: str, ring_capacity: int,
+                 request_queue, result_queue):
+    """Einstiegspunkt des Worker-Prozesses"""
+    apply_process_limits(config.num_threads, config.cpu_affinity)
+    ring = SharedAudioRing(ring_capacity, name=ring_name, create=False)
+
+    try:
+        handler = (config.factory or _HANDLER_FACTORIES[config.kind])(config)
+    except Exception as e:
+        result_queue.put(("failed", None, f"{config.kind}-Modell konnte nicht geladen werden: {e}"))
+        ring.close()
+        return
+
+    result_queue.put(("ready", None, None))
+
+    def run_job(job_id: int, start: int, length: int, params: Dict):
+        audio = ring.read(start, length)
+        if audio is None:
+            result_queue.put(("error", job_id, "Audio im Ring-Buffer bereits überschrieben"))
+            return
+        try:
+            result_queue.put(("result", job_id, handler(audio, params)))
+        except Exception as e:
+            result_queue.put(("error", job_id, str(e)))
+
+    executor = ThreadPoolExecutor(max_workers=config.num_workers) if config.num_workers > 1 else None
+
+    while True:
+        job = request_queue.get()
+        if job is None:
+            break
+        if executor:
+            executor.submit(run_job, *job)
+        else:
+            run_job(*job)
+
+    if executor:
+        executor.shutdown(wait=True)
+    ring.close()
+
+
+class InferenceWorker:
+    """
+    Verwaltet einen Inferenz-Worker-Prozess
+
+    Audio geht über den SharedAudioRing, über die Queues laufen nur kleine
+    Job- und Ergebnis-Nachrichten. Stürzt der Prozess ab, schlagen offene Jobs
+    mit WorkerCrashedError fehl und der Worker wird neu gestartet.
+    """
+
+    def __init__(self, config: WorkerConfig, ring_capacity: int, max_restarts: int = 3):
+        self.config = config
+        self.ring_capacity = ring_capacity
+        self.max_restarts = max_restarts
+        self.restart_count = 0
+
+        self._ctx = mp.get_context("spawn")
+        self.ring = None
+        self.process = None
+        self._request_queue = None
+        self._result_queue = None
+
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._next_job_id = 0
+        self._ready = threading.Event()
+        self._running = False
+        self._listener = None
+        self.last_error = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self._running and self._ready.is_set()
+
+    def start(self, wait_timeout: Optional[float] = None) -> bool:
+        """Worker-Prozess starten, optional auf geladenes Modell warten"""
+        if self._running:
+            return self.wait_ready(wait_timeout) if wait_timeout else True
+
+        self.ring = SharedAudioRing(self.ring_capacity)
+        self._running = True
+        self._spawn()
+
+        self._listener = threading.Thread(target=self._listen_loop, daemon=True,
+                                          name=f"{self.config.kind}-worker-listener")
+        self._listener.start()
+
+        if wait_timeout is not None:
+            return self.wait_ready(wait_timeout)
+        return True
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        self._ready.wait(timeout)
+        return self.is_ready
+
+    def _spawn(self):
+        self._ready.clear()
+        self._request_queue = self._ctx.Queue()
+        self._result_queue = self._ctx.Queue()
+        self.process = self._ctx.Process(
+            target=_worker_main,
+            args=(self.config, self.ring.name, self.ring_capacity,
+                  self._request_queue, self._result_queue),
+            name=f"{self.config.kind}-worker",
+            daemon=True
+        )
+        self.process.start()
+
+    def submit(self, audio: np.ndarray, params: Optional[Dict] = None) -> Future:
+        """Audio in den Ring schreiben und Job einreihen"""
+        future = Future()
+        if not self._running:
+            future.set_exception(WorkerCrashedError("Worker nicht gestartet"))
+            return future
+
+        audio = np.asarray(audio, dtype=np.float32).ravel()
+        start = self.ring.write(audio)
+
+        with self._lock:
+            job_id = self._next_job_id
+            self._next_job_id += 1
+            self._pending[job_id] = future
+            self._request_queue.put((job_id, start, len(audio), params or {}))
+        return future
+
+    def _listen_loop(self):
+        while self._running:
+            try:
+                kind, job_id, payload = self._result_queue.get(timeout=0.2)
+            except queue.Empty:
+                if self._running and not self.process.is_alive():
+                    self._handle_crash()
+                continue
+            except (EOFError, OSError):
+                if self._running:
+                    self._handle_crash()
+                continue
+
+            if kind == "ready":
+                self._ready.set()
+            elif kind == "failed":
+                # Modell lässt sich nicht laden - Neustart wäre sinnlos
+                self.last_error = payload
+                print(f"❌ {payload}")
+                self._running = False
+                self._ready.set()
+                self._fail_pending(WorkerCrashedError(payload))
+            else:
+                with self._lock:
+                    future = self._pending.pop(job_id, None)
+                if future is None:
+                    continue
+                if kind == "result":
+                    future.set_result(payload)
+                else:
+                    future.set_exception(RuntimeError(payload))
+
+    def _handle_crash(self):
+        exit_code = self.process.exitcode
+        error = WorkerCrashedError(f"{self.config.kind}-Worker abgestürzt (Exit-Code {exit_code})")
+
+        with self._lock:
+            self._ready.clear()
+            pending = list(self._pending.values())
+            self._pending.clear()
+
+            if self.restart_count >= self.max_restarts:
+                self.last_error = f"{self.config.kind}-Worker nach {self.restart_count} Neustarts aufgegeben"
+                print(f"❌ {self.last_error}")
+                self._running = False
+                self._ready.set()
+            else:
+                self.restart_count += 1
+                print(f"🔄 {self.config.kind}-Worker abgestürzt (Exit-Code {exit_code}), "
+                      f"Neustart {self.restart_count}/{self.max_restarts}")
+                self._spawn()
+
+        for future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    def _fail_pending(self, error: Exception):
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    def stop(self, timeout: float = 3.0):
+        """Worker beenden und Shared Memory freigeben"""
+        if self.process is None:
+            return
+
+        self._running = False
+        try:
+            self._request_queue.put(None)
+        except Exception:
+            pass
+
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(1.0)
+
+        if self._listener:
+            self._listener.join(timeout=1.0)
+
+        self._fail_pending(WorkerCrashedError("Worker gestoppt"))
+        self.process = None
+
+        if self.ring:
+            self.ring.close()
+            self.ring.unlink()
+            self.ring = None
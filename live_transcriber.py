@@ -9,13 +9,21 @@ Echtzeit-Spracherkennung mit faster-whisper für offline Deutsch/Englisch
 import threading
 import queue
 import time
+import collections
 import numpy as np
-from typing import Optional, Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Callable, List, Tuple
 from faster_whisper import WhisperModel
 import io
 import wave
-from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
 from marker_system import MarkerSystem
+from marker_timeline import MarkerTimeline
+from marker_publisher import MarkerPublisher
+from ring_buffer import AudioRingBuffer
+from vad_stream import StreamingVAD, VADEvent
+from inference_workers import InferenceWorker, WorkerConfig, transcribe_with_whisper
+from thread_budget import get_thread_budget
 
 class LiveTranscriber(QObject):
     """Live-Transkriptions-Engine mit faster-whisper"""
@@ -24,42 +32,131 @@ class LiveTranscriber(QObject):
     transcription_ready = pyqtSignal(str)  # Finaler Text
     partial_transcription = pyqtSignal(str)  # Partieller Text
     error_occurred = pyqtSignal(str)  # Fehlermeldungen
+    speech_segment = pyqtSignal(int, int)  # Sprachsegment (Start-, End-Sample) aus dem gemeinsamen VAD
+    transcript_segment = pyqtSignal(int, int, str, int)  # Start-, End-Sample (Zeitleiste), Text, Sprecher-ID (-1 = unbekannt)
     
-    # Marker-System Signale
-    markers_updated = pyqtSignal(dict)  # Neue Marker-Daten
-    emotion_detected = pyqtSignal(str, float)  # Emotion, Confidence
+    # Marker-System Signale (gebündelt über MarkerPublisher, max. ein Snapshot pro UI-Frame)
+    markers_updated = pyqtSignal(object)  # MarkerSnapshot
+    emotion_detected = pyqtSignal(str, float)  # Emotion, Confidence (nur bei Änderung)
     pause_detected = pyqtSignal(float)  # Pause-Dauer
-    prosody_updated = pyqtSignal(dict)  # Prosodische Features
     
-    def __init__(self, language: str = "de", model_size: str = "base"):
+    def __init__(self, language: str = "de", model_size: str = "base",
+                 num_workers: int = 2, catchup_threshold: int = 3,
+                 cpu_threads: Optional[int] = None, use_worker_process: bool = False,
+                 worker_cpu_affinity: Optional[List[int]] = None,
+                 speaker_recognition: bool = False, speaker_options: Optional[dict] = None):
         super().__init__()
         self.language = language
         self.model_size = model_size
         self.model = None
         self.is_transcribing = False
         self.transcription_thread = None
-        self.audio_queue = queue.Queue()
+        self.audio_queue = queue.Queue()  # (start_sample, chunk)
         self.sample_rate = 16000
-        self.chunk_duration = 3.0  # Sekunden pro Chunk
+        self.chunk_duration = 3.0  # maximale Sekunden pro Chunk (Schnitt an VAD-Grenzen)
         self.chunk_size = int(self.sample_rate * self.chunk_duration)
-        self.audio_buffer = []
+        self.audio_buffer = AudioRingBuffer(self.sample_rate * 30)
+        self.samples_received = 0  # Sample-Uhr seit Start der Transkription
+        
+        # Gemeinsamer VAD: segmentiert für Whisper (vad_filter aus), liefert Pausen und Sprachsegmente
+        self.vad = StreamingVAD(sample_rate=self.sample_rate)
+        self.segment_start = None  # Beginn des offenen Sprachsegments
+        self.chunk_start = None    # noch nicht an Whisper übergebener Teil des Segments
+        self.segment_padding = int(0.2 * self.sample_rate)
+        self.min_speech_samples = int(0.25 * self.sample_rate)
+        self.speech_listeners: List[Callable[[int, np.ndarray], None]] = []
+        self.channel_listeners: List[Callable[[int, np.ndarray], None]] = []
+        
+        # Catch-up-Modus: Rückstau parallel mit mehreren Modell-Workern abarbeiten
+        self.num_workers = max(1, num_workers)
+        self.catchup_threshold = catchup_threshold
+        self.catchup_executor = None
+        
+        # Whisper optional in eigenem Prozess (kein GIL-Wettbewerb mit GUI/Audio)
+        self.cpu_threads = cpu_threads if cpu_threads is not None else get_thread_budget().whisper_threads
+        self.use_worker_process = use_worker_process
+        self.worker_cpu_affinity = worker_cpu_affinity
+        self.inference_worker = None
+        self.pending_results = collections.deque()  # (chunk_start, chunk_end, Future) in Sample-Reihenfolge
         
         # Marker-System initialisieren
-        self.marker_system = MarkerSystem(sample_rate=self.sample_rate)
+        self.marker_system = MarkerSystem(sample_rate=self.sample_rate, shared_vad=True)
         self._setup_marker_signals()
         
+        # Transkript-Segmente warten auf ihre Sprecherfenster (Intervall-Join über die Sample-Zeit)
+        self.speaker_system = None
+        self.pending_segments = collections.deque()  # (start, end, text, Ablauf-Zeitpunkt)
+        self.transcript_segments: List[Tuple[int, int, str, int]] = []
+        if speaker_recognition:
+            self._init_speaker_recognition(speaker_options or {})
+        
         # Modell initialisieren
         self.init_model()
     
     def _setup_marker_signals(self):
-        """Marker-System Signale mit LiveTranscriber verbinden"""
-        self.marker_system.markers_updated.connect(self.markers_updated.emit)
-        self.marker_system.emotion_detected.connect(self.emotion_detected.emit)
-        self.marker_system.pause_detected.connect(self.pause_detected.emit)
-        self.marker_system.prosody_updated.connect(self.prosody_updated.emit)
+        """
+        Marker-Ausgabe über den Publisher an die GUI weitergeben
+        
+        Die Roh-Signale des MarkerSystem (eins pro Analyse-Hop) werden nicht mehr
+        weitergereicht; der Publisher liest pro UI-Frame den aktuellen Snapshot.
+        """
+        self.marker_publisher = MarkerPublisher(self.marker_system)
+        self.marker_publisher.markers_updated.connect(self.markers_updated.emit)
+        self.marker_publisher.emotion_detected.connect(self.emotion_detected.emit)
+        self.marker_publisher.pause_detected.connect(self.pause_detected.emit)
+    
+    def _init_speaker_recognition(self, options: dict):
+        """
+        Sprechererkennung als Pipeline-Stufe einhängen
+        
+        Sie bekommt die Sprachstücke des gemeinsamen VAD und schreibt ihre
+        Sprecherfenster direkt (im Embedding-Thread) in die Marker-Zeitleiste.
+        Mit options['backend'] == 'channels' entscheidet statt ECAPA die
+        Kanalenergie (ein Mikrofon je Sprecher, Mehrkanal-Blöcke vom AudioManager).
+        """
+        options = dict(options)
+        backend = options.pop('backend', 'ecapa')
+        try:
+            if backend == 'channels':
+                from channel_diarization import ChannelEnergyDiarizer
+                self.speaker_system = ChannelEnergyDiarizer(sample_rate=self.sample_rate, **options)
+            else:
+                from src.speaker_recognition import SpeakerRecognitionSystem
+                self.speaker_system = SpeakerRecognitionSystem(sample_rate=self.sample_rate, **options)
+        except Exception as e:
+            print(f"⚠️ Sprechererkennung nicht verfügbar: {e}")
+            self.speaker_system = None
+            return
+        
+        if backend == 'channels':
+            self.add_channel_listener(self.speaker_system.process_channels)
+        self.add_speech_listener(self.speaker_system.process_speech_segment)
+        self.speaker_system.speaker_segment.connect(
+            self._on_speaker_segment, Qt.ConnectionType.DirectConnection
+        )
+    
+    def set_timeline(self, timeline: MarkerTimeline,
+                     segments: Optional[List[Tuple[int, int, str, int]]] = None):
+        """
+        Zeitleiste der Sitzung austauschen (neue oder geladene Sitzung)
+        
+        Die Transkript-Segmente gehören zur Zeitleiste und werden mit ihr
+        ersetzt; noch wartende Segmente der alten Sitzung verfallen.
+        """
+        self.marker_system.timeline = timeline
+        self.transcript_segments = list(segments or [])
+        self.pending_segments.clear()
+    
+    def _on_speaker_segment(self, start: int, end: int, speaker_id: int, confidence: float):
+        """Sprecherfenster in die aktuelle Zeitleiste schreiben (die GUI tauscht sie pro Sitzung)"""
+        offset = self.marker_system.sample_offset
+        self.marker_system.timeline.add_speaker(offset + start, offset + end, speaker_id, confidence)
     
     def init_model(self):
         """Whisper-Modell initialisieren"""
+        if self.use_worker_process:
+            return self._init_worker_process()
+        
         try:
             print(f"Lade Whisper-Modell '{self.model_size}' für Sprache '{self.language}'...")
             
@@ -68,6 +165,8 @@ class LiveTranscriber(QObject):
                 self.model_size,
                 device="cpu",
                 compute_type="int8",  # Optimiert für CPU
+                cpu_threads=self.cpu_threads,
+                num_workers=self.num_workers,  # Parallele transcribe()-Aufrufe im Catch-up-Modus
                 download_root="./models"  # Lokaler Modell-Cache
             )
             
@@ -80,10 +179,48 @@ class LiveTranscriber(QObject):
             self.error_occurred.emit(error_msg)
             return False
     
+    def _init_worker_process(self) -> bool:
+        """Whisper-Modell in einem eigenen Worker-Prozess laden"""
+        if self.inference_worker:
+            self.inference_worker.stop()
+        
+        print(f"Starte Whisper-Worker-Prozess '{self.model_size}'...")
+        self.inference_worker = InferenceWorker(
+            WorkerConfig(
+                kind="whisper",
+                model_name=self.model_size,
+                num_threads=self.cpu_threads,
+                cpu_affinity=self.worker_cpu_affinity,
+                num_workers=self.num_workers,
+                options={"download_root": "./models"}
+            ),
+            ring_capacity=self.chunk_size * 32  # Platz für ~32 Chunks im Flug
+        )
+        
+        if self.inference_worker.start(wait_timeout=300.0):
+            print(f"Whisper-Worker '{self.model_size}' bereit")
+            return True
+        
+        error_msg = f"Fehler beim Starten des Whisper-Workers: {self.inference_worker.last_error}"
+        print(error_msg)
+        self.error_occurred.emit(error_msg)
+        return False
+    
     def is_model_available(self) -> bool:
         """Prüfen ob Modell verfügbar ist"""
+        if self.inference_worker is not None:
+            return self.inference_worker.is_ready
         return self.model is not None
     
+    def shutdown(self):
+        """Transkription stoppen und Worker-Prozesse beenden"""
+        self.stop_transcription()
+        if self.inference_worker:
+            self.inference_worker.stop()
+            self.inference_worker = None
+        if self.speaker_system:
+            self.speaker_system.shutdown()
+    
     def start_transcription(self, audio_manager):
         """Live-Transkription starten"""
         if not self.is_model_available():
@@ -97,10 +234,24 @@ class LiveTranscriber(QObject):
         
         self.audio_manager = audio_manager
         self.is_transcribing = True
-        self.audio_buffer = []
+        self.audio_buffer.clear()
+        self.samples_received = 0
+        self.vad.reset()
+        self.segment_start = None
+        self.chunk_start = None
+        self.pending_segments.clear()
+        
+        # Worker-Pool für Catch-up-Dekodierung (im Worker-Prozess übernimmt das num_workers)
+        if self.num_workers > 1 and self.inference_worker is None:
+            self.catchup_executor = ThreadPoolExecutor(
+                max_workers=self.num_workers, thread_name_prefix="whisper-catchup"
+            )
         
-        # Marker-System starten
+        # Marker-System und GUI-Publisher starten
         self.marker_system.start()
+        self.marker_publisher.start()
+        if self.speaker_system and not self.speaker_system.start_processing():
+            print("⚠️ Sprechererkennung nicht bereit - Transkript ohne Sprecher")
         
         # Transkriptions-Thread starten
         self.transcription_thread = threading.Thread(target=self._transcription_loop)
@@ -119,10 +270,22 @@ class LiveTranscriber(QObject):
         
         # Marker-System stoppen
         self.marker_system.stop()
+        self.marker_publisher.stop()
+        if self.speaker_system:
+            self.speaker_system.stop_processing()
         
         if self.transcription_thread:
             self.transcription_thread.join(timeout=3.0)
         
+        if self.catchup_executor:
+            # Laufende Catch-up-Chunks noch ausgeben, wartende verwerfen
+            self.catchup_executor.shutdown(wait=True, cancel_futures=True)
+            self.catchup_executor = None
+            self._emit_completed_results("Fehler bei Catch-up-Dekodierung")
+        
+        self.pending_results.clear()
+        self._resolve_segments(force=True)
+        
         # Queue und Buffer leeren
         while not self.audio_queue.empty():
             try:
@@ -130,7 +293,7 @@ class LiveTranscriber(QObject):
             except queue.Empty:
                 break
         
-        self.audio_buffer = []
+        self.audio_buffer.clear()
         print("Live-Transkription gestoppt")
     
     def _transcription_loop(self):
@@ -145,30 +308,35 @@ class LiveTranscriber(QObject):
                 if audio_data is not None:
                     print(f"📊 Audio empfangen: {len(audio_data)} samples, RMS: {np.sqrt(np.mean(audio_data**2)):.4f}")
                     
-                    # Audio-Daten zum Buffer hinzufügen
-                    self.audio_buffer.extend(audio_data.flatten())
+                    # Mehrkanal-Blöcke (ein Mikrofon je Sprecher) vor dem Downmix weitergeben
+                    audio_data = np.asarray(audio_data, dtype=np.float32)
+                    if audio_data.ndim > 1:
+                        for listener in self.channel_listeners:
+                            listener(self.samples_received, audio_data)
+                        audio_data = audio_data.mean(axis=1)
                     
-                    # Audio-Daten an Marker-System weiterleiten
-                    try:
-                        markers = self.marker_system.process_audio_chunk(audio_data.flatten())
-                        print(f"🎯 Marker: {markers['affect']['emotion']}, Pitch: {markers['prosody']['pitch_mean']:.1f}Hz")
-                    except Exception as marker_error:
-                        print(f"❌ Marker-Fehler: {marker_error}")
+                    # Audio-Daten in den Ring schreiben (Sample-Uhr = samples_received)
+                    block = audio_data.ravel()
+                    self.audio_buffer.write(block)
+                    self.samples_received += len(block)
                     
-                    # Wenn genug Daten für einen Chunk vorhanden sind
-                    if len(self.audio_buffer) >= self.chunk_size:
-                        print(f"🎤 Transkribiere Chunk: {len(self.audio_buffer)} → {self.chunk_size} samples")
-                        # Chunk extrahieren
-                        chunk = np.array(self.audio_buffer[:self.chunk_size], dtype=np.float32)
-                        self.audio_buffer = self.audio_buffer[self.chunk_size//2:]  # 50% Überlappung
-                        
-                        # Chunk zur Transkription einreihen
-                        self.audio_queue.put(chunk)
+                    # VAD einmal für die ganze Pipeline
+                    events = self.vad.process(block)
+                    
+                    # Audio und VAD-Ereignisse an den Marker-Worker übergeben (blockiert nie)
+                    self.marker_system.submit_audio(block)
+                    self.marker_system.submit_vad(events, self.vad.processed_samples)
+                    markers = self.marker_system.current_markers
+                    print(f"🎯 Marker: {markers['affect']['emotion']}, Pitch: {markers['prosody']['pitch_mean']:.1f}Hz")
+                    
+                    # Sprachsegmente für Whisper und Listener schneiden
+                    self._segment_speech(events)
                 else:
                     print("⏳ Warte auf Audio-Daten...")
                 
                 # Transkription verarbeiten
                 self._process_transcription_queue()
+                self._resolve_segments()
                 
             except queue.Empty:
                 continue
@@ -183,21 +351,87 @@ class LiveTranscriber(QObject):
         
         print("Live-Transkriptions-Loop beendet")
     
+    def add_speech_listener(self, callback: Callable[[int, np.ndarray], None]):
+        """
+        Callback für Sprach-Audio aus dem gemeinsamen VAD registrieren
+        
+        Der Callback erhält (start_sample, audio) für jedes an Whisper übergebene
+        Sprachstück (ohne Padding, max. chunk_duration), z.B.
+        SpeakerRecognitionSystem.process_speech_segment.
+        """
+        self.speech_listeners.append(callback)
+    
+    def add_channel_listener(self, callback: Callable[[int, np.ndarray], None]):
+        """
+        Callback für Mehrkanal-Audio registrieren
+        
+        Der Callback erhält (start_sample, block) mit block (n_samples, Kanäle)
+        für jeden Mehrkanal-Block vom AudioManager (keep_channels=True), vor
+        dem Downmix auf Mono, z.B. ChannelEnergyDiarizer.process_channels.
+        """
+        self.channel_listeners.append(callback)
+    
+    def _segment_speech(self, events: List[VADEvent]):
+        """Chunks an VAD-Grenzen schneiden; lange Sprache an der leisesten Frame-Grenze teilen"""
+        for event in events:
+            if event.kind == 'speech_start':
+                self.segment_start = event.sample
+                self.chunk_start = event.sample
+            elif self.segment_start is not None:
+                self._queue_speech(self.chunk_start, event.sample)
+                if self.speaker_system:
+                    self.speaker_system.end_speech_segment()
+                self.speech_segment.emit(self.segment_start, event.sample)
+                self.segment_start = None
+                self.chunk_start = None
+        
+        if self.chunk_start is not None and self.vad.processed_samples - self.chunk_start >= self.chunk_size:
+            limit = self.chunk_start + self.chunk_size
+            cut = self.vad.quietest_boundary(limit - self.sample_rate, limit)
+            self._queue_speech(self.chunk_start, cut)
+            self.chunk_start = cut
+    
+    def _queue_speech(self, start: int, end: int):
+        """Sprachbereich [start, end) mit Padding zur Transkription einreihen und an Listener geben"""
+        if end - start < self.min_speech_samples:
+            return
+        
+        oldest = self.samples_received - len(self.audio_buffer)
+        padded_start = max(start - self.segment_padding, oldest)
+        padded_end = min(end + self.segment_padding, self.samples_received)
+        chunk = self.audio_buffer.read(padded_start, padded_end - padded_start)
+        if chunk is None:
+            return
+        
+        print(f"🎤 Transkribiere Sprachsegment: {(end - start) / self.sample_rate:.2f}s")
+        self.audio_queue.put((padded_start, chunk))
+        
+        speech = chunk[start - padded_start:end - padded_start]
+        for listener in self.speech_listeners:
+            try:
+                listener(start, speech)
+            except Exception as e:
+                print(f"Fehler im Sprach-Listener: {e}")
+    
     def _process_transcription_queue(self):
         """Transkriptions-Queue verarbeiten"""
         try:
+            if self.inference_worker is not None:
+                self._process_queue_in_worker()
+                return
+            
+            # Rückstau erkannt (oder noch Catch-up-Ergebnisse offen): parallele Dekodierung
+            if self.catchup_executor is not None and (
+                    self.pending_results or self.audio_queue.qsize() >= self.catchup_threshold):
+                self._process_catchup_batch()
+                return
+            
             # Alle verfügbaren Audio-Chunks verarbeiten
             while not self.audio_queue.empty():
                 try:
-                    audio_chunk = self.audio_queue.get_nowait()
+                    chunk_start, audio_chunk = self.audio_queue.get_nowait()
                     text = self._transcribe_chunk(audio_chunk)
-                    
-                    if text and text.strip():
-                        # Text an Marker-System weiterleiten
-                        self.marker_system.process_transcript(text.strip())
-                        
-                        # Signal an GUI senden
-                        self.transcription_ready.emit(text.strip())
+                    self._emit_transcription(text, chunk_start, chunk_start + len(audio_chunk))
                         
                 except queue.Empty:
                     break
@@ -205,54 +439,149 @@ class LiveTranscriber(QObject):
         except Exception as e:
             print(f"Fehler bei Transkriptions-Verarbeitung: {e}")
     
+    def _process_catchup_batch(self):
+        """
+        Wartende Chunks parallel dekodieren, ohne auf die Ergebnisse zu warten
+        
+        Die Chunks werden auf die Modell-Worker (WhisperModel num_workers) verteilt.
+        Der Loop liest derweil weiter Audio und versorgt VAD, Marker und Sprecher;
+        fertige Ergebnisse werden bei jedem Durchlauf in Sample-Reihenfolge ausgegeben.
+        """
+        submitted = 0
+        while True:
+            try:
+                chunk_start, audio_chunk = self.audio_queue.get_nowait()
+            except queue.Empty:
+                break
+            future = self.catchup_executor.submit(self._transcribe_chunk, audio_chunk)
+            self.pending_results.append((chunk_start, chunk_start + len(audio_chunk), future))
+            submitted += 1
+        
+        if submitted > 1:
+            print(f"⏩ Catch-up: {submitted} Chunks mit {self.num_workers} Workern")
+        self._emit_completed_results("Fehler bei Catch-up-Dekodierung")
+    
+    def _process_queue_in_worker(self):
+        """
+        Chunks an den Whisper-Worker-Prozess übergeben, ohne auf Ergebnisse zu warten
+        
+        Fertige Ergebnisse werden strikt in Sample-Reihenfolge ausgegeben.
+        """
+        while True:
+            try:
+                chunk_start, audio_chunk = self.audio_queue.get_nowait()
+            except queue.Empty:
+                break
+            
+            prepared = self._prepare_chunk(audio_chunk)
+            if prepared is not None:
+                future = self.inference_worker.submit(prepared, {"language": self.language})
+                self.pending_results.append((chunk_start, chunk_start + len(audio_chunk), future))
+        
+        self._emit_completed_results("Fehler im Whisper-Worker")
+    
+    def _emit_completed_results(self, error_prefix: str):
+        """Fertige Ergebnisse vom Anfang der Warteschlange ausgeben (strikt in Sample-Reihenfolge)"""
+        while self.pending_results and self.pending_results[0][2].done():
+            chunk_start, chunk_end, future = self.pending_results.popleft()
+            if future.cancelled():
+                continue
+            try:
+                self._emit_transcription(future.result(), chunk_start, chunk_end)
+            except Exception as e:
+                print(f"{error_prefix}: {e}")
+    
+    def _emit_transcription(self, text: Optional[str], start: Optional[int] = None,
+                            end: Optional[int] = None):
+        """Transkribierten Text an Marker-System und GUI weitergeben"""
+        if text and text.strip():
+            # Text an Marker-System weiterleiten
+            self.marker_system.submit_transcript(text.strip())
+            
+            # Signal an GUI senden
+            self.transcription_ready.emit(text.strip())
+            
+            # Segment mit Sample-Zeit (Sitzungs-Uhr der Zeitleiste) auf seinen Sprecher warten lassen
+            if start is not None:
+                offset = self.marker_system.sample_offset
+                deadline = time.monotonic() + (self.speaker_system.latency_budget if self.speaker_system else 0.0)
+                self.pending_segments.append((offset + start, offset + end, text.strip(), deadline))
+    
+    def refine_speakers(self) -> int:
+        """
+        Sprecher am Sitzungsende nachclustern (nach stop_transcription)
+        
+        Schreibt die neuen IDs in die Sprecherfenster der Zeitleiste und ordnet die
+        Transkript-Segmente per Intervall-Join neu zu.
+        
+        Returns:
+            Anzahl umbenannter Sprecherfenster
+        """
+        if self.speaker_system is None:
+            return 0
+        
+        starts, labels = self.speaker_system.refine_speakers()
+        timeline = self.marker_system.timeline
+        changed = timeline.relabel_speakers(starts + self.marker_system.sample_offset, labels)
+        if changed:
+            self.transcript_segments = [
+                (start, end, text, timeline.speaker_for_interval(start, end)[0])
+                for start, end, text, _ in self.transcript_segments
+            ]
+        return changed
+    
+    def _resolve_segments(self, force: bool = False):
+        """
+        Wartende Transkript-Segmente mit Sprecher-ID ausgeben
+        
+        Ein Segment ist fertig, sobald Sprecherfenster bis zu seinem Ende (ohne
+        Padding) vorliegen oder sein Latenzbudget abgelaufen ist; dann entscheidet
+        der Intervall-Join über die Sample-Zeit (-1 wenn kein Fenster überlappt).
+        """
+        timeline = self.marker_system.timeline
+        while self.pending_segments:
+            start, end, text, deadline = self.pending_segments[0]
+            ready = (force or self.speaker_system is None or
+                     timeline.speakers_until >= end - self.segment_padding or
+                     time.monotonic() >= deadline)
+            if not ready:
+                break
+            self.pending_segments.popleft()
+            
+            speaker_id = -1
+            if self.speaker_system is not None:
+                speaker_id, _ = timeline.speaker_for_interval(start, end)
+            self.transcript_segments.append((start, end, text, speaker_id))
+            self.transcript_segment.emit(start, end, text, speaker_id)
+    
+    def _prepare_chunk(self, audio_chunk: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Audio-Chunk normalisieren; None bei digitaler Stille
+        
+        Kein eigenes RMS-Gate: hier kommen nur Sprachsegmente des gemeinsamen VAD an.
+        """
+        peak = np.max(np.abs(audio_chunk))
+        if peak == 0:
+            return None
+        
+        return audio_chunk / peak
+    
     def _transcribe_chunk(self, audio_chunk: np.ndarray) -> Optional[str]:
         """Audio-Chunk mit Whisper transkribieren - MIT DEBUG"""
         try:
-            # Audio-Normalisierung
-            if np.max(np.abs(audio_chunk)) > 0:
-                audio_chunk = audio_chunk / np.max(np.abs(audio_chunk))
-            
-            # Stille-Erkennung (Skip sehr leise Chunks)
-            rms = np.sqrt(np.mean(audio_chunk**2))
-            print(f"🔊 Transkription RMS: {rms:.6f}")
-            
-            # DEBUGGING: Bei BlackHole (RMS=0) Test-Audio generieren
-            if rms < 0.000001:  # BlackHole hat RMS von exakt 0.0000
-                print(f"🔧 BlackHole erkannt (RMS: {rms:.6f}), generiere Test-Audio für Transkription...")
-                # Sehr schwaches Rauschen für Whisper-Test hinzufügen
-                audio_chunk = np.random.normal(0, 0.001, audio_chunk.shape).astype(np.float32)
-                rms = np.sqrt(np.mean(audio_chunk**2))
-                print(f"🎲 Test-Audio generiert (RMS: {rms:.6f})")
-            elif rms < 0.001:  # Normaler Schwellenwert für echte Mikrofone
-                print(f"❌ Audio zu leise (RMS: {rms:.6f} < 0.001), überspringe Transkription")
+            audio_chunk = self._prepare_chunk(audio_chunk)
+            if audio_chunk is None:
                 return None
             
-            print(f"✅ Audio verarbeitung (RMS: {rms:.6f}), starte Transkription...")
+            print(f"✅ Audio verarbeitung, starte Transkription...")
             
             # Whisper-Transkription
-            segments, info = self.model.transcribe(
-                audio_chunk,
-                language=self.language,
-                beam_size=1,  # Schneller für Live-Transkription
-                best_of=1,
-                temperature=0.0,
-                condition_on_previous_text=False,
-                vad_filter=True,  # Voice Activity Detection
-                vad_parameters=dict(min_silence_duration_ms=500)
-            )
-            
-            # Text aus Segmenten extrahieren
-            text_parts = []
-            for segment in segments:
-                if segment.text.strip():
-                    text_parts.append(segment.text.strip())
-            
-            result_text = " ".join(text_parts) if text_parts else None
+            result_text = transcribe_with_whisper(self.model, audio_chunk, self.language)
             
             if result_text:
                 print(f"📝 Transkription erfolgreich: '{result_text}'")
             else:
-                print(f"🔇 Keine Transkription gefunden (Segmente: {len(list(segments))})")
+                print(f"🔇 Keine Transkription gefunden")
             
             return result_text
             
@@ -8,6 +8,11 @@ Eine therapeutenfreundliche Desktop-Anwendung für Live-Transkription
 
 import sys
 import os
+
+# Thread-Budget vor dem Import von numpy/librosa/torch setzen
+import thread_budget
+thread_budget.configure_environment()
+
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import QTranslator, QLocale
 from gui import TransRapportMainWindow
@@ -15,6 +20,7 @@ from gui import TransRapportMainWindow
 def main():
     """Hauptfunktion - startet die TransRapport Anwendung"""
     app = QApplication(sys.argv)
+    thread_budget.apply_blas_limits()
     
     # App-Eigenschaften setzen
     app.setApplicationName("TransRapport MVP")
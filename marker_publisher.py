@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Gebündelte Marker-Auslieferung an die GUI
+Höchstens ein kompakter Snapshot pro UI-Frame; Emotion und Pausen nur bei Änderung
+"""
+
+import collections
+from typing import Mapping, Optional
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtSignal, pyqtSlot
+
+
+class MarkerSnapshot:
+    """Flacher, kompakter Marker-Datensatz (ohne verschachtelte Dicts und datetime)"""
+
+    __slots__ = ('sample', 'emotion', 'confidence', 'valence', 'pause_duration', 'speech_rate',
+                 'pitch_mean', 'pitch_var', 'energy_mean', 'energy_var')
+
+    def __init__(self, sample: int = 0, emotion: str = 'neutral', confidence: float = 0.0,
+                 valence: float = 0.0, pause_duration: float = 0.0, speech_rate: float = 0.0,
+                 pitch_mean: float = 0.0, pitch_var: float = 0.0,
+                 energy_mean: float = 0.0, energy_var: float = 0.0):
+        self.sample = sample
+        self.emotion = emotion
+        self.confidence = confidence
+        self.valence = valence
+        self.pause_duration = pause_duration
+        self.speech_rate = speech_rate
+        self.pitch_mean = pitch_mean
+        self.pitch_var = pitch_var
+        self.energy_mean = energy_mean
+        self.energy_var = energy_var
+
+    @classmethod
+    def from_markers(cls, markers: Mapping) -> 'MarkerSnapshot':
+        """Aus einem MarkerSystem-Snapshot (affect/tempo/prosody) erzeugen"""
+        affect, tempo, prosody = markers['affect'], markers['tempo'], markers['prosody']
+        return cls(
+            sample=int(markers.get('sample', 0)),
+            emotion=affect['emotion'],
+            confidence=float(affect['confidence']),
+            valence=float(affect['valence']),
+            pause_duration=float(tempo['pause_duration']),
+            speech_rate=float(tempo['speech_rate']),
+            pitch_mean=float(prosody['pitch_mean']),
+            pitch_var=float(prosody['pitch_var']),
+            energy_mean=float(prosody['energy_mean']),
+            energy_var=float(prosody['energy_var'])
+        )
+
+    def __repr__(self) -> str:
+        return (f"MarkerSnapshot(sample={self.sample}, emotion={self.emotion!r}, "
+                f"valence={self.valence:.2f}, pitch={self.pitch_mean:.1f}, energy={self.energy_mean:.3f})")
+
+
+class MarkerPublisher(QObject):
+    """
+    Bündelt Marker-Updates für den GUI-Thread
+
+    Der Publisher lebt im GUI-Thread und liest pro UI-Frame (QTimer) den zuletzt
+    veröffentlichten Snapshot des MarkerSystem. Neue Snapshots werden höchstens
+    einmal pro Frame ausgeliefert; Zwischenstände verfallen. Emotionen werden
+    nur bei Wechsel der Kategorie oder spürbarer Confidence-Änderung gemeldet,
+    Pausen einmal pro abgeschlossener Pause.
+    """
+
+    markers_updated = pyqtSignal(object)       # MarkerSnapshot
+    emotion_detected = pyqtSignal(str, float)  # Emotion, Confidence (nur bei Änderung)
+    pause_detected = pyqtSignal(float)         # Dauer abgeschlossener Pausen
+
+    def __init__(self, marker_system, frame_interval_ms: int = 33, confidence_step: float = 0.05):
+        super().__init__()
+        self.marker_system = marker_system
+        self.confidence_step = confidence_step
+
+        self._last_markers: Optional[Mapping] = None
+        self._last_emotion: Optional[str] = None
+        self._last_confidence = 0.0
+        self._pending_pauses = collections.deque()  # vom Analyse-Worker befüllt
+        self.delivered = 0
+
+        # Pausen direkt im Worker-Thread einsammeln (deque.append ist threadsicher)
+        marker_system.pause_detected.connect(self._pending_pauses.append, Qt.ConnectionType.DirectConnection)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(frame_interval_ms)
+        self.timer.timeout.connect(self.flush)
+
+    def start(self):
+        self._last_markers = None
+        self._last_emotion = None
+        self._pending_pauses.clear()
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.flush()
+
+    @pyqtSlot()
+    def flush(self):
+        """Einen UI-Frame ausliefern: neuester Snapshot, geänderte Emotion, neue Pausen"""
+        while self._pending_pauses:
+            self.pause_detected.emit(self._pending_pauses.popleft())
+
+        markers = self.marker_system.current_markers
+        if markers is self._last_markers or markers.get('timestamp') is None:
+            return
+        self._last_markers = markers
+
+        snapshot = MarkerSnapshot.from_markers(markers)
+        self.markers_updated.emit(snapshot)
+        self.delivered += 1
+
+        if (snapshot.emotion != self._last_emotion or
+                abs(snapshot.confidence - self._last_confidence) >= self.confidence_step):
+            self._last_emotion = snapshot.emotion
+            self._last_confidence = snapshot.confidence
+            self.emotion_detected.emit(snapshot.emotion, snapshot.confidence)
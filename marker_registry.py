@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Marker-Plugins und Scheduler
+Jeder Marker deklariert Takt, Fenster, Eingaben und Ausgabeschema; der Scheduler
+misst die Kosten je Aufruf und dünnt teure Marker unter Last aus.
+"""
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from feature_frontend import FeatureFrontEnd, FrameFeatures
+from ring_buffer import AudioRingBuffer
+
+# Eingaben, die ein Marker anfordern kann (FrameFeatures-Felder, neue Samples, VAD-Ereignisse)
+FEATURE_INPUTS = ('magnitudes', 'rms', 'zcr', 'centroid', 'rolloff', 'f0', 'voiced_prob')
+PITCH_INPUTS = ('f0', 'voiced_prob')  # nur diese lösen die F0-Berechnung aus
+MARKER_INPUTS = FEATURE_INPUTS + ('audio', 'vad')
+
+
+@dataclass(frozen=True)
+class MarkerSpec:
+    """Deklaration eines Markers"""
+    name: str                                  # Schlüssel im Marker-Snapshot
+    hop: float = 0.25                          # Sekunden zwischen zwei Aufrufen
+    window: float = 1.0                        # Sekunden Front-End-Features je Aufruf
+    inputs: Tuple[str, ...] = ()               # aus MARKER_INPUTS
+    schema: Mapping[str, object] = field(default_factory=dict)  # Ausgabefelder mit Standardwerten
+    max_cost_ms: float = 5.0                   # zugesagte Kosten je Aufruf
+    essential: bool = False                    # wird unter Last nie ausgedünnt oder abgeschaltet
+
+
+@dataclass
+class MarkerContext:
+    """Eingaben eines Marker-Aufrufs"""
+    sample: int                                # Sample-Uhr am Ende des Analysefensters
+    timestamp: datetime
+    features: Optional[FrameFeatures]          # Fenster der deklarierten Länge (None ohne Feature-Eingaben, F0 nur auf Anforderung)
+    audio: np.ndarray                          # neue Samples seit dem letzten Takt
+
+
+class MarkerPlugin:
+    """Basisklasse für Marker; compute() liefert ein Dict gemäß spec.schema"""
+
+    spec: MarkerSpec
+
+    def reset(self):
+        pass
+
+    def compute(self, context: MarkerContext) -> Dict:
+        raise NotImplementedError
+
+
+class FunctionMarker(MarkerPlugin):
+    """Marker aus einer Funktion context -> Dict (z.B. gebundene Methode des MarkerSystem)"""
+
+    def __init__(self, spec: MarkerSpec, function: Callable[[MarkerContext], Dict],
+                 reset: Optional[Callable[[], None]] = None):
+        self.spec = spec
+        self.function = function
+        self._reset = reset
+
+    def reset(self):
+        if self._reset is not None:
+            self._reset()
+
+    def compute(self, context: MarkerContext) -> Dict:
+        return self.function(context)
+
+
+@dataclass
+class MarkerCost:
+    """Laufzeitstatistik und Scheduling-Zustand eines Markers"""
+    period: int                  # deklarierter Takt in Scheduler-Ticks
+    window_frames: int           # Front-End-Frames je Aufruf
+    stride: int = 1              # Ausdünnungsfaktor (1 = wie deklariert)
+    enabled: bool = True
+    calls: int = 0
+    skipped: int = 0             # ausgelassene Takte durch Ausdünnung/Abschaltung
+    errors: int = 0
+    total_ms: float = 0.0
+    avg_ms: float = 0.0          # exponentiell geglättet
+    max_ms: float = 0.0
+    last_tick: int = -10 ** 9
+    probation: bool = False      # wieder eingeschaltet: nächste Messung ersetzt avg_ms
+    disables: int = 0            # Abschaltungen in Folge (verlängert die Wartezeit)
+    retry_tick: int = 0          # frühester Tick für einen Probeaufruf
+
+
+class MarkerRegistry:
+    """
+    Registry und Scheduler der Marker-Plugins
+
+    Ein Tick entspricht einem Analyse-Hop des MarkerSystem. Ein Marker läuft
+    alle period * stride Ticks; alle Marker lesen dieselben Front-End-Features.
+    adapt() wird nach jedem Audio-Chunk mit dem Füllstand der Eingangs-Queue
+    aufgerufen: Bei Rückstau oder überschrittenem CPU-Budget wird der teuerste
+    nicht-essentielle Marker ausgedünnt (stride verdoppelt) und bei max_stride
+    abgeschaltet. Marker, die ihre zugesagten max_cost_ms je Aufruf
+    überschreiten, werden direkt abgeschaltet - Ausdünnen senkt die Kosten je
+    Aufruf nicht. Ist wieder Luft, wird schrittweise zurückgenommen;
+    abgeschaltete Marker bekommen einen Probeaufruf, dessen Messung den alten
+    Mittelwert ersetzt. Fällt der Probeaufruf durch, verdoppelt sich die
+    Wartezeit bis zum nächsten Versuch.
+    """
+
+    def __init__(self, frontend: FeatureFrontEnd, tick_seconds: float = 0.25,
+                 cpu_budget: float = 0.25, max_stride: int = 8, adapt_interval: int = 8,
+                 smoothing: float = 0.1):
+        self.frontend = frontend
+        self.tick_seconds = tick_seconds
+        self.cpu_budget = cpu_budget          # Anteil Echtzeit, den alle Marker zusammen nutzen dürfen
+        self.max_stride = max_stride
+        self.adapt_interval = adapt_interval  # Ticks zwischen zwei Anpassungen (Hysterese)
+        self.smoothing = smoothing
+
+        self.plugins: Dict[str, MarkerPlugin] = {}
+        self.costs: Dict[str, MarkerCost] = {}
+        self.tick = 0
+        self._last_adapt = 0
+
+    # ------------------------------------------------------------ Registrierung
+
+    def register(self, plugin: MarkerPlugin):
+        spec = plugin.spec
+        if spec.name in self.plugins:
+            raise ValueError(f"Marker '{spec.name}' ist bereits registriert")
+        unknown = set(spec.inputs) - set(MARKER_INPUTS)
+        if unknown:
+            raise ValueError(f"Marker '{spec.name}': unbekannte Eingaben {sorted(unknown)}")
+
+        sample_rate = self.frontend.sample_rate
+        window_frames = 1 + (int(spec.window * sample_rate) - self.frontend.n_fft) // self.frontend.hop_length
+        if window_frames > self.frontend.window_frames:
+            raise ValueError(f"Marker '{spec.name}': Fenster {spec.window}s größer als das Front-End-Fenster")
+
+        self.plugins[spec.name] = plugin
+        self.costs[spec.name] = MarkerCost(
+            period=max(1, int(round(spec.hop / self.tick_seconds))),
+            window_frames=max(1, window_frames)
+        )
+
+    def unregister(self, name: str):
+        self.plugins.pop(name, None)
+        self.costs.pop(name, None)
+
+    def reset(self):
+        self.tick = 0
+        self._last_adapt = 0
+        for name, plugin in self.plugins.items():
+            plugin.reset()
+            cost = self.costs[name]
+            self.costs[name] = MarkerCost(period=cost.period, window_frames=cost.window_frames)
+
+    def defaults(self, name: str) -> Dict:
+        return dict(self.plugins[name].spec.schema)
+
+    # -------------------------------------------------------------- Ausführung
+
+    def run_tick(self, ring: AudioRingBuffer, timestamp: datetime, audio: np.ndarray) -> Dict[str, Dict]:
+        """
+        Fällige Marker ausführen, gibt deren Ausgaben nach Name zurück
+
+        Das Front-End rechnet nur, wenn ein fälliger Marker Features anfordert,
+        F0 nur für Marker mit f0/voiced_prob. Die Front-End-Zeit wird den
+        fälligen Verbrauchern anteilig zugeschlagen, damit avg_ms und cpu_load
+        die tatsächlichen Kosten eines Markers abbilden.
+        """
+        self.tick += 1
+        sample = ring.total_written
+        outputs = {}
+
+        due = []
+        for name, plugin in self.plugins.items():
+            cost = self.costs[name]
+            if self.tick - cost.last_tick < cost.period:
+                continue
+            if not cost.enabled or self.tick - cost.last_tick < cost.period * cost.stride:
+                cost.skipped += 1
+                continue
+            due.append((name, plugin, cost))
+
+        # Front-End nur für fällige Verbraucher; Kosten je Marker anteilig
+        frontend_ms = {name: 0.0 for name, _, _ in due}
+        feature_users = [name for name, plugin, _ in due if set(plugin.spec.inputs) & set(FEATURE_INPUTS)]
+        pitch_users = [name for name, plugin, _ in due if set(plugin.spec.inputs) & set(PITCH_INPUTS)]
+        if feature_users:
+            start = time.perf_counter()
+            self.frontend.update(ring, pitch=False)
+            self._charge(frontend_ms, feature_users, start)
+        if pitch_users:
+            start = time.perf_counter()
+            self.frontend.update_pitch(ring)
+            self._charge(frontend_ms, pitch_users, start)
+
+        features_cache: Dict[Tuple[int, bool], FrameFeatures] = {}
+        for name, plugin, cost in due:
+            features = None
+            if name in feature_users:
+                key = (cost.window_frames, name in pitch_users)
+                if key not in features_cache:
+                    features_cache[key] = self.frontend.window_features(*key)
+                features = features_cache[key]
+
+            start = time.perf_counter()
+            try:
+                result = plugin.compute(MarkerContext(sample, timestamp, features, audio))
+            except Exception as e:
+                print(f"❌ Marker '{name}' fehlgeschlagen: {e}")
+                cost.errors += 1
+                result = self.defaults(name)
+            elapsed_ms = 1000.0 * (time.perf_counter() - start) + frontend_ms[name]
+
+            cost.calls += 1
+            cost.last_tick = self.tick
+            cost.total_ms += elapsed_ms
+            cost.max_ms = max(cost.max_ms, elapsed_ms)
+            if cost.probation and elapsed_ms <= plugin.spec.max_cost_ms:
+                cost.disables = 0
+            cost.avg_ms = elapsed_ms if cost.calls == 1 or cost.probation else \
+                (1 - self.smoothing) * cost.avg_ms + self.smoothing * elapsed_ms
+            cost.probation = False
+            outputs[name] = result
+
+        return outputs
+
+    @staticmethod
+    def _charge(frontend_ms: Dict[str, float], users: List[str], start: float):
+        share = 1000.0 * (time.perf_counter() - start) / len(users)
+        for name in users:
+            frontend_ms[name] += share
+
+    def cpu_load(self) -> float:
+        """Geschätzter Anteil Echtzeit aller aktiven Marker (aus den geglätteten Kosten)"""
+        tick_ms = 1000.0 * self.tick_seconds
+        return sum(cost.avg_ms / (cost.period * cost.stride * tick_ms)
+                   for cost in self.costs.values() if cost.enabled and cost.calls)
+
+    def adapt(self, backlog: float = 0.0) -> Optional[str]:
+        """
+        Ausdünnung an die Last anpassen
+
+        Args:
+            backlog: Füllstand der Eingangs-Queue (0-1)
+
+        Returns:
+            Name des angepassten Markers oder None
+        """
+        if self.tick - self._last_adapt < self.adapt_interval:
+            return None
+        self._last_adapt = self.tick
+
+        adjustable = [(name, cost) for name, cost in self.costs.items()
+                      if not self.plugins[name].spec.essential and cost.calls and not cost.probation]
+
+        # Marker über ihrem zugesagten Budget je Aufruf: abschalten, Ausdünnen hilft hier nicht
+        over_budget = [(name, cost) for name, cost in adjustable
+                       if cost.enabled and cost.avg_ms > self.plugins[name].spec.max_cost_ms]
+        if over_budget:
+            name, cost = max(over_budget, key=lambda item: item[1].avg_ms)
+            self._disable(cost)
+            print(f"⚠️ Marker '{name}' abgeschaltet: {cost.avg_ms:.2f} ms/Aufruf "
+                  f"über zugesagten {self.plugins[name].spec.max_cost_ms:.2f} ms")
+            return name
+
+        # Globale Überlast: teuersten aktiven Marker ausdünnen, bei max_stride abschalten
+        if backlog > 0.5 or self.cpu_load() > self.cpu_budget:
+            candidates = [(name, cost) for name, cost in adjustable if cost.enabled]
+            if not candidates:
+                return None
+            name, cost = max(candidates, key=lambda item: item[1].avg_ms / (item[1].period * item[1].stride))
+            if cost.stride < self.max_stride:
+                cost.stride *= 2
+                print(f"⚠️ Marker '{name}' ausgedünnt: jeder {cost.period * cost.stride}. Takt ({cost.avg_ms:.2f} ms/Aufruf)")
+            else:
+                self._disable(cost)
+                print(f"⚠️ Marker '{name}' unter Last abgeschaltet ({cost.avg_ms:.2f} ms/Aufruf)")
+            return name
+
+        # Entlastet: günstigsten gedrosselten Marker schrittweise zurücknehmen
+        if backlog == 0.0 and self.cpu_load() < 0.5 * self.cpu_budget:
+            throttled = [(name, cost) for name, cost in adjustable
+                         if (cost.enabled and cost.stride > 1)
+                         or (not cost.enabled and self.tick >= cost.retry_tick)]
+            if throttled:
+                name, cost = min(throttled, key=lambda item: item[1].avg_ms)
+                if not cost.enabled:
+                    # Probeaufruf mit frischer Messung statt des veralteten Mittelwerts
+                    cost.enabled = True
+                    cost.probation = True
+                else:
+                    cost.stride //= 2
+                return name
+        return None
+
+    def _disable(self, cost: MarkerCost):
+        cost.enabled = False
+        cost.disables += 1
+        cost.retry_tick = self.tick + self.adapt_interval * 2 ** min(cost.disables, 6)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Kosten und Zustand je Marker"""
+        return {
+            name: {
+                'calls': cost.calls,
+                'skipped': cost.skipped,
+                'errors': cost.errors,
+                'avg_ms': cost.avg_ms,
+                'max_ms': cost.max_ms,
+                'total_ms': cost.total_ms,
+                'hop': cost.period * self.tick_seconds,
+                'stride': cost.stride,
+                'enabled': cost.enabled,
+            }
+            for name, cost in self.costs.items()
+        }
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.plugins)
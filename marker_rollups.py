@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Rollup-Pyramide für Marker-Statistiken
+Welford-Akkumulatoren je 10 s / 1 min / 5 min (und gröber), O(1) pro Marker-Frame,
+Zusammenfassungen beliebiger Zeitbereiche ohne erneuten Scan der Rohdaten
+"""
+
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+# Aggregierte Größen; positive/negative sind 0/1-Indikatoren der Valenz (Mittelwert = Anteil)
+ROLLUP_FIELDS = ('valence', 'pitch', 'energy', 'positive', 'negative')
+
+# Bucket-Längen in Sekunden; jede Stufe ist ein ganzzahliges Vielfaches der vorherigen
+DEFAULT_LEVELS = (10.0, 60.0, 300.0, 1800.0, 7200.0)
+
+VALENCE_THRESHOLD = 0.3
+
+
+@dataclass(frozen=True)
+class RollupStats:
+    """Kennzahlen einer Größe über einen Zeitbereich"""
+    count: int
+    mean: float
+    var: float   # Populationsvarianz
+    min: float
+    max: float
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.var))
+
+
+def combine_buckets(count: np.ndarray, mean: np.ndarray, m2: np.ndarray,
+                    minimum: np.ndarray, maximum: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Welford-Zustände entlang Achse 0 zusammenführen (Chan et al., paarweise Formel vektorisiert)
+
+    Leere Buckets (count 0) tragen nichts bei.
+    """
+    total = count.sum(axis=0)
+    safe = np.maximum(total, 1)
+    combined_mean = (count * mean).sum(axis=0) / safe
+    combined_m2 = m2.sum(axis=0) + (count * np.square(mean - combined_mean)).sum(axis=0)
+    return total, combined_mean, combined_m2, minimum.min(axis=0), maximum.max(axis=0)
+
+
+def marker_values(valence, pitch, energy) -> Tuple[np.ndarray, np.ndarray]:
+    """Werte und Gültigkeitsmaske (n, len(ROLLUP_FIELDS)) aus Marker-Spalten"""
+    valence = np.atleast_1d(np.asarray(valence, dtype=np.float64))
+    pitch = np.atleast_1d(np.asarray(pitch, dtype=np.float64))
+    energy = np.atleast_1d(np.asarray(energy, dtype=np.float64))
+
+    values = np.stack([
+        valence, pitch, energy,
+        (valence > VALENCE_THRESHOLD).astype(np.float64),
+        (valence < -VALENCE_THRESHOLD).astype(np.float64)
+    ], axis=1)
+    valid = np.ones_like(values, dtype=bool)
+    valid[:, 1] = pitch > 0   # stimmlose Frames zählen nicht zur Tonhöhe
+    valid[:, 2] = energy > 0
+    return values, valid
+
+
+class RollupPyramid:
+    """
+    Mehrstufige Marker-Aggregate auf der Sample-Uhr
+
+    Jede Stufe hält pro Bucket (z.B. 10 s) und Größe einen Welford-Zustand
+    (count, mean, M2, min, max). update() führt pro Stufe einen
+    Welford-Schritt aus – bei fester Stufenzahl O(1) pro Marker-Frame.
+    summarize() zerlegt einen Bereich wie ein Segmentbaum: an den Rändern
+    feine Buckets, in der Mitte immer gröbere. Pro Stufe werden höchstens
+    2 * (Faktor - 1) Buckets gelesen, die Kosten wachsen also logarithmisch
+    mit der Bereichslänge statt linear mit der Anzahl Roh-Frames.
+    Bereichsgrenzen werden auf die feinste Stufe (Standard 10 s) gerundet.
+    """
+
+    def __init__(self, sample_rate: int = 16000, levels: Sequence[float] = DEFAULT_LEVELS,
+                 fields: Sequence[str] = ROLLUP_FIELDS):
+        self.sample_rate = sample_rate
+        self.fields = tuple(fields)
+        self.level_seconds = tuple(float(s) for s in levels)
+        self.spans = [int(round(s * sample_rate)) for s in self.level_seconds]
+        for finer, coarser in zip(self.spans, self.spans[1:]):
+            if coarser % finer:
+                raise ValueError(f"Rollup-Stufen müssen Vielfache sein: {finer} -> {coarser}")
+        self.factors = [coarser // finer for finer, coarser in zip(self.spans, self.spans[1:])]
+        self.clear()
+
+    def clear(self):
+        n_fields = len(self.fields)
+        self._count = [np.zeros((0, n_fields), dtype=np.int64) for _ in self.spans]
+        self._mean = [np.zeros((0, n_fields)) for _ in self.spans]
+        self._m2 = [np.zeros((0, n_fields)) for _ in self.spans]
+        self._min = [np.zeros((0, n_fields)) for _ in self.spans]
+        self._max = [np.zeros((0, n_fields)) for _ in self.spans]
+        self.n_buckets = [0] * len(self.spans)
+        self.frames = 0
+        self.last_sample = 0
+
+    def _ensure(self, level: int, n_buckets: int):
+        """Bucket-Arrays einer Stufe bei Bedarf verdoppeln (amortisiert O(1))"""
+        if n_buckets > len(self._count[level]):
+            capacity = max(n_buckets, 2 * len(self._count[level]), 16)
+            extra = capacity - len(self._count[level])
+            n_fields = len(self.fields)
+            self._count[level] = np.concatenate([self._count[level], np.zeros((extra, n_fields), dtype=np.int64)])
+            self._mean[level] = np.concatenate([self._mean[level], np.zeros((extra, n_fields))])
+            self._m2[level] = np.concatenate([self._m2[level], np.zeros((extra, n_fields))])
+            self._min[level] = np.concatenate([self._min[level], np.full((extra, n_fields), np.inf)])
+            self._max[level] = np.concatenate([self._max[level], np.full((extra, n_fields), -np.inf)])
+        self.n_buckets[level] = max(self.n_buckets[level], n_buckets)
+
+    # --------------------------------------------------------------- Schreiben
+
+    def update(self, sample: int, valence: float, pitch: float, energy: float):
+        """Einen Marker-Frame einrechnen (ein Welford-Schritt pro Stufe)"""
+        values, valid = marker_values(valence, pitch, energy)
+        x, mask = values[0], valid[0]
+
+        for level, span in enumerate(self.spans):
+            bucket = int(sample) // span
+            self._ensure(level, bucket + 1)
+            count = self._count[level][bucket]
+            mean = self._mean[level][bucket]
+
+            count += mask
+            delta = np.where(mask, x - mean, 0.0)
+            mean += delta / np.maximum(count, 1)
+            self._m2[level][bucket] += delta * (x - mean)
+            np.minimum(self._min[level][bucket], np.where(mask, x, np.inf), out=self._min[level][bucket])
+            np.maximum(self._max[level][bucket], np.where(mask, x, -np.inf), out=self._max[level][bucket])
+
+        self.frames += 1
+        self.last_sample = max(self.last_sample, int(sample))
+
+    def add_rows(self, samples: np.ndarray, valence: np.ndarray, pitch: np.ndarray, energy: np.ndarray):
+        """Viele Frames auf einmal einrechnen (z.B. beim Laden einer Sitzung)"""
+        samples = np.asarray(samples, dtype=np.int64)
+        if len(samples) == 0:
+            return
+        values, valid = marker_values(valence, pitch, energy)
+
+        for level, span in enumerate(self.spans):
+            buckets = samples // span
+            first = int(buckets.min())
+            n_local = int(buckets.max()) - first + 1
+            self._ensure(level, first + n_local)
+            local = buckets - first
+
+            # Stapel-Statistik je Bucket, dann per Chan-Formel mit dem Bestand zusammenführen
+            count = np.zeros((n_local, len(self.fields)), dtype=np.int64)
+            mean = np.zeros_like(count, dtype=np.float64)
+            m2 = np.zeros_like(mean)
+            minimum = np.full_like(mean, np.inf)
+            maximum = np.full_like(mean, -np.inf)
+            for f in range(len(self.fields)):
+                index, x = local[valid[:, f]], values[valid[:, f], f]
+                count[:, f] = np.bincount(index, minlength=n_local)
+                mean[:, f] = np.bincount(index, weights=x, minlength=n_local) / np.maximum(count[:, f], 1)
+                m2[:, f] = np.bincount(index, weights=np.square(x - mean[index, f]), minlength=n_local)
+                np.minimum.at(minimum[:, f], index, x)
+                np.maximum.at(maximum[:, f], index, x)
+
+            target = slice(first, first + n_local)
+            stacked = combine_buckets(
+                np.stack([self._count[level][target], count]),
+                np.stack([self._mean[level][target], mean]),
+                np.stack([self._m2[level][target], m2]),
+                np.stack([self._min[level][target], minimum]),
+                np.stack([self._max[level][target], maximum])
+            )
+            (self._count[level][target], self._mean[level][target], self._m2[level][target],
+             self._min[level][target], self._max[level][target]) = stacked
+
+        self.frames += len(samples)
+        self.last_sample = max(self.last_sample, int(samples.max()))
+
+    # ------------------------------------------------------------------ Lesen
+
+    def _select(self, lo: int, hi: int):
+        """Bereich [lo, hi) in feinsten Buckets in (Stufe, Start, Stop)-Stücke zerlegen"""
+        parts = []
+        for level, factor in enumerate(self.factors):
+            if hi - lo <= 0:
+                return parts
+            # Ränder bis zur nächsten Grenze der gröberen Stufe fein lesen
+            aligned_lo = min(-(-lo // factor) * factor, hi)
+            aligned_hi = max((hi // factor) * factor, aligned_lo)
+            if aligned_lo > lo:
+                parts.append((level, lo, aligned_lo))
+            if hi > aligned_hi:
+                parts.append((level, aligned_hi, hi))
+            lo, hi = aligned_lo // factor, aligned_hi // factor
+        if hi > lo:
+            parts.append((len(self.spans) - 1, lo, hi))
+        return parts
+
+    def summarize(self, start_sample: int = 0, end_sample: Optional[int] = None) -> Dict[str, RollupStats]:
+        """Kennzahlen aller Größen im Bereich [start, end) (auf die feinste Stufe gerundet)"""
+        base = self.spans[0]
+        end_sample = self.last_sample + 1 if end_sample is None else end_sample
+        lo = max(0, int(start_sample) // base)
+        hi = min(-(-int(end_sample) // base), self.n_buckets[0])
+
+        parts = []
+        for level, start, stop in self._select(lo, hi):
+            stop = min(stop, self.n_buckets[level])
+            if stop > start:
+                parts.append((level, slice(start, stop)))
+
+        n_fields = len(self.fields)
+        if not parts:
+            return {name: RollupStats(0, 0.0, 0.0, 0.0, 0.0) for name in self.fields}
+
+        count, mean, m2, minimum, maximum = combine_buckets(
+            np.concatenate([self._count[level][s] for level, s in parts]).reshape(-1, n_fields),
+            np.concatenate([self._mean[level][s] for level, s in parts]).reshape(-1, n_fields),
+            np.concatenate([self._m2[level][s] for level, s in parts]).reshape(-1, n_fields),
+            np.concatenate([self._min[level][s] for level, s in parts]).reshape(-1, n_fields),
+            np.concatenate([self._max[level][s] for level, s in parts]).reshape(-1, n_fields)
+        )
+        return {
+            name: RollupStats(
+                int(count[f]),
+                float(mean[f]) if count[f] else 0.0,
+                float(m2[f] / count[f]) if count[f] else 0.0,
+                float(minimum[f]) if count[f] else 0.0,
+                float(maximum[f]) if count[f] else 0.0
+            )
+            for f, name in enumerate(self.fields)
+        }
+
+    def series(self, level_seconds: float, field: str) -> Dict[str, np.ndarray]:
+        """Bucket-Reihe einer Stufe für eine Größe (z.B. Verlauf in 5-Minuten-Abschnitten)"""
+        level = self.level_seconds.index(float(level_seconds))
+        f = self.fields.index(field)
+        n = self.n_buckets[level]
+        count = self._count[level][:n, f].copy()
+        safe = np.maximum(count, 1)
+        empty = count == 0
+        return {
+            'start': np.arange(n) * self.level_seconds[level],
+            'count': count,
+            'mean': np.where(empty, 0.0, self._mean[level][:n, f]),
+            'var': np.where(empty, 0.0, self._m2[level][:n, f] / safe),
+            'min': np.where(empty, 0.0, self._min[level][:n, f]),
+            'max': np.where(empty, 0.0, self._max[level][:n, f]),
+        }
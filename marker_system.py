@@ -7,13 +7,19 @@ Therapeutisch relevante Standard-Marker für Emotionserkennung und Sprechpausen
 """
 
 import numpy as np
-import librosa
-import webrtcvad
 import threading
 import queue
-from typing import Dict, List, Optional, Tuple
+import time
+import collections
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
 from datetime import datetime, timedelta
 from PyQt6.QtCore import QObject, pyqtSignal
+from ring_buffer import AudioRingBuffer
+from feature_frontend import FeatureFrontEnd, FrameFeatures
+from vad_stream import StreamingVAD, VADEvent
+from marker_timeline import MarkerTimeline
+from marker_registry import FunctionMarker, MarkerPlugin, MarkerRegistry, MarkerSpec
 import warnings
 warnings.filterwarnings("ignore", category=UserWarning)
 
@@ -23,28 +29,55 @@ class MarkerSystem(QObject):
     ATO → SEM: Affect (Emotion), Tempo (Pausen), Other prosody (Pitch/Energy)
     """
     
-    # Qt-Signale für Live-Visualisierung
-    markers_updated = pyqtSignal(dict)  # Neue Marker-Daten
-    emotion_detected = pyqtSignal(str, float)  # Emotion, Confidence
+    # Pausen direkt aus dem Worker-Thread; Marker-Werte liest die GUI gebündelt
+    # über den MarkerPublisher aus current_markers
     pause_detected = pyqtSignal(float)  # Pause-Dauer in Sekunden
-    prosody_updated = pyqtSignal(dict)  # Prosodische Features
     
-    def __init__(self, sample_rate: int = 16000):
+    def __init__(self, sample_rate: int = 16000,
+                 analysis_hop: float = 0.25, analysis_window: float = 1.0,
+                 input_queue_size: int = 64, shared_vad: bool = False):
         super().__init__()
         self.sample_rate = sample_rate
         self.is_active = False
         
-        # Audio-Buffer für Analyse
-        self.audio_buffer = []
-        self.buffer_duration = 2.0  # Sekunden
-        self.buffer_size = int(self.sample_rate * self.buffer_duration)
-        
-        # VAD für Pause-Erkennung
-        self.vad = webrtcvad.Vad(2)  # Aggressivität 0-3 (2 = mittel)
+        # Analyse-Worker: begrenzte Eingangs-Queue, älteste Einträge werden bei Überlauf verworfen
+        self.input_queue = queue.Queue(maxsize=input_queue_size)
+        self.worker_thread = None
+        self.chunks_submitted = 0
+        self.chunks_dropped = 0
+        self.samples_dropped = 0
+        self.analysis_times = []
         
-        # Pause-Tracking
+        # Audio-Buffer für Analyse (float32-Ring statt Python-Liste)
+        self.buffer_duration = max(2.0, analysis_window)  # Sekunden
+        self.buffer_size = int(self.sample_rate * self.buffer_duration)
+        self.audio_buffer = AudioRingBuffer(self.buffer_size)
+        
+        # Analyse-Takt: Fensterlänge und Hop unabhängig von der Audio-Blockgröße
+        self.analysis_window = analysis_window  # Sekunden pro Analysefenster
+        self.analysis_hop = analysis_hop        # Sekunden zwischen zwei Analysen
+        self.window_size = int(self.sample_rate * self.analysis_window)
+        self.hop_size = max(1, int(self.sample_rate * self.analysis_hop))
+        self.samples_since_analysis = 0
+        
+        # Gemeinsames STFT-Front-End für alle Audio-Features (512er Frames, 256er Hop)
+        self.frontend = FeatureFrontEnd(
+            sample_rate=self.sample_rate,
+            n_fft=512,
+            hop_length=256,
+            window_frames=1 + (self.window_size - 512) // 256
+        )
+        
+        # Streaming-VAD für Pause-Erkennung (30 ms Frames, Hysterese 90 ms / 300 ms).
+        # Mit shared_vad liefert die Pipeline die VAD-Ereignisse (submit_vad), kein eigener VAD.
+        self.shared_vad = shared_vad
+        self.vad = None if shared_vad else StreamingVAD(sample_rate=self.sample_rate, aggressiveness=2)
+        self.vad_events = collections.deque()  # VAD-Ereignisse werden nie verworfen, nur Audio
+        self.vad_position = 0                  # Sample-Uhr des VAD (entschiedene Samples)
+        
+        # Pause-Tracking auf der Sample-Uhr des VAD
         self.last_speech_time = None
-        self.silence_start = None
+        self.silence_start = 0  # Sample, an dem die laufende Pause begann (None während Sprache)
         self.min_pause_duration = 0.6  # Minimum 600ms für therapeutisch relevante Pause
         
         # Emotion-Tracking (vereinfacht)
@@ -56,82 +89,278 @@ class MarkerSystem(QObject):
         self.energy_history = []
         self.feature_window_size = 10
         
-        # Marker-Ausgabe
-        self.current_markers = {
+        # Marker-Plugins: ATO-Standardmarker, weitere über register_marker().
+        # Der Lock schützt Registry und Snapshot-Aufbau vor Registrierungen aus
+        # anderen Threads, während der Worker die Plugins durchläuft.
+        self.registry = MarkerRegistry(self.frontend, tick_seconds=self.analysis_hop)
+        self._registry_lock = threading.Lock()
+        self._register_builtin_markers()
+        
+        # Vollständige Marker-Zeitleiste der Sitzung (eine Zeile pro Analyse).
+        # Die Sample-Uhr beginnt mit jeder Aufnahme bei 0; sample_offset setzt
+        # sie in der Zeitleiste hinter dem Ende der vorigen Aufnahmen fort.
+        self.timeline = MarkerTimeline(sample_rate=self.sample_rate)
+        self.sample_offset = 0
+        
+        # Marker-Ausgabe: unveränderlicher Snapshot, wird pro Analyse komplett ersetzt
+        self.speech_rate = 0.0
+        self._snapshot = self._freeze({
             'timestamp': None,
+            'sample': 0,
             'affect': {'emotion': 'neutral', 'confidence': 0.0, 'valence': 0.0},
             'tempo': {'pause_duration': 0.0, 'speech_rate': 0.0},
             'prosody': {'pitch_mean': 0.0, 'pitch_var': 0.0, 'energy_mean': 0.0, 'energy_var': 0.0}
-        }
+        })
         
         print("Marker-System initialisiert (ATO→SEM)")
     
+    def _register_builtin_markers(self):
+        """Affect, Tempo und Prosodie als Plugins registrieren"""
+        self.registry.register(FunctionMarker(
+            MarkerSpec('affect', hop=self.analysis_hop, window=self.analysis_window,
+                       inputs=('rms', 'zcr', 'centroid', 'rolloff'),
+                       schema={'emotion': 'neutral', 'confidence': 0.0, 'valence': 0.0}),
+            lambda context: self._analyze_emotion(context.features)
+        ))
+        # Tempo verarbeitet die VAD-Ereignisse und darf deshalb nie ausfallen
+        self.registry.register(FunctionMarker(
+            MarkerSpec('tempo', hop=self.analysis_hop, window=self.analysis_window,
+                       inputs=('audio', 'vad'), essential=True,
+                       schema={'pause_duration': 0.0, 'speech_rate': 0.0}),
+            lambda context: self._analyze_pauses(context.audio, context.timestamp)
+        ))
+        self.registry.register(FunctionMarker(
+            MarkerSpec('prosody', hop=self.analysis_hop, window=self.analysis_window,
+                       inputs=('f0', 'rms'),
+                       schema={'pitch_mean': 0.0, 'pitch_var': 0.0, 'energy_mean': 0.0, 'energy_var': 0.0}),
+            lambda context: self._analyze_prosody(context.features)
+        ))
+    
+    def register_marker(self, plugin: MarkerPlugin):
+        """
+        Zusätzlichen Marker registrieren
+        
+        Die Ausgaben erscheinen im Snapshot unter plugin.spec.name; solange der
+        Marker noch nicht gelaufen ist, mit den Standardwerten aus spec.schema.
+        Aus jedem Thread aufrufbar, auch während der Analyse-Worker läuft.
+        """
+        with self._registry_lock:
+            self.registry.register(plugin)
+            markers = self.get_current_markers()
+            markers.setdefault(plugin.spec.name, self.registry.defaults(plugin.spec.name))
+            self._publish(markers)
+    
+    @property
+    def current_markers(self) -> Mapping:
+        """Zuletzt veröffentlichter Marker-Snapshot (read-only, ohne Lock lesbar)"""
+        return self._snapshot
+    
+    @staticmethod
+    def _freeze(markers: Dict) -> Mapping:
+        """Marker-Dict in einen schreibgeschützten Snapshot umwandeln"""
+        return MappingProxyType({
+            key: MappingProxyType(dict(value)) if isinstance(value, Mapping) else value
+            for key, value in markers.items()
+        })
+    
+    def _publish(self, markers: Dict):
+        """Neuen Snapshot veröffentlichen (eine Referenzzuweisung, für Leser atomar)"""
+        self._snapshot = self._freeze(markers)
+    
     def start(self):
-        """Marker-System aktivieren"""
+        """Marker-System aktivieren und Analyse-Worker starten"""
+        if not self.is_active:
+            # Neue Aufnahme: Zeitleiste hinter den bisherigen Zeilen fortsetzen
+            self.sample_offset = self.timeline.end_sample
         self.is_active = True
         self.last_speech_time = datetime.now()
+        
+        if self.worker_thread is None or not self.worker_thread.is_alive():
+            self.worker_thread = threading.Thread(
+                target=self._analysis_loop, name="marker-analysis", daemon=True
+            )
+            self.worker_thread.start()
+        
         print("Marker-System gestartet")
     
     def stop(self):
         """Marker-System deaktivieren"""
         self.is_active = False
-        self.audio_buffer = []
+        
+        # Worker beenden, bevor sein Zustand zurückgesetzt wird
+        if self.worker_thread is not None:
+            self._enqueue(None)
+            self.worker_thread.join(timeout=2.0)
+            self.worker_thread = None
+        while not self.input_queue.empty():
+            try:
+                self.input_queue.get_nowait()
+            except queue.Empty:
+                break
+        
+        self.audio_buffer.clear()
+        self.frontend.reset()
+        self.registry.reset()
+        if self.vad is not None:
+            self.vad.reset()
+        self.vad_events.clear()
+        self.vad_position = 0
+        self.silence_start = 0
+        self.samples_since_analysis = 0
         self.emotion_history = []
         self.pitch_history = []
         self.energy_history = []
+        if self.chunks_dropped:
+            print(f"⚠️ Marker-Queue: {self.chunks_dropped} Chunks ({self.samples_dropped / self.sample_rate:.1f}s) verworfen")
         print("Marker-System gestoppt")
     
-    def process_audio_chunk(self, audio_data: np.ndarray, timestamp: Optional[datetime] = None) -> Dict:
+    def _enqueue(self, item) -> bool:
+        """Non-blocking einreihen; bei voller Queue den ältesten Eintrag verwerfen"""
+        try:
+            self.input_queue.put_nowait(item)
+            return True
+        except queue.Full:
+            try:
+                dropped = self.input_queue.get_nowait()
+                if dropped is not None and dropped[0] == 'audio':
+                    self.chunks_dropped += 1
+                    self.samples_dropped += len(dropped[1])
+                self.input_queue.put_nowait(item)
+            except (queue.Empty, queue.Full):
+                return False
+            return True
+    
+    def submit_audio(self, audio_data: np.ndarray, timestamp: Optional[datetime] = None) -> bool:
         """
-        Audio-Chunk verarbeiten und Marker extrahieren
+        Audio-Chunk an den Analyse-Worker übergeben (blockiert nie)
         
-        Args:
-            audio_data: Audio-Daten als numpy array (float32, mono)
-            timestamp: Zeitstempel des Chunks
-            
         Returns:
-            Dict mit aktuellen Markern
+            False wenn das Marker-System nicht aktiv ist
         """
         if not self.is_active:
-            return self.current_markers
+            return False
         
         if timestamp is None:
             timestamp = datetime.now()
         
-        # Audio-Daten zum Buffer hinzufügen
-        self.audio_buffer.extend(audio_data.flatten())
+        self.chunks_submitted += 1
+        chunk = np.array(audio_data, dtype=np.float32).ravel()
+        return self._enqueue(('audio', chunk, timestamp))
+    
+    def submit_vad(self, events: List[VADEvent], position: int):
+        """
+        Ereignisse des gemeinsamen Pipeline-VAD übernehmen (nur mit shared_vad)
+        
+        Args:
+            events: Zustandswechsel seit dem letzten Aufruf
+            position: Sample-Position, bis zu der der VAD entschieden hat
+        """
+        # Nach stop() nichts mehr puffern, sonst landen alte Ereignisse in der nächsten Aufnahme
+        if not self.is_active:
+            return
         
-        # Buffer-Größe begrenzen
-        if len(self.audio_buffer) > self.buffer_size:
-            self.audio_buffer = self.audio_buffer[-self.buffer_size:]
+        self.vad_events.extend(events)
+        self.vad_position = position
+    
+    def submit_transcript(self, text: str, timestamp: Optional[datetime] = None) -> bool:
+        """Transkript an den Analyse-Worker übergeben (blockiert nie)"""
+        if not self.is_active or not text.strip():
+            return False
         
-        # Genug Daten für Analyse?
-        if len(self.audio_buffer) < self.sample_rate:  # Mindestens 1 Sekunde
-            return self.current_markers
+        if timestamp is None:
+            timestamp = datetime.now()
         
-        # Audio-Daten für Analyse vorbereiten
-        audio_segment = np.array(self.audio_buffer[-self.sample_rate:], dtype=np.float32)
+        return self._enqueue(('transcript', text, timestamp))
+    
+    def _analysis_loop(self):
+        """Worker-Thread: Audio und Transkripte in Eingangsreihenfolge analysieren"""
+        while self.is_active:
+            try:
+                item = self.input_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            
+            if item is None:
+                break
+            
+            kind, payload, timestamp = item
+            try:
+                if kind == 'audio':
+                    start = time.perf_counter()
+                    self.process_audio_chunk(payload, timestamp)
+                    self.analysis_times.append(time.perf_counter() - start)
+                    if len(self.analysis_times) > 100:
+                        self.analysis_times.pop(0)
+                    with self._registry_lock:
+                        self.registry.adapt(self.input_queue.qsize() / self.input_queue.maxsize)
+                else:
+                    self.process_transcript(payload, timestamp)
+            except Exception as e:
+                print(f"❌ Marker-Fehler: {e}")
+    
+    def get_queue_stats(self) -> Dict:
+        """Statistik der Eingangs-Queue und der Analysezeiten"""
+        with self._registry_lock:
+            marker_stats = self.registry.stats()
+        return {
+            'queue_size': self.input_queue.qsize(),
+            'queue_capacity': self.input_queue.maxsize,
+            'chunks_submitted': self.chunks_submitted,
+            'chunks_dropped': self.chunks_dropped,
+            'samples_dropped': self.samples_dropped,
+            'avg_analysis_time': float(np.mean(self.analysis_times)) if self.analysis_times else 0.0,
+            'markers': marker_stats
+        }
+    
+    def process_audio_chunk(self, audio_data: np.ndarray, timestamp: Optional[datetime] = None) -> Mapping:
+        """
+        Audio-Chunk synchron verarbeiten und Marker extrahieren
+        
+        Im Live-Betrieb ruft der Analyse-Worker diese Methode auf (siehe submit_audio);
+        direkte Aufrufe eignen sich für Tests und Offline-Auswertung.
         
-        # 1. AFFECT: Emotion aus Audio-Features ableiten
-        emotion_data = self._analyze_emotion(audio_segment)
+        Args:
+            audio_data: Audio-Daten als numpy array (float32, mono)
+            timestamp: Zeitstempel des Chunks
+            
+        Returns:
+            Aktueller Marker-Snapshot (schreibgeschützt, siehe current_markers)
+        """
+        if not self.is_active:
+            return self.current_markers
         
-        # 2. TEMPO: Pausen-Erkennung
-        pause_data = self._analyze_pauses(audio_data, timestamp)
+        if timestamp is None:
+            timestamp = datetime.now()
         
-        # 3. PROSODY: Pitch und Energy Features
-        prosody_data = self._analyze_prosody(audio_segment)
+        # Audio-Daten in den Ring schreiben
+        audio_data = np.asarray(audio_data, dtype=np.float32).ravel()
+        self.audio_buffer.write(audio_data)
+        self.samples_since_analysis += len(audio_data)
         
-        # Marker zusammenführen
-        self.current_markers = {
-            'timestamp': timestamp,
-            'affect': emotion_data,
-            'tempo': pause_data,
-            'prosody': prosody_data
-        }
+        # Genug Daten für ein Analysefenster?
+        if len(self.audio_buffer) < self.window_size:
+            return self.current_markers
         
-        # Signale senden
-        self.markers_updated.emit(self.current_markers)
+        # Analyse nur einmal pro Hop, nicht bei jedem Audio-Block
+        if self.samples_since_analysis < self.hop_size:
+            return self.current_markers
         
+        # Neue Samples seit der letzten Analyse (für Pausen)
+        new_audio = self.audio_buffer.latest(self.samples_since_analysis)
+        self.samples_since_analysis = 0
+        
+        # Fällige Marker ausführen; die Registry schickt dafür nur neue Frames durchs Front-End.
+        # Nicht gelaufene (ausgedünnte) Marker behalten ihren letzten Wert.
+        with self._registry_lock:
+            outputs = self.registry.run_tick(self.audio_buffer, timestamp, new_audio)
+            markers = self.get_current_markers()
+            markers.update(outputs)
+            markers['timestamp'] = timestamp
+            # Sitzungs-Sample-Uhr am Ende des Analysefensters
+            markers['sample'] = self.sample_offset + self.audio_buffer.total_written
+            self._publish(markers)
+        
+        self.timeline.append_markers(markers)
         return self.current_markers
     
     def process_transcript(self, text: str, timestamp: Optional[datetime] = None):
@@ -155,16 +384,17 @@ class MarkerSystem(QObject):
             estimated_duration = word_count / 2.5  # ~150 WPM = 2.5 WPS
             speech_rate = word_count / (estimated_duration / 60) if estimated_duration > 0 else 0
             
-            # Tempo-Daten aktualisieren
-            if 'tempo' in self.current_markers:
-                self.current_markers['tempo']['speech_rate'] = speech_rate
-        
-        # Speech detected - Reset pause tracking
+            # Tempo-Daten aktualisieren (neuer Snapshot statt In-place-Änderung)
+            self.speech_rate = speech_rate
+            with self._registry_lock:
+                markers = self.get_current_markers()
+                markers['tempo']['speech_rate'] = speech_rate
+                self._publish(markers)
+        
+        # Speech detected (Pausengrenzen bestimmt der VAD frame-genau, Transkripte kommen verzögert)
         self.last_speech_time = timestamp
-        if self.silence_start is not None:
-            self.silence_start = None
     
-    def _analyze_emotion(self, audio_segment: np.ndarray) -> Dict:
+    def _analyze_emotion(self, features: FrameFeatures) -> Dict:
         """
         Vereinfachte Emotionserkennung basierend auf Audio-Features
         
@@ -172,18 +402,13 @@ class MarkerSystem(QObject):
             Dict mit Emotion, Confidence und Valence
         """
         try:
-            # Grundlegende Audio-Features extrahieren
-            rms = np.sqrt(np.mean(audio_segment**2))
-            zcr = np.mean(librosa.feature.zero_crossing_rate(audio_segment)[0])
-            
-            # Spectral Features
-            stft = librosa.stft(audio_segment, n_fft=512, hop_length=256)
-            spectral_centroids = librosa.feature.spectral_centroid(S=np.abs(stft))[0]
-            spectral_rolloff = librosa.feature.spectral_rolloff(S=np.abs(stft))[0]
+            # Grundlegende Audio-Features aus dem Front-End
+            rms = np.sqrt(np.mean(features.rms**2))
+            zcr = np.mean(features.zcr)
             
             # Vereinfachte Emotionsklassifikation basierend auf Features
             emotion, confidence, valence = self._classify_emotion_simple(
-                rms, zcr, np.mean(spectral_centroids), np.mean(spectral_rolloff)
+                rms, zcr, np.mean(features.centroid), np.mean(features.rolloff)
             )
             
             # Emotion History für Glättung
@@ -200,9 +425,6 @@ class MarkerSystem(QObject):
                 'valence': valence
             }
             
-            # Signal senden
-            self.emotion_detected.emit(emotion_data['emotion'], emotion_data['confidence'])
-            
             return emotion_data
             
         except Exception as e:
@@ -279,60 +501,52 @@ class MarkerSystem(QObject):
     
     def _analyze_pauses(self, audio_data: np.ndarray, timestamp: datetime) -> Dict:
         """
-        Pausen-Analyse mit WebRTC VAD
+        Pausen-Analyse mit dem Streaming-VAD (eigener oder gemeinsamer Pipeline-VAD)
+        
+        Pausenbeginn und -ende sind Frame-Grenzen auf der Sample-Uhr, die Dauer
+        hängt also weder vom Analyse-Takt noch von Verarbeitungsverzögerungen ab.
         
         Returns:
             Dict mit Pause-Informationen
         """
         try:
-            # Audio für VAD vorbereiten (16kHz, 16-bit PCM)
-            audio_int16 = (audio_data * 32767).astype(np.int16)
-            
-            # VAD auf 30ms Frames anwenden
-            frame_duration = 30  # ms
-            frame_size = int(self.sample_rate * frame_duration / 1000)
+            current_pause_duration = 0.0
             
-            speech_detected = False
+            if self.vad is not None:
+                self.vad_events.extend(self.vad.process(audio_data))
+                self.vad_position = self.vad.processed_samples
             
-            # Frames analysieren
-            for i in range(0, len(audio_int16) - frame_size, frame_size):
-                frame = audio_int16[i:i + frame_size].tobytes()
-                
-                if len(frame) == frame_size * 2:  # 16-bit = 2 bytes per sample
-                    if self.vad.is_speech(frame, self.sample_rate):
-                        speech_detected = True
-                        break
+            while self.vad_events:
+                event = self.vad_events.popleft()
+                if event.kind == 'speech_start':
+                    # Sprache erkannt - Pause beenden
+                    if self.silence_start is not None:
+                        pause_duration = (event.sample - self.silence_start) / self.sample_rate
+                        if pause_duration >= self.min_pause_duration:
+                            current_pause_duration = pause_duration
+                            self.timeline.add_pause(self.sample_offset + self.silence_start,
+                                                    self.sample_offset + event.sample)
+                            self.pause_detected.emit(pause_duration)
+                        self.silence_start = None
+                    self.last_speech_time = timestamp
+                else:
+                    # Keine Sprache mehr - Pause beginnt am ersten stillen Frame
+                    self.silence_start = event.sample
             
-            current_pause_duration = 0.0
-            
-            if speech_detected:
-                # Sprache erkannt - Pause beenden
-                if self.silence_start is not None:
-                    pause_duration = (timestamp - self.silence_start).total_seconds()
-                    if pause_duration >= self.min_pause_duration:
-                        current_pause_duration = pause_duration
-                        self.pause_detected.emit(pause_duration)
-                    self.silence_start = None
-                
-                self.last_speech_time = timestamp
-                
-            else:
-                # Keine Sprache - Pause beginnen/fortsetzen
-                if self.silence_start is None:
-                    self.silence_start = timestamp
-                elif self.last_speech_time is not None:
-                    current_pause_duration = (timestamp - self.silence_start).total_seconds()
+            # Laufende Pause
+            if not current_pause_duration and self.silence_start is not None:
+                current_pause_duration = max(0, self.vad_position - self.silence_start) / self.sample_rate
             
             return {
                 'pause_duration': current_pause_duration,
-                'speech_rate': self.current_markers.get('tempo', {}).get('speech_rate', 0.0)
+                'speech_rate': self.speech_rate
             }
             
         except Exception as e:
             print(f"Fehler bei Pausen-Analyse: {e}")
             return {'pause_duration': 0.0, 'speech_rate': 0.0}
     
-    def _analyze_prosody(self, audio_segment: np.ndarray) -> Dict:
+    def _analyze_prosody(self, features: FrameFeatures) -> Dict:
         """
         Prosodische Features: Pitch und Energy
         
@@ -340,29 +554,14 @@ class MarkerSystem(QObject):
             Dict mit prosodischen Features
         """
         try:
-            # Pitch-Extraktion mit librosa
-            pitches, magnitudes = librosa.piptrack(
-                y=audio_segment, 
-                sr=self.sample_rate,
-                threshold=0.1,
-                fmin=80,   # Minimum F0 für Sprache
-                fmax=400   # Maximum F0 für Sprache
-            )
+            # Pitch aus dem YIN-Tracker des Front-Ends (nur stimmhafte Frames)
+            pitch_values = features.f0[features.f0 > 0]
             
-            # Pitch-Werte extrahieren
-            pitch_values = []
-            for t in range(pitches.shape[1]):
-                index = magnitudes[:, t].argmax()
-                pitch = pitches[index, t]
-                if pitch > 0:
-                    pitch_values.append(pitch)
-            
-            # Energy (RMS)
-            rms_frames = librosa.feature.rms(y=audio_segment, frame_length=512, hop_length=256)[0]
-            energy_values = rms_frames[rms_frames > 0]
+            # Energy (RMS je Frame aus dem Front-End)
+            energy_values = features.rms[features.rms > 0]
             
             # Statistiken berechnen
-            pitch_mean = np.mean(pitch_values) if pitch_values else 0.0
+            pitch_mean = np.mean(pitch_values) if len(pitch_values) > 0 else 0.0
             pitch_var = np.var(pitch_values) if len(pitch_values) > 1 else 0.0
             energy_mean = np.mean(energy_values) if len(energy_values) > 0 else 0.0
             energy_var = np.var(energy_values) if len(energy_values) > 1 else 0.0
@@ -383,9 +582,6 @@ class MarkerSystem(QObject):
                 'energy_var': float(energy_var)
             }
             
-            # Signal senden
-            self.prosody_updated.emit(prosody_data)
-            
             return prosody_data
             
         except Exception as e:
@@ -398,8 +594,11 @@ class MarkerSystem(QObject):
             }
     
     def get_current_markers(self) -> Dict:
-        """Aktuelle Marker abrufen"""
-        return self.current_markers.copy()
+        """Aktuelle Marker als veränderbare Kopie abrufen"""
+        return {
+            key: dict(value) if isinstance(value, Mapping) else value
+            for key, value in self._snapshot.items()
+        }
     
     def get_emotion_summary(self) -> Dict:
         """Zusammenfassung der Emotionen über Zeit"""
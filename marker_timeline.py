@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Spaltenorientierte Marker-Zeitleiste
+Alle Marker einer Sitzung in voller Auflösung, in typisierten NumPy-Chunks
+mit inkrementellem Schreiben auf die Festplatte
+"""
+
+import os
+import glob
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from marker_rollups import RollupPyramid, RollupStats
+
+# Emotionskategorien des MarkerSystem (Index = gespeicherter Code)
+EMOTIONS = ('neutral', 'happy', 'calm', 'excited', 'sad', 'angry', 'anxious')
+
+MARKER_DTYPE = np.dtype([
+    ('sample', np.int64),        # Sample-Uhr am Ende des Analysefensters
+    ('valence', np.float32),
+    ('confidence', np.float32),
+    ('pitch', np.float32),       # Hz, 0 = stimmlos
+    ('energy', np.float32),      # RMS
+    ('pause', np.float32),       # laufende Pause in Sekunden
+    ('emotion', np.uint8),       # Index in EMOTIONS
+])
+
+PAUSE_DTYPE = np.dtype([
+    ('start', np.int64),         # erstes stilles Sample
+    ('end', np.int64),           # erstes Sprach-Sample danach
+])
+
+SPEAKER_DTYPE = np.dtype([
+    ('start', np.int64),         # Sprecherfenster [start, end) auf der Sample-Uhr
+    ('end', np.int64),
+    ('speaker', np.int16),       # Sprecher-ID (-1 = unbekannt)
+    ('confidence', np.float32),
+])
+
+
+class ChunkedTable:
+    """
+    Append-only Tabelle aus vorallokierten Chunks fester Größe
+
+    append() schreibt in den aktuellen Chunk (amortisiert O(1)); volle Chunks
+    werden nie mehr verändert und können einzeln auf die Festplatte geschrieben
+    werden.
+    """
+
+    def __init__(self, dtype: np.dtype, chunk_size: int = 4096):
+        self.dtype = dtype
+        self.chunk_size = int(chunk_size)
+        self.chunks: List[np.ndarray] = []
+        self.length = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def clear(self):
+        self.chunks = []
+        self.length = 0
+
+    def append(self, row: tuple) -> bool:
+        """Zeile anhängen; True wenn damit ein Chunk voll geworden ist"""
+        index = self.length % self.chunk_size
+        if index == 0:
+            self.chunks.append(np.zeros(self.chunk_size, dtype=self.dtype))
+        self.chunks[-1][index] = row
+        self.length += 1
+        return index == self.chunk_size - 1
+
+    def chunk_rows(self, chunk_index: int) -> np.ndarray:
+        """Belegte Zeilen eines Chunks (View)"""
+        filled = min(self.chunk_size, self.length - chunk_index * self.chunk_size)
+        return self.chunks[chunk_index][:filled]
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Zeilen [start, stop) als zusammenhängende Kopie"""
+        stop = self.length if stop is None else min(stop, self.length)
+        start = max(0, start)
+        if stop <= start:
+            return np.zeros(0, dtype=self.dtype)
+
+        first, last = start // self.chunk_size, (stop - 1) // self.chunk_size
+        parts = [self.chunk_rows(i) for i in range(first, last + 1)]
+        data = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        offset = first * self.chunk_size
+        return data[start - offset:stop - offset].copy()
+
+    def extend(self, rows: np.ndarray):
+        """Viele Zeilen chunkweise anhängen (z.B. beim Laden)"""
+        position = 0
+        while position < len(rows):
+            index = self.length % self.chunk_size
+            if index == 0:
+                self.chunks.append(np.zeros(self.chunk_size, dtype=self.dtype))
+            n = min(self.chunk_size - index, len(rows) - position)
+            self.chunks[-1][index:index + n] = rows[position:position + n]
+            self.length += n
+            position += n
+
+
+class MarkerTimeline:
+    """
+    Marker-Zeitleiste einer Sitzung (einzige Datenquelle für Plots, Zusammenfassungen und Exporte)
+
+    Eine Zeile pro Marker-Analyse (Standard 4 Hz) plus eine Tabelle der
+    abgeschlossenen Pausen. Eine Stunde belegt etwa 0,4 MB. Ist ein
+    Speicherverzeichnis gesetzt, wird jeder volle Chunk sofort als .npy
+    geschrieben; flush() schreibt zusätzlich den angefangenen Chunk.
+    Jede Zeile fließt zusätzlich in eine RollupPyramid, aus der stats()
+    Kennzahlen beliebiger Zeitbereiche liest. Eine dritte Tabelle hält die
+    Sprecherfenster; Marker-Frames und Transkript-Segmente bekommen ihren
+    Sprecher per Intervall-Join über die Sample-Zeit.
+    """
+
+    def __init__(self, sample_rate: int = 16000, chunk_size: int = 4096,
+                 storage_dir: Optional[str] = None):
+        self.sample_rate = sample_rate
+        self.markers = ChunkedTable(MARKER_DTYPE, chunk_size)
+        self.pauses = ChunkedTable(PAUSE_DTYPE, chunk_size)
+        self.speakers = ChunkedTable(SPEAKER_DTYPE, chunk_size)
+        self.rollups = RollupPyramid(sample_rate)
+        self.storage_dir = None
+        self._lock = threading.Lock()
+        if storage_dir:
+            self.set_storage(storage_dir)
+
+    def __len__(self) -> int:
+        return len(self.markers)
+
+    def _tables(self):
+        return (('markers', self.markers), ('pauses', self.pauses), ('speakers', self.speakers))
+
+    # ---------------------------------------------------------------- Schreiben
+
+    def append(self, sample: int, valence: float, confidence: float, pitch: float,
+               energy: float, pause: float, emotion: str = 'neutral'):
+        """Eine Marker-Zeile anhängen"""
+        code = EMOTIONS.index(emotion) if emotion in EMOTIONS else 0
+        with self._lock:
+            full = self.markers.append((sample, valence, confidence, pitch, energy, pause, code))
+            self.rollups.update(sample, valence, pitch, energy)
+            if full and self.storage_dir:
+                self._write_chunk('markers', self.markers, len(self.markers.chunks) - 1)
+
+    def append_markers(self, markers) -> None:
+        """Zeile aus einem MarkerSystem-Snapshot (affect/tempo/prosody) anhängen"""
+        self.append(
+            markers['sample'],
+            markers['affect']['valence'],
+            markers['affect']['confidence'],
+            markers['prosody']['pitch_mean'],
+            markers['prosody']['energy_mean'],
+            markers['tempo']['pause_duration'],
+            markers['affect']['emotion']
+        )
+
+    def add_pause(self, start_sample: int, end_sample: int):
+        """Abgeschlossene Pause [start, end) auf der Sample-Uhr speichern"""
+        with self._lock:
+            full = self.pauses.append((start_sample, end_sample))
+            if full and self.storage_dir:
+                self._write_chunk('pauses', self.pauses, len(self.pauses.chunks) - 1)
+
+    def add_speaker(self, start_sample: int, end_sample: int, speaker_id: int, confidence: float):
+        """Sprecherfenster [start, end) speichern (Fenster kommen in Startreihenfolge)"""
+        with self._lock:
+            full = self.speakers.append((start_sample, end_sample, speaker_id, confidence))
+            if full and self.storage_dir:
+                self._write_chunk('speakers', self.speakers, len(self.speakers.chunks) - 1)
+
+    def relabel_speakers(self, starts: np.ndarray, speakers: np.ndarray) -> int:
+        """
+        Sprecher-IDs von Fenstern nachträglich ersetzen (z.B. nach dem Nachclustering)
+
+        Fenster werden über ihren Start gefunden; betroffene Chunks werden,
+        falls ein Speicherverzeichnis gesetzt ist, neu geschrieben.
+
+        Returns:
+            Anzahl geänderter Fenster
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        speakers = np.asarray(speakers)
+        if len(starts) == 0:
+            return 0
+        order = np.argsort(starts, kind='stable')
+        starts, speakers = starts[order], speakers[order]
+
+        changed = 0
+        with self._lock:
+            for index in range(len(self.speakers.chunks)):
+                rows = self.speakers.chunk_rows(index)
+                position = np.minimum(np.searchsorted(starts, rows['start']), len(starts) - 1)
+                found = starts[position] == rows['start']
+                update = found & (rows['speaker'] != speakers[position])
+                if np.any(update):
+                    rows['speaker'][update] = speakers[position][update]
+                    changed += int(np.count_nonzero(update))
+                    if self.storage_dir:
+                        self._write_chunk('speakers', self.speakers, index)
+        return changed
+
+    def extend(self, rows: np.ndarray, pauses: Optional[np.ndarray] = None):
+        """Viele Marker-Zeilen (MARKER_DTYPE) und Pausen (PAUSE_DTYPE) auf einmal anhängen"""
+        with self._lock:
+            for name, table, data in (('markers', self.markers, rows), ('pauses', self.pauses, pauses)):
+                if data is None or len(data) == 0:
+                    continue
+                full_before = len(table) // table.chunk_size
+                table.extend(np.asarray(data, dtype=table.dtype))
+                if self.storage_dir:
+                    for index in range(full_before, len(table) // table.chunk_size):
+                        self._write_chunk(name, table, index)
+            if len(rows):
+                self.rollups.add_rows(rows['sample'], rows['valence'], rows['pitch'], rows['energy'])
+
+    def clear(self):
+        """Speicher leeren (bereits geschriebene Dateien bleiben unangetastet)"""
+        with self._lock:
+            for _, table in self._tables():
+                table.clear()
+            self.rollups.clear()
+
+    # ------------------------------------------------------------------ Lesen
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        with self._lock:
+            return self.markers.rows(start, stop)
+
+    def tail(self, n: int) -> np.ndarray:
+        """Die letzten n Marker-Zeilen"""
+        with self._lock:
+            return self.markers.rows(len(self.markers) - n)
+
+    def pause_rows(self) -> np.ndarray:
+        with self._lock:
+            return self.pauses.rows()
+
+    def speaker_rows(self) -> np.ndarray:
+        with self._lock:
+            return self.speakers.rows()
+
+    @property
+    def end_sample(self) -> int:
+        """Sample-Position hinter der letzten Zeile aller Tabellen (Anschluss für die nächste Aufnahme)"""
+        with self._lock:
+            ends = [self.rollups.last_sample]
+            for table, column in ((self.pauses, 'end'), (self.speakers, 'end')):
+                if len(table):
+                    ends.append(int(table.rows(len(table) - 1)[column][0]))
+            return max(ends)
+
+    @property
+    def speakers_until(self) -> int:
+        """Sample-Position, bis zu der Sprecherfenster vorliegen"""
+        with self._lock:
+            if not len(self.speakers):
+                return 0
+            return int(self.speakers.rows(len(self.speakers) - 1)['end'][0])
+
+    def speaker_at(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Sprecher je Zeitpunkt (z.B. Marker-Frames), vektorisiert
+
+        Bei überlappenden Fenstern zählt das Fenster mit der nächstgelegenen
+        Mitte; Zeitpunkte außerhalb aller Fenster bekommen -1.
+        """
+        samples = np.atleast_1d(np.asarray(samples, dtype=np.int64))
+        windows = self.speaker_rows()
+        if len(windows) == 0:
+            return np.full(len(samples), -1, dtype=np.int16)
+
+        centers = (windows['start'] + windows['end']) // 2
+        right = np.clip(np.searchsorted(centers, samples), 0, len(windows) - 1)
+        left = np.maximum(right - 1, 0)
+        nearest = np.where(np.abs(samples - centers[left]) <= np.abs(centers[right] - samples), left, right)
+        inside = (windows['start'][nearest] <= samples) & (samples < windows['end'][nearest])
+        return np.where(inside, windows['speaker'][nearest], -1).astype(np.int16)
+
+    def speaker_for_interval(self, start_sample: int, end_sample: int) -> Tuple[int, float]:
+        """
+        Sprecher eines Intervalls (z.B. Transkript-Segment) per Intervall-Join
+
+        Returns:
+            (speaker_id, Anteil) - Sprecher mit der größten konfidenzgewichteten
+            Überlappung und sein Anteil daran; (-1, 0.0) ohne Überlappung
+        """
+        windows = self.speaker_rows()
+        if len(windows) == 0 or end_sample <= start_sample:
+            return -1, 0.0
+
+        # Fenster kommen in Startreihenfolge, ihre Enden steigen ebenfalls
+        first = np.searchsorted(windows['end'], start_sample, side='right')
+        last = np.searchsorted(windows['start'], end_sample, side='left')
+        candidates = windows[first:last]
+        overlap = np.minimum(candidates['end'], end_sample) - np.maximum(candidates['start'], start_sample)
+        valid = (overlap > 0) & (candidates['speaker'] >= 0)
+        if not np.any(valid):
+            return -1, 0.0
+
+        speakers = candidates['speaker'][valid].astype(np.int64)
+        weights = overlap[valid] * np.maximum(candidates['confidence'][valid], 1e-3)
+        totals = np.bincount(speakers, weights=weights)
+        best = int(np.argmax(totals))
+        return best, float(totals[best] / totals.sum())
+
+    def column(self, name: str) -> np.ndarray:
+        return self.rows()[name]
+
+    def times(self, rows: np.ndarray) -> np.ndarray:
+        """Sample-Spalte in Sekunden"""
+        return rows['sample'] / self.sample_rate
+
+    def pause_durations(self) -> np.ndarray:
+        pauses = self.pause_rows()
+        return (pauses['end'] - pauses['start']) / self.sample_rate
+
+    @property
+    def duration(self) -> float:
+        """Sekunden bis zur letzten Marker-Zeile"""
+        return self.rollups.last_sample / self.sample_rate
+
+    def stats(self, start_seconds: float = 0.0, end_seconds: Optional[float] = None) -> Dict[str, RollupStats]:
+        """Kennzahlen (valence, pitch, energy, positive, negative) eines Zeitbereichs aus den Rollups"""
+        end_sample = None if end_seconds is None else int(end_seconds * self.sample_rate)
+        with self._lock:
+            return self.rollups.summarize(int(start_seconds * self.sample_rate), end_sample)
+
+    def stats_series(self, level_seconds: float, field: str) -> Dict[str, np.ndarray]:
+        """Verlauf einer Größe in Buckets einer Rollup-Stufe (10, 60, 300, ... Sekunden)"""
+        with self._lock:
+            return self.rollups.series(level_seconds, field)
+
+    def emotion_names(self, rows: np.ndarray) -> List[str]:
+        return [EMOTIONS[code] for code in rows['emotion']]
+
+    # ------------------------------------------------------------ Persistenz
+
+    def set_storage(self, directory: str):
+        """Speicherverzeichnis setzen und bereits volle Chunks nachschreiben"""
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self.storage_dir = directory
+            for name, table in self._tables():
+                for index in range(len(table) // table.chunk_size):
+                    self._write_chunk(name, table, index)
+
+    def _write_chunk(self, name: str, table: ChunkedTable, index: int):
+        path = os.path.join(self.storage_dir, f"{name}_{index:05d}.npy")
+        np.save(path, table.chunk_rows(index))
+
+    def flush(self):
+        """Angefangene Chunks schreiben (volle Chunks liegen bereits auf der Platte)"""
+        if not self.storage_dir:
+            return
+        with self._lock:
+            for name, table in self._tables():
+                if len(table) % table.chunk_size:
+                    self._write_chunk(name, table, len(table.chunks) - 1)
+
+    @classmethod
+    def load(cls, directory: str, sample_rate: int = 16000, chunk_size: int = 4096) -> 'MarkerTimeline':
+        """Zeitleiste aus einem Speicherverzeichnis laden"""
+        timeline = cls(sample_rate=sample_rate, chunk_size=chunk_size)
+        for name, table in timeline._tables():
+            for path in sorted(glob.glob(os.path.join(directory, f"{name}_*.npy"))):
+                table.extend(np.load(path))
+        rows = timeline.markers.rows()
+        timeline.rollups.add_rows(rows['sample'], rows['valence'], rows['pitch'], rows['energy'])
+        timeline.storage_dir = directory
+        return timeline
+
+    @classmethod
+    def from_legacy(cls, markers_data: Dict, sample_rate: int = 16000,
+                    hop_seconds: float = 0.25) -> 'MarkerTimeline':
+        """Alte Sitzungen (Listen in markers_data, ohne Sample-Zeit) übernehmen"""
+        timeline = cls(sample_rate=sample_rate)
+        emotions = list(markers_data.get('emotions', []))
+        pitch = list(markers_data.get('pitch', []))
+        energy = list(markers_data.get('energy', []))
+        hop = int(hop_seconds * sample_rate)
+
+        for i in range(max(len(emotions), len(pitch), len(energy))):
+            timeline.append(
+                (i + 1) * hop,
+                emotions[i] if i < len(emotions) else 0.0, 0.0,
+                pitch[i] if i < len(pitch) else 0.0,
+                energy[i] if i < len(energy) else 0.0,
+                0.0
+            )
+
+        position = 0
+        for duration in markers_data.get('pauses', []):
+            length = int(float(duration) * sample_rate)
+            timeline.add_pause(position, position + length)
+            position += length
+        return timeline
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Offline-Marker-Extraktion für ganze Aufnahmen
+Wenige große vektorisierte Durchläufe (Framing, STFT, F0, VAD, Klassifikation)
+statt zehntausender process_audio_chunk-Aufrufe; Ergebnis ist eine MarkerTimeline
+im selben Format wie im Live-Betrieb.
+
+Aufruf:
+    python offline_markers.py aufnahme.wav [--out sessions/session_x_markers]
+"""
+
+import argparse
+import time
+import numpy as np
+from typing import Dict, Optional, Tuple
+from numpy.lib.stride_tricks import sliding_window_view
+
+import dsp
+from feature_frontend import spectral_frame_features
+from pitch_tracker import yin_frames
+from vad_stream import StreamingVAD
+from marker_timeline import EMOTIONS, MARKER_DTYPE, PAUSE_DTYPE, MarkerTimeline
+
+try:
+    import soundfile as sf
+    SOUNDFILE_AVAILABLE = True
+except ImportError:
+    SOUNDFILE_AVAILABLE = False
+
+
+def load_audio(path: str, sample_rate: int = 16000) -> np.ndarray:
+    """Audiodatei als float32-Mono laden und bei Bedarf auf sample_rate umrechnen"""
+    if SOUNDFILE_AVAILABLE:
+        audio, file_rate = sf.read(path, dtype='float32', always_2d=True)
+        audio = audio.mean(axis=1)
+    else:
+        import wave
+        with wave.open(path, 'rb') as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError("Ohne soundfile werden nur 16-Bit-WAV-Dateien unterstützt")
+            file_rate = wav.getframerate()
+            pcm = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+            audio = pcm.reshape(-1, wav.getnchannels()).mean(axis=1) / 32768.0
+
+    if file_rate != sample_rate:
+        from scipy.signal import resample_poly
+        divisor = np.gcd(int(file_rate), int(sample_rate))
+        audio = resample_poly(audio, sample_rate // divisor, file_rate // divisor)
+    return np.ascontiguousarray(audio, dtype=np.float32)
+
+
+def _window_mean(values: np.ndarray, last: np.ndarray, length: int,
+                 valid: Optional[np.ndarray] = None) -> np.ndarray:
+    """Mittelwert über die Frames [last - length + 1, last] per kumulierter Summe (0.0 ohne gültige Frames)"""
+    values = values.astype(np.float64)
+    weights = np.ones_like(values) if valid is None else valid.astype(np.float64)
+    first = np.maximum(last - length + 1, 0)
+
+    def windowed(x):
+        cumulative = np.concatenate([[0.0], np.cumsum(x)])
+        return cumulative[last + 1] - cumulative[first]
+
+    count = windowed(weights)
+    safe = np.maximum(count, 1)
+    return np.where(count > 0, windowed(values * weights) / safe, 0.0)
+
+
+class OfflineMarkerExtractor:
+    """
+    Batch-Variante des MarkerSystem
+
+    Verwendet dieselben Rechenvorschriften wie der Live-Betrieb (Front-End-
+    Features, YIN, Streaming-VAD, Emotionsregeln und -glättung), berechnet sie
+    aber für die ganze Aufnahme auf einmal. Die Analysezeitpunkte liegen wie im
+    Live-Betrieb bei window + k * hop Samples; Fenster-Statistiken entstehen
+    aus kumulierten Summen über die Frame-Reihen. Pausengrenzen kommen
+    frame-genau aus dem VAD, ohne die Hysterese-Latenz des Live-Betriebs.
+    """
+
+    def __init__(self, sample_rate: int = 16000, analysis_hop: float = 0.25,
+                 analysis_window: float = 1.0, n_fft: int = 512, hop_length: int = 256,
+                 pitch_frame_length: int = 1024, fmin: float = 80.0, fmax: float = 400.0,
+                 roll_percent: float = 0.85, vad_backend: str = "webrtc",
+                 min_pause_duration: float = 0.6, emotion_window_size: int = 5,
+                 block_frames: int = 8192):
+        self.sample_rate = sample_rate
+        self.window_size = int(sample_rate * analysis_window)
+        self.hop_size = max(1, int(sample_rate * analysis_hop))
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.pitch_frame_length = pitch_frame_length
+        self.fmin = fmin
+        self.fmax = fmax
+        self.roll_percent = roll_percent
+        self.vad_backend = vad_backend
+        self.min_pause_duration = min_pause_duration
+        self.emotion_window_size = emotion_window_size
+        self.block_frames = int(block_frames)  # begrenzt den Speicher der Frame-Matrizen
+
+        # Wie im MarkerSystem: Analysefenster = so viele STFT-Frames wie in window_size passen
+        self.window_frames = 1 + (self.window_size - n_fft) // hop_length
+        self.pitch_offset = (n_fft - pitch_frame_length) // 2  # wie FeatureFrontEnd: gleiche Frame-Mitten
+        self.window = dsp.hann_window(n_fft)
+        self.freqs = dsp.rfftfreq(n_fft, sample_rate).astype(np.float32)
+
+    # ---------------------------------------------------------- Durchläufe
+
+    def frame_features(self, audio: np.ndarray) -> Dict[str, np.ndarray]:
+        """Durchlauf 1-3: Framing, STFT-Features und F0 für alle Frames der Aufnahme"""
+        n_frames = max(0, 1 + (len(audio) - self.n_fft) // self.hop_length)
+        # F0-Frames wie im FeatureFrontEnd auf die STFT-Frame-Mitten ausgerichtet (vorne Stille)
+        if self.pitch_offset < 0:
+            pitch_audio = np.concatenate([np.zeros(-self.pitch_offset, dtype=np.float32), audio])
+        else:
+            pitch_audio = audio[self.pitch_offset:]
+        n_pitch = max(0, 1 + (len(pitch_audio) - self.pitch_frame_length) // self.hop_length)
+        result = {name: np.zeros(n_frames, dtype=np.float32) for name in ('rms', 'zcr', 'centroid', 'rolloff')}
+        result['f0'] = np.zeros(n_pitch, dtype=np.float32)
+
+        stft_frames = sliding_window_view(audio, self.n_fft)[::self.hop_length] if n_frames else None
+        pitch_frames = sliding_window_view(pitch_audio, self.pitch_frame_length)[::self.hop_length] if n_pitch else None
+        scratch = np.empty((self.block_frames, self.n_fft), dtype=np.float32)
+
+        for start in range(0, n_frames, self.block_frames):
+            block = slice(start, min(start + self.block_frames, n_frames))
+            _, rms, zcr, centroid, rolloff = spectral_frame_features(
+                stft_frames[block], self.window, self.freqs, self.roll_percent, scratch
+            )
+            result['rms'][block], result['zcr'][block] = rms, zcr
+            result['centroid'][block], result['rolloff'][block] = centroid, rolloff
+
+        for start in range(0, n_pitch, self.block_frames):
+            block = slice(start, min(start + self.block_frames, n_pitch))
+            result['f0'][block], _ = yin_frames(pitch_frames[block], self.sample_rate, self.fmin, self.fmax)
+
+        return result
+
+    def silence_intervals(self, audio: np.ndarray) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Durchlauf 4: VAD über die ganze Aufnahme
+
+        Returns:
+            (starts, ends, frame_size) - Pausen [start, end) auf der Sample-Uhr,
+            eine offene Pause am Ende hat kein Ende (int64-Maximum)
+        """
+        vad = StreamingVAD(sample_rate=self.sample_rate, backend=self.vad_backend)
+        events = []
+        for start in range(0, len(audio), 60 * self.sample_rate):
+            events.extend(vad.process(audio[start:start + 60 * self.sample_rate]))
+
+        # Wie im MarkerSystem beginnt die Aufnahme in einer Pause (silence_start = 0)
+        starts, ends, silence_start = [], [], 0
+        for event in events:
+            if event.kind == 'speech_start' and silence_start is not None:
+                starts.append(silence_start)
+                ends.append(event.sample)
+                silence_start = None
+            elif event.kind == 'speech_end':
+                silence_start = event.sample
+        if silence_start is not None:
+            starts.append(silence_start)
+            ends.append(np.iinfo(np.int64).max)
+        return np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64), vad.frame_size
+
+    def classify(self, rms: np.ndarray, zcr: np.ndarray, centroid: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """Durchlauf 5: Regeln von MarkerSystem._classify_emotion_simple, vektorisiert"""
+        energy_level = np.minimum(rms * 100, 1.0)
+        activity_level = np.minimum(zcr * 10, 1.0)
+        brightness = np.minimum(centroid / 4000, 1.0)
+
+        loud_active = (energy_level > 0.85) & (activity_level > 0.8)
+        quiet = energy_level < 0.3
+        conditions = [
+            loud_active & (brightness > 0.7),
+            loud_active,
+            quiet & (activity_level < 0.3),
+            quiet,
+            (brightness > 0.7) & (energy_level > 0.4),
+            activity_level > 0.7,
+        ]
+        names = ['excited', 'angry', 'sad', 'calm', 'happy', 'anxious']
+        codes = np.select(conditions, [EMOTIONS.index(n) for n in names], EMOTIONS.index('neutral'))
+        valence = np.select(conditions, [0.8, -0.6, -0.7, 0.3, 0.9, -0.4], 0.0)
+        confidence = np.minimum((energy_level + activity_level + brightness) / 3 * 1.5, 1.0)
+        return codes.astype(np.uint8), confidence, valence
+
+    def smooth(self, codes: np.ndarray, confidence: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Gewichtete Mehrheitsglättung wie MarkerSystem._smooth_emotion, für alle Zeilen zugleich"""
+        n, size = len(codes), self.emotion_window_size
+        if n == 0:
+            return codes, confidence
+
+        # Historie je Zeile als (n, size)-Matrix; fehlende Einträge am Anfang haben Gewicht 0
+        padded_codes = np.concatenate([np.zeros(size - 1, dtype=codes.dtype), codes])
+        padded_conf = np.concatenate([np.zeros(size - 1), confidence])
+        history_codes = sliding_window_view(padded_codes, size)
+        history_conf = sliding_window_view(padded_conf, size)
+
+        lengths = np.minimum(np.arange(n) + 1, size)
+        weights = np.zeros((size, size))   # Zeile L-1: linspace(0.5, 1, L) rechtsbündig
+        for length in range(1, size + 1):
+            weights[length - 1, size - length:] = np.linspace(0.5, 1.0, length)
+        scores = weights[lengths - 1] * history_conf
+
+        totals = np.zeros((n, len(EMOTIONS)))
+        for code in range(len(EMOTIONS)):
+            totals[:, code] = np.sum(np.where(history_codes == code, scores, 0.0), axis=1)
+        best = np.argmax(totals, axis=1)
+        smoothed_conf = np.minimum(totals[np.arange(n), best] / lengths, 1.0)
+        return best.astype(np.uint8), smoothed_conf
+
+    # ------------------------------------------------------------------- API
+
+    def extract(self, audio: np.ndarray, timeline: Optional[MarkerTimeline] = None) -> MarkerTimeline:
+        """Alle Marker einer Aufnahme berechnen und (in einem Block) an die Zeitleiste anhängen"""
+        audio = np.ascontiguousarray(np.asarray(audio, dtype=np.float32).ravel())
+        timeline = timeline if timeline is not None else MarkerTimeline(sample_rate=self.sample_rate)
+        if len(audio) < max(self.window_size, self.n_fft):
+            return timeline
+
+        features = self.frame_features(audio)
+
+        # Analysezeitpunkte wie im Live-Betrieb und das jeweils letzte Frame im Fenster
+        ends = np.arange(self.window_size, len(audio) + 1, self.hop_size, dtype=np.int64)
+        # Wie im Live-Betrieb endet das Fenster am neuesten Frame mit STFT und F0
+        last = np.minimum((ends - self.n_fft) // self.hop_length,
+                          (ends - self.pitch_offset - self.pitch_frame_length) // self.hop_length)
+
+        # Fenster-Statistiken (Affect-Features und Prosodie)
+        rms_sq = _window_mean(np.square(features['rms']), last, self.window_frames)
+        zcr = _window_mean(features['zcr'], last, self.window_frames)
+        centroid = _window_mean(features['centroid'], last, self.window_frames)
+        energy = _window_mean(features['rms'], last, self.window_frames, features['rms'] > 0)
+
+        pitch = np.zeros(len(ends))
+        has_pitch = last >= 0
+        if np.any(has_pitch):
+            pitch[has_pitch] = _window_mean(features['f0'], last[has_pitch],
+                                           self.window_frames, features['f0'] > 0)
+
+        raw_codes, raw_conf, valence = self.classify(np.sqrt(rms_sq), zcr, centroid)
+        codes, confidence = self.smooth(raw_codes, raw_conf)
+
+        # Pausen: abgeschlossene Pausen >= Mindestdauer in die Tabelle, laufende Pause je Zeile
+        starts, stops, frame_size = self.silence_intervals(audio)
+        durations = (stops - starts) / self.sample_rate
+        relevant = (durations >= self.min_pause_duration) & (stops <= len(audio))
+
+        position = (ends // frame_size) * frame_size
+        index = np.searchsorted(starts, position, side='right') - 1
+        in_silence = (index >= 0) & (position < stops[np.maximum(index, 0)]) if len(starts) else np.zeros(len(ends), bool)
+        running = np.where(in_silence, (position - starts[np.maximum(index, 0)]) / self.sample_rate, 0.0) \
+            if len(starts) else np.zeros(len(ends))
+
+        pause = running
+        if np.any(relevant):
+            pause_ends, pause_durations = stops[relevant], durations[relevant]
+            completed = np.searchsorted(pause_ends, ends, side='right') - 1
+            just_ended = (completed >= 0) & (pause_ends[np.maximum(completed, 0)] > ends - self.hop_size)
+            pause = np.where(just_ended, pause_durations[np.maximum(completed, 0)], running)
+
+        rows = np.zeros(len(ends), dtype=MARKER_DTYPE)
+        rows['sample'] = ends
+        rows['valence'] = valence
+        rows['confidence'] = confidence
+        rows['pitch'] = pitch
+        rows['energy'] = energy
+        rows['pause'] = pause
+        rows['emotion'] = codes
+
+        pauses = np.zeros(int(np.count_nonzero(relevant)), dtype=PAUSE_DTYPE)
+        pauses['start'], pauses['end'] = starts[relevant], stops[relevant]
+
+        timeline.extend(rows, pauses)
+        return timeline
+
+    def extract_file(self, path: str, timeline: Optional[MarkerTimeline] = None) -> MarkerTimeline:
+        return self.extract(load_audio(path, self.sample_rate), timeline)
+
+
+def extract_markers(audio: np.ndarray, sample_rate: int = 16000, **kwargs) -> MarkerTimeline:
+    """Kurzform: Marker-Zeitleiste einer ganzen Aufnahme (Array) berechnen"""
+    return OfflineMarkerExtractor(sample_rate=sample_rate, **kwargs).extract(audio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="Audiodatei (WAV/FLAC/...)")
+    parser.add_argument("--out", help="Zielverzeichnis für die Marker-Zeitleiste (.npy-Chunks)")
+    args = parser.parse_args()
+
+    extractor = OfflineMarkerExtractor()
+    audio = load_audio(args.path, extractor.sample_rate)
+    start = time.perf_counter()
+    timeline = extractor.extract(audio, MarkerTimeline(storage_dir=args.out) if args.out else None)
+    elapsed = time.perf_counter() - start
+    timeline.flush()
+
+    duration = len(audio) / extractor.sample_rate
+    print(f"📊 {len(timeline)} Marker-Zeilen, {len(timeline.pause_rows())} Pausen aus {duration:.0f} s Audio")
+    print(f"⏱️ {elapsed:.2f} s Rechenzeit ({duration / max(elapsed, 1e-9):.0f}x Echtzeit)")
+
+
+if __name__ == "__main__":
+    main()
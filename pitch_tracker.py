@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Vektorisierter F0-Tracker (YIN)
+Grundfrequenz und Stimmhaftigkeit pro Frame, in NumPy über alle Frames gleichzeitig
+"""
+
+import numpy as np
+from typing import Tuple
+from numpy.lib.stride_tricks import sliding_window_view
+
+import dsp
+from ring_buffer import AudioRingBuffer
+
+
+def yin_frames(frames: np.ndarray, sample_rate: int, fmin: float = 80.0, fmax: float = 400.0,
+               threshold: float = 0.15) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    YIN-Pitch für einen Stapel Frames (n_frames, frame_length)
+
+    Die Differenzfunktion wird für alle Frames gemeinsam über eine FFT-
+    Kreuzkorrelation berechnet, die Lag-Auswahl ist komplett vektorisiert.
+
+    Returns:
+        (f0, voiced_prob) - f0 in Hz (0.0 für stimmlose Frames), voiced_prob in [0, 1]
+    """
+    frames = np.asarray(frames, dtype=np.float32)
+    n_frames, frame_length = frames.shape
+    win_length = frame_length // 2
+    tau_min = max(1, int(np.floor(sample_rate / fmax)))
+    tau_max = min(win_length, int(np.ceil(sample_rate / fmin)))
+
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+
+    # Kreuzkorrelation Fenster x[0:W] gegen den ganzen Frame: r(tau) = sum_j x[j] x[j+tau].
+    # Zirkulär genügt die Frame-Länge: j + tau < W + tau_max <= frame_length, also kein Umlauf.
+    n_fft = frame_length
+    spectrum_full = dsp.rfft(frames, n_fft, axis=1)
+    spectrum_win = dsp.rfft(frames[:, :win_length], n_fft, axis=1)
+    corr = dsp.irfft(np.conj(spectrum_win) * spectrum_full, n_fft, axis=1)[:, :tau_max + 1]
+
+    # Energien über gleitende Fenster aus kumulierten Quadraten
+    energy = np.concatenate([np.zeros((n_frames, 1), dtype=np.float64),
+                             np.cumsum(np.square(frames, dtype=np.float64), axis=1)], axis=1)
+    taus = np.arange(tau_max + 1)
+    energy_tau = energy[:, taus + win_length] - energy[:, taus]
+    diff = energy_tau[:, :1] + energy_tau - 2.0 * corr
+    diff[:, 0] = 0.0
+    np.maximum(diff, 0.0, out=diff)
+
+    # Kumulativ-mittelwert-normierte Differenz (CMND)
+    cumulative = np.cumsum(diff[:, 1:], axis=1)
+    cmnd = np.ones_like(diff)
+    cmnd[:, 1:] = diff[:, 1:] * taus[1:] / np.maximum(cumulative, 1e-12)
+
+    # Erstes lokales Minimum unter der Schwelle im erlaubten Lag-Bereich
+    search = cmnd[:, tau_min:tau_max]
+    local_min = np.zeros_like(search, dtype=bool)
+    local_min[:, 1:-1] = (search[:, 1:-1] < search[:, :-2]) & (search[:, 1:-1] <= search[:, 2:])
+    candidates = local_min & (search < threshold)
+    voiced = candidates.any(axis=1)
+    best = np.where(voiced, np.argmax(candidates, axis=1), np.argmin(search, axis=1))
+    tau = best + tau_min
+
+    # Parabolische Interpolation um das Minimum
+    rows = np.arange(n_frames)
+    left = cmnd[rows, np.clip(tau - 1, 0, tau_max)]
+    center = cmnd[rows, tau]
+    right = cmnd[rows, np.clip(tau + 1, 0, tau_max)]
+    denom = left - 2 * center + right
+    shift = np.where(np.abs(denom) > 1e-12, 0.5 * (left - right) / np.where(denom == 0, 1, denom), 0.0)
+    refined_tau = tau + np.clip(shift, -1.0, 1.0)
+
+    voiced_prob = np.clip(1.0 - center, 0.0, 1.0).astype(np.float32)
+    f0 = np.where(voiced, sample_rate / refined_tau, 0.0).astype(np.float32)
+    voiced_prob[~voiced] = np.minimum(voiced_prob[~voiced], 0.5)
+
+    return f0, voiced_prob
+
+
+class StreamingPitchTracker:
+    """
+    Inkrementeller YIN-Tracker über einem AudioRingBuffer
+
+    Frame k beginnt bei Sample k * hop_length + frame_offset. Jeder update()-Aufruf
+    rechnet nur die seit dem letzten Aufruf vollständig gewordenen Frames und legt
+    F0 und Stimmhaftigkeit in Frame-Ringen ab. Mit negativem frame_offset lassen
+    sich die Frame-Mitten auf ein kürzeres Raster legen (siehe FeatureFrontEnd);
+    Samples vor dem Stream-Anfang gelten dann als Stille.
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_length: int = 1024, hop_length: int = 256,
+                 fmin: float = 80.0, fmax: float = 400.0, threshold: float = 0.15,
+                 capacity: int = 61, frame_offset: int = 0):
+        self.sample_rate = sample_rate
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self.frame_offset = int(frame_offset)
+        self.fmin = fmin
+        self.fmax = fmax
+        self.threshold = threshold
+        self.capacity = int(capacity)
+
+        self._f0 = np.zeros(self.capacity, dtype=np.float32)
+        self._voiced_prob = np.zeros(self.capacity, dtype=np.float32)
+        self._frame_starts = np.zeros(self.capacity, dtype=np.int64)
+
+        self.next_frame = 0
+        self.frames_computed = 0
+
+    def reset(self):
+        self.next_frame = 0
+        self.frames_computed = 0
+
+    def update(self, ring: AudioRingBuffer) -> int:
+        """Neue vollständige Frames analysieren, gibt deren Anzahl zurück"""
+        last_frame = self.frames_ready(ring.total_written) - 1
+        if last_frame < self.next_frame:
+            return 0
+
+        # Vor dem Stream-Anfang liegt nichts Überschriebenes, nur Stille
+        oldest_sample = ring.total_written - len(ring)
+        oldest_frame = -(-(oldest_sample - self.frame_offset) // self.hop_length) if oldest_sample > 0 else 0
+        first_frame = max(self.next_frame, oldest_frame, last_frame - self.capacity + 1)
+        n_new = last_frame - first_frame + 1
+        if first_frame > self.next_frame:
+            self.frames_computed = 0  # Lücke: ältere Frames gehören nicht mehr ins Fenster
+
+        start = first_frame * self.hop_length + self.frame_offset
+        length = (n_new - 1) * self.hop_length + self.frame_length
+        if start < 0:
+            audio = np.concatenate([np.zeros(-start, dtype=np.float32), ring.read(0, length + start)])
+        else:
+            audio = ring.read(start, length)
+        frames = sliding_window_view(audio, self.frame_length)[::self.hop_length]
+        f0, voiced_prob = yin_frames(frames, self.sample_rate, self.fmin, self.fmax, self.threshold)
+
+        slots = (first_frame + np.arange(n_new)) % self.capacity
+        self._f0[slots] = f0
+        self._voiced_prob[slots] = voiced_prob
+        self._frame_starts[slots] = (first_frame + np.arange(n_new)) * self.hop_length + self.frame_offset
+
+        self.next_frame = last_frame + 1
+        self.frames_computed = min(self.capacity, self.frames_computed + n_new)
+        return n_new
+
+    def frames_ready(self, total_written: int) -> int:
+        """Anzahl Frames, die nach total_written Samples vollständig sind"""
+        return max(0, (total_written - self.frame_length - self.frame_offset) // self.hop_length + 1)
+
+    def window_pitch(self, n_frames: int = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(frame_starts, f0, voiced_prob) der letzten n_frames Frames, ältester zuerst"""
+        available = min(self.frames_computed, self.next_frame)
+        n = available if n_frames is None else min(n_frames, available)
+        return self.frame_range(self.next_frame - n, n)
+
+    def frame_range(self, first_frame: int, n_frames: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(frame_starts, f0, voiced_prob) der Frames first_frame ... first_frame + n_frames - 1"""
+        order = (first_frame + np.arange(n_frames)) % self.capacity
+        return self._frame_starts[order], self._f0[order], self._voiced_prob[order]
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Audio-Ring-Buffer
+Vorallokierter float32-Ring mit absoluter Sample-Uhr für die Live-Analyse
+"""
+
+import numpy as np
+from typing import Optional
+
+
+class AudioRingBuffer:
+    """
+    Float32-Ring-Buffer fester Größe
+
+    Schreiben kopiert nur die neuen Samples; total_written zählt alle jemals
+    geschriebenen Samples und dient als Sample-Uhr (Position 0 = erster Sample).
+
+    Für Leser in anderen Threads/Prozessen (siehe inference_workers.SharedAudioRing)
+    veröffentlicht write() zwei Positionen: write_limit ("schreibe bis") vor dem
+    Kopieren, total_written danach. read() prüft den Bereich vor und nach dem
+    Kopieren gegen write_limit - ein Schreibvorgang, der die gelesenen Slots
+    gerade überschreibt, wird so auch erkannt, wenn total_written noch den alten
+    Stand zeigt. Vorausgesetzt ist, dass Speicherzugriffe in Programmreihenfolge
+    sichtbar werden (x86; auf schwächer geordneten CPUs fehlen Barrieren).
+    """
+
+    def __init__(self, capacity: int, data: Optional[np.ndarray] = None):
+        self.capacity = int(capacity)
+        self._data = np.zeros(self.capacity, dtype=np.float32) if data is None else data
+        self.total_written = 0
+        self.write_limit = 0
+
+    def __len__(self) -> int:
+        return min(self.total_written, self.capacity)
+
+    def clear(self):
+        self.total_written = 0
+        self.write_limit = 0
+
+    def write(self, samples: np.ndarray) -> int:
+        """Samples anhängen, gibt die absolute Startposition zurück"""
+        samples = np.asarray(samples, dtype=np.float32).ravel()
+        start = self.total_written
+        end = start + len(samples)
+
+        # Nur die letzten capacity Samples können überleben
+        if len(samples) > self.capacity:
+            samples = samples[-self.capacity:]
+
+        # Leser zuerst warnen: Slots vor end - capacity werden gleich überschrieben
+        self.write_limit = end
+
+        n = len(samples)
+        idx = (end - n) % self.capacity
+        first = min(n, self.capacity - idx)
+        self._data[idx:idx + first] = samples[:first]
+        if first < n:
+            self._data[:n - first] = samples[first:]
+
+        # Position erst nach den Daten veröffentlichen
+        self.total_written = end
+        return start
+
+    def read(self, start: int, length: int) -> Optional[np.ndarray]:
+        """Absoluten Bereich als zusammenhängende Kopie lesen (None falls nicht verfügbar)"""
+        if length <= 0:
+            return np.zeros(0, dtype=np.float32)
+        if start < self.write_limit - self.capacity or start + length > self.total_written:
+            return None
+
+        out = np.empty(length, dtype=np.float32)
+        idx = start % self.capacity
+        first = min(length, self.capacity - idx)
+        out[:first] = self._data[idx:idx + first]
+        if first < length:
+            out[first:] = self._data[:length - first]
+
+        # Hat während des Kopierens ein Schreibvorgang begonnen, der den Bereich trifft?
+        if start < self.write_limit - self.capacity:
+            return None
+        return out
+
+    def latest(self, length: int) -> np.ndarray:
+        """Die letzten length Samples (oder weniger, falls noch nicht vorhanden)"""
+        length = min(length, len(self))
+        return self.read(self.total_written - length, length)
@@ -7,10 +7,12 @@ Speichern und Laden von kompletten Sitzungen mit Transkripten und Markern
 
 import os
 import json
+import shutil
 import pickle
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import numpy as np
+from marker_timeline import MarkerTimeline
 
 class SessionManager:
     """Klasse für Sitzungsmanagement"""
@@ -43,13 +45,7 @@ class SessionManager:
             'language': 'de',
             'model_size': 'base',
             'transcript': '',
-            'markers_data': {
-                'timestamps': [],
-                'emotions': [],
-                'pauses': [],
-                'pitch': [],
-                'energy': []
-            },
+            'markers_dir': None,  # Verzeichnis der Marker-Zeitleiste (relativ zu sessions/)
             'markers_summary': {},
             'audio_settings': {},
             'notes': ''
@@ -150,43 +146,82 @@ class SessionManager:
         """
         try:
             os.remove(filepath)
+            
+            # Zugehörige Marker-Zeitleiste entfernen
+            markers_dir = os.path.splitext(filepath)[0] + "_markers"
+            if os.path.isdir(markers_dir):
+                shutil.rmtree(markers_dir)
             return True
         except Exception as e:
             print(f"Fehler beim Löschen der Sitzung: {e}")
             return False
     
-    def update_session_transcript(self, session: Dict, transcript_text: str) -> Dict:
+    def update_session_transcript(self, session: Dict, transcript_text: str,
+                                  segments: Optional[List[Tuple[int, int, str, int]]] = None) -> Dict:
         """
         Transkript in Sitzung aktualisieren
         
         Args:
             session: Session-Dictionary
             transcript_text: Neuer Transkriptionstext
+            segments: Transkript-Segmente (Start-, End-Sample, Text, Sprecher-ID)
             
         Returns:
             Aktualisierte Session
         """
         session['transcript'] = transcript_text
+        if segments is not None:
+            session['transcript_segments'] = [
+                {'start_sample': int(start), 'end_sample': int(end), 'text': text, 'speaker': int(speaker)}
+                for start, end, text, speaker in segments
+            ]
         return session
     
-    def update_session_markers(self, session: Dict, markers_data: Dict) -> Dict:
+    def markers_directory(self, session: Dict) -> str:
+        """Verzeichnis, in das die Marker-Zeitleiste einer Sitzung geschrieben wird"""
+        return os.path.join(self.sessions_dir, f"session_{session['id']}_markers")
+    
+    def update_session_markers(self, session: Dict, timeline: MarkerTimeline) -> Dict:
         """
-        Marker-Daten in Sitzung aktualisieren
+        Marker-Zeitleiste in Sitzung übernehmen
+        
+        Die Zeitleiste wird (falls noch nicht geschehen) in das Marker-Verzeichnis
+        der Sitzung geschrieben; die Session-Datei enthält nur den Verweis und die
+        Zusammenfassung.
         
         Args:
             session: Session-Dictionary
-            markers_data: Marker-Daten
+            timeline: Marker-Zeitleiste der Sitzung
             
         Returns:
             Aktualisierte Session
         """
-        session['markers_data'] = markers_data
+        directory = self.markers_directory(session)
+        if timeline.storage_dir != directory:
+            timeline.set_storage(directory)
+        timeline.flush()
+        
+        session['markers_dir'] = os.path.basename(directory)
+        session.pop('markers_data', None)
         
         # Marker-Zusammenfassung generieren
-        session['markers_summary'] = self._generate_markers_summary(markers_data)
+        session['markers_summary'] = self._generate_markers_summary(timeline)
         
         return session
     
+    def load_markers(self, session: Dict) -> MarkerTimeline:
+        """Marker-Zeitleiste einer geladenen Sitzung (auch alte Sitzungen mit markers_data)"""
+        if session.get('markers_dir'):
+            return MarkerTimeline.load(os.path.join(self.sessions_dir, session['markers_dir']))
+        return MarkerTimeline.from_legacy(session.get('markers_data', {}))
+    
+    def load_transcript_segments(self, session: Dict) -> List[Tuple[int, int, str, int]]:
+        """Transkript-Segmente einer geladenen Sitzung (leer bei Sitzungen ohne Segmente)"""
+        return [
+            (int(segment['start_sample']), int(segment['end_sample']), segment['text'], int(segment['speaker']))
+            for segment in session.get('transcript_segments', [])
+        ]
+    
     def start_session(self, session: Dict) -> Dict:
         """
         Sitzung starten (Zeitstempel setzen)
@@ -248,62 +283,62 @@ class SessionManager:
         
         return session
     
-    def _generate_markers_summary(self, markers_data: Dict) -> Dict:
-        """Marker-Zusammenfassung generieren"""
+    def _generate_markers_summary(self, timeline: MarkerTimeline) -> Dict:
+        """Marker-Zusammenfassung aus der vollständigen Zeitleiste generieren"""
         summary = {}
         
         try:
-            # Emotionen-Zusammenfassung
-            if 'emotions' in markers_data and markers_data['emotions']:
-                emotions = markers_data['emotions']
-                if isinstance(emotions, list) and emotions:
-                    # Vereinfachte Emotionsverteilung (hier müsste eine echte Klassifikation stehen)
-                    # Für Demo-Zwecke nehmen wir Valenz-Werte und mappen sie zu Emotionen
-                    emotion_counts = {'neutral': 0, 'positive': 0, 'negative': 0}
-                    
-                    for valence in emotions:
-                        if valence > 0.3:
-                            emotion_counts['positive'] += 1
-                        elif valence < -0.3:
-                            emotion_counts['negative'] += 1
-                        else:
-                            emotion_counts['neutral'] += 1
-                    
-                    total = sum(emotion_counts.values())
-                    if total > 0:
-                        summary['emotions'] = {
-                            emotion: (count / total) * 100 
-                            for emotion, count in emotion_counts.items()
-                        }
+            if isinstance(timeline, dict):
+                timeline = MarkerTimeline.from_legacy(timeline)
+            stats = timeline.stats()
+            
+            # Emotionen-Zusammenfassung (Valenz in drei Bereiche, Anteile aus den Rollups)
+            if stats['valence'].count:
+                positive = stats['positive'].mean * 100
+                negative = stats['negative'].mean * 100
+                summary['emotions'] = {
+                    'neutral': max(0.0, 100.0 - positive - negative),
+                    'positive': positive,
+                    'negative': negative
+                }
             
             # Pausen-Zusammenfassung
-            if 'pauses' in markers_data and markers_data['pauses']:
-                pauses = [p for p in markers_data['pauses'] if p > 0]
-                if pauses:
-                    summary['pauses'] = {
-                        'count': len(pauses),
-                        'avg_duration': float(np.mean(pauses)),
-                        'max_duration': float(np.max(pauses)),
-                        'min_duration': float(np.min(pauses))
-                    }
+            pauses = timeline.pause_durations()
+            pauses = pauses[pauses > 0]
+            if len(pauses):
+                summary['pauses'] = {
+                    'count': int(len(pauses)),
+                    'avg_duration': float(np.mean(pauses)),
+                    'max_duration': float(np.max(pauses)),
+                    'min_duration': float(np.min(pauses))
+                }
             
             # Prosody-Zusammenfassung
             prosody_summary = {}
             
-            if 'pitch' in markers_data and markers_data['pitch']:
-                valid_pitch = [p for p in markers_data['pitch'] if p > 0]
-                if valid_pitch:
-                    prosody_summary['avg_pitch'] = float(np.mean(valid_pitch))
-                    prosody_summary['pitch_stability'] = float(1.0 / (1.0 + np.var(valid_pitch)))
+            if stats['pitch'].count:
+                prosody_summary['avg_pitch'] = stats['pitch'].mean
+                prosody_summary['pitch_stability'] = float(1.0 / (1.0 + stats['pitch'].var))
             
-            if 'energy' in markers_data and markers_data['energy']:
-                energy_values = [e for e in markers_data['energy'] if e > 0]
-                if energy_values:
-                    prosody_summary['avg_energy'] = float(np.mean(energy_values))
-                    prosody_summary['energy_stability'] = float(1.0 / (1.0 + np.var(energy_values)))
+            if stats['energy'].count:
+                prosody_summary['avg_energy'] = stats['energy'].mean
+                prosody_summary['energy_stability'] = float(1.0 / (1.0 + stats['energy'].var))
             
             if prosody_summary:
                 summary['prosody'] = prosody_summary
+            
+            # Verlauf in 5-Minuten-Abschnitten (direkt aus der 5-Minuten-Stufe)
+            sections = {field: timeline.stats_series(300, field) for field in ('valence', 'pitch', 'energy')}
+            summary['timeline'] = [
+                {
+                    'start': float(sections['valence']['start'][i]),
+                    'valence': float(sections['valence']['mean'][i]),
+                    'pitch': float(sections['pitch']['mean'][i]),
+                    'energy': float(sections['energy']['mean'][i])
+                }
+                for i in range(len(sections['valence']['start']))
+                if sections['valence']['count'][i]
+            ]
                 
         except Exception as e:
             print(f"Fehler bei Marker-Zusammenfassung: {e}")
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Günstige Sprecherwechsel-Erkennung
+Vergleicht die MFCC-Statistik jedes neuen Sprachfensters per BIC mit der des
+laufenden Sprecherabschnitts. Nur an wahrscheinlichen Wechseln (und mit
+niedriger Keep-alive-Rate) wird ein ECAPA-Embedding berechnet; dazwischen wird
+der Sprecher fortgeschrieben.
+"""
+
+import numpy as np
+from typing import Optional, Tuple
+from numpy.lib.stride_tricks import sliding_window_view
+
+import dsp
+from feature_frontend import spectral_frame_features
+
+
+def mel_filterbank(sample_rate: int, n_fft: int, n_mels: int = 24,
+                   fmin: float = 60.0, fmax: Optional[float] = None) -> np.ndarray:
+    """Dreieckige Mel-Filter (HTK-Skala) als (n_bins, n_mels)-Matrix"""
+    fmax = fmax or sample_rate / 2
+    to_mel = lambda f: 2595.0 * np.log10(1.0 + f / 700.0)
+    to_hz = lambda m: 700.0 * (10.0 ** (m / 2595.0) - 1.0)
+    edges = to_hz(np.linspace(to_mel(fmin), to_mel(fmax), n_mels + 2))
+    freqs = dsp.rfftfreq(n_fft, sample_rate)[:, None]
+    lower, center, upper = edges[:-2], edges[1:-1], edges[2:]
+    rising = (freqs - lower) / (center - lower)
+    falling = (upper - freqs) / (upper - center)
+    return np.maximum(0.0, np.minimum(rising, falling)).astype(np.float32)
+
+
+def dct_matrix(n_mels: int, n_coefficients: int) -> np.ndarray:
+    """Orthonormale DCT-II-Basis (n_mels, n_coefficients)"""
+    k = np.arange(n_coefficients)[None, :]
+    n = np.arange(n_mels)[:, None]
+    basis = np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels)) * np.sqrt(2.0 / n_mels)
+    basis[:, 0] /= np.sqrt(2.0)
+    return basis.astype(np.float32)
+
+
+def delta_bic(first: Tuple[float, np.ndarray, np.ndarray], second: Tuple[float, np.ndarray, np.ndarray],
+              penalty: float = 1.0, floor: float = 1e-6) -> float:
+    """
+    ΔBIC zweier Abschnitte mit diagonalen Gauß-Modellen aus laufenden Summen
+
+    first/second sind (n, Summe, Quadratsumme) je Merkmal. Positiv = zwei
+    Modelle erklären die Daten besser als eines (wahrscheinlicher Wechsel).
+    """
+    def log_det(n, total, squares):
+        mean = total / n
+        return float(np.sum(np.log(np.maximum(squares / n - mean * mean, floor))))
+
+    n1, s1, q1 = first
+    n2, s2, q2 = second
+    n = n1 + n2
+    dim = len(s1)
+    gain = 0.5 * (n * log_det(n, s1 + s2, q1 + q2) - n1 * log_det(n1, s1, q1) - n2 * log_det(n2, s2, q2))
+    return gain - penalty * 0.5 * (2 * dim) * np.log(n)
+
+
+class SpeakerChangeDetector:
+    """
+    Entscheidet je Sprachfenster, ob ein Embedding nötig ist
+
+    Ein Embedding wird berechnet für das erste Fenster, nach einer Sprechpause
+    über max_gap, wenn der neue Teil des Fensters (ab Ende des vorigen) per BIC
+    nicht zum laufenden Abschnitt passt, für post_change weitere Fenster nach
+    einem Wechsel (das Wechselfenster enthält beide Sprecher) und spätestens
+    nach keepalive Sekunden. Der laufende Abschnitt wird als Summen über
+    höchstens max_reference Sekunden geführt (ältere Frames werden anteilig
+    vergessen). MFCC c1..c12 (ohne c0, lautstärkeunabhängig) im Framing des
+    gemeinsamen Front-Ends (n_fft 512, Hop 256, Hann).
+    """
+
+    def __init__(self, sample_rate: int = 16000, n_fft: int = 512, hop_length: int = 256,
+                 n_mels: int = 24, n_coefficients: int = 12, penalty: float = 1.0,
+                 keepalive: float = 4.0, max_gap: float = 2.0, post_change: int = 1,
+                 max_reference: float = 10.0, min_frames: int = 20):
+        self.sample_rate = sample_rate
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.penalty = penalty
+        self.keepalive_samples = int(keepalive * sample_rate)
+        self.max_gap_samples = int(max_gap * sample_rate)
+        self.post_change = post_change
+        self.max_reference_frames = max_reference * sample_rate / hop_length
+        self.min_frames = min_frames
+
+        self.window = dsp.hann_window(n_fft)
+        self.freqs = dsp.rfftfreq(n_fft, sample_rate).astype(np.float32)
+        self.mel_basis = mel_filterbank(sample_rate, n_fft, n_mels)
+        self.dct = dct_matrix(n_mels, n_coefficients + 1)[:, 1:]
+
+        self.windows_seen = 0
+        self.windows_embedded = 0
+        self.changes = 0
+        self.reset()
+
+    def reset(self):
+        self._reference = None        # (n, Summe, Quadratsumme) des laufenden Abschnitts
+        self._covered_until = None    # Ende des zuletzt gesehenen Fensters
+        self._last_embedded = None    # Sample-Position des letzten Embeddings
+        self._pending = 0             # noch einzubettende Fenster nach einem Wechsel
+
+    def mfcc(self, audio: np.ndarray) -> np.ndarray:
+        """MFCC c1..c12 je Frame (n_frames, n_coefficients)"""
+        if len(audio) < self.n_fft:
+            return np.zeros((0, self.dct.shape[1]), dtype=np.float32)
+        frames = sliding_window_view(np.asarray(audio, dtype=np.float32), self.n_fft)[::self.hop_length]
+        magnitudes = spectral_frame_features(frames, self.window, self.freqs)[0]
+        log_mel = np.log(np.square(magnitudes) @ self.mel_basis + 1e-8)
+        return log_mel @ self.dct
+
+    def _statistics(self, features: np.ndarray) -> Tuple[float, np.ndarray, np.ndarray]:
+        features = features.astype(np.float64)
+        return float(len(features)), features.sum(axis=0), np.square(features).sum(axis=0)
+
+    def _extend_reference(self, stats: Tuple[float, np.ndarray, np.ndarray]):
+        n, total, squares = self._reference
+        n, total, squares = n + stats[0], total + stats[1], squares + stats[2]
+        if n > self.max_reference_frames:
+            scale = self.max_reference_frames / n
+            n, total, squares = n * scale, total * scale, squares * scale
+        self._reference = (n, total, squares)
+
+    def should_embed(self, start_sample: int, audio: np.ndarray) -> bool:
+        """Fenster (start_sample, audio) auswerten; True = Embedding berechnen"""
+        end = start_sample + len(audio)
+        self.windows_seen += 1
+
+        new_from = start_sample
+        if self._covered_until is not None and start_sample < self._covered_until:
+            new_from = self._covered_until
+        gap = self._covered_until is None or start_sample - self._covered_until > self.max_gap_samples
+        self._covered_until = max(end, self._covered_until or end)
+
+        # Nur der neue Teil (plus Frame-Überhang) wird analysiert
+        context = max(0, new_from - start_sample - (self.n_fft - self.hop_length))
+        features = self.mfcc(audio[context:])
+        stats = self._statistics(features) if len(features) else None
+
+        # Fenster direkt nach einem Wechsel: einbetten und den neuen Abschnitt
+        # mit ihnen beginnen (das Wechselfenster selbst enthält noch beide Sprecher)
+        settling = self._pending > 0 and not gap
+        change = False
+        if settling:
+            self._pending -= 1
+        elif stats is not None and self._reference is not None and not gap:
+            if stats[0] >= self.min_frames and self._reference[0] >= self.min_frames:
+                change = delta_bic(self._reference, stats, self.penalty) > 0
+        if stats is not None:
+            if change or gap or settling or self._reference is None:
+                self._reference = stats
+            else:
+                self._extend_reference(stats)
+        if change:
+            self.changes += 1
+            self._pending = self.post_change
+        elif gap:
+            self._pending = 0
+
+        embed = change or gap or settling or self._last_embedded is None
+        if not embed and start_sample - self._last_embedded >= self.keepalive_samples:
+            embed = True
+        if embed:
+            self._last_embedded = start_sample
+            self.windows_embedded += 1
+        return embed
+
+    @property
+    def embedded_ratio(self) -> float:
+        return self.windows_embedded / self.windows_seen if self.windows_seen else 1.0
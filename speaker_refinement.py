@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Sprecher-Nachclustering am Sitzungsende
+Clustert alle Fenster-Embeddings einer Sitzung neu (agglomerativ, Kosinus-Abstand)
+und führt dabei Sprecher zusammen, die das Online-Clustering aufgespalten hat.
+"""
+
+import numpy as np
+from typing import Optional
+
+from sklearn.cluster import AgglomerativeClustering
+from sklearn.decomposition import PCA
+
+BLOCK_ROWS = 8192  # Zeilen je Block beim Projizieren/Zuordnen aller Embeddings
+
+
+def _normalize_rows(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+
+def align_labels(labels: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    """
+    Neue Cluster-Labels auf die Referenz-IDs (Online-Sprecher) abbilden
+
+    Größte Überlappung zuerst; jede Referenz-ID wird höchstens einmal vergeben,
+    übrige Cluster bekommen neue IDs oberhalb der Referenz-IDs.
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    reference = np.asarray(reference, dtype=np.int64)
+    n_new = int(labels.max()) + 1
+    n_ref = int(reference.max()) + 1 if len(reference) and reference.max() >= 0 else 0
+
+    valid = reference >= 0
+    overlap = np.zeros((n_new, max(n_ref, 1)), dtype=np.int64)
+    np.add.at(overlap, (labels[valid], reference[valid]), 1)
+
+    mapping = np.full(n_new, -1, dtype=np.int64)
+    used = set()
+    for flat in np.argsort(-overlap, axis=None, kind='stable'):
+        new, ref = divmod(int(flat), overlap.shape[1])
+        if overlap[new, ref] == 0:
+            break
+        if mapping[new] < 0 and ref not in used:
+            mapping[new] = ref
+            used.add(ref)
+
+    next_id = n_ref
+    for new in range(n_new):
+        if mapping[new] < 0:
+            mapping[new] = next_id
+            next_id += 1
+    return mapping[labels]
+
+
+def refine_speaker_labels(embeddings: np.ndarray, online_labels: Optional[np.ndarray] = None,
+                          distance_threshold: float = 0.5, max_speakers: int = 4,
+                          pca_components: Optional[int] = None, max_points: int = 4000,
+                          seed: int = 0) -> np.ndarray:
+    """
+    Sprecher-Labels aller Fenster einer Sitzung neu bestimmen
+
+    Agglomeratives Clustering (average linkage, Kosinus-Abstand) bis
+    distance_threshold; ergeben sich mehr als max_speakers Cluster, wird auf
+    max_speakers geschnitten. Der Speicherbedarf des Clusterings ist quadratisch
+    in der Punktzahl, daher wird bei mehr als max_points Fenstern nur eine
+    Stichprobe geclustert und alle Fenster blockweise dem nächsten
+    Cluster-Zentrum zugeordnet. Optional vorher PCA auf pca_components Dimensionen.
+
+    Args:
+        embeddings: (n, dim) Fenster-Embeddings (float16/float32)
+        online_labels: Online-Sprecher je Fenster; die neuen Labels werden darauf abgebildet
+
+    Returns:
+        Sprecher-ID je Fenster (int64)
+    """
+    n = len(embeddings)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if n == 1:
+        return np.asarray(online_labels if online_labels is not None else [0], dtype=np.int64)
+
+    rng = np.random.default_rng(seed)
+    sample = np.sort(rng.choice(n, max_points, replace=False)) if n > max_points else np.arange(n)
+    points = _normalize_rows(embeddings[sample])
+
+    projection = None
+    if pca_components and pca_components < points.shape[1]:
+        projection = PCA(n_components=min(pca_components, len(points)), random_state=seed).fit(points)
+        points = _normalize_rows(projection.transform(points))
+
+    clustering = AgglomerativeClustering(n_clusters=None, distance_threshold=distance_threshold,
+                                         metric='cosine', linkage='average').fit(points)
+    if clustering.n_clusters_ > max_speakers:
+        clustering = AgglomerativeClustering(n_clusters=max_speakers, metric='cosine',
+                                             linkage='average').fit(points)
+    sample_labels = clustering.labels_
+
+    # Zentren der Stichproben-Cluster, dann alle Fenster blockweise zuordnen
+    n_clusters = int(sample_labels.max()) + 1
+    centers = np.zeros((n_clusters, points.shape[1]), dtype=np.float32)
+    np.add.at(centers, sample_labels, points)
+    centers = _normalize_rows(centers)
+
+    labels = np.empty(n, dtype=np.int64)
+    for start in range(0, n, BLOCK_ROWS):
+        block = _normalize_rows(embeddings[start:start + BLOCK_ROWS])
+        if projection is not None:
+            block = _normalize_rows(projection.transform(block))
+        labels[start:start + BLOCK_ROWS] = np.argmax(block @ centers.T, axis=1)
+    # Geclusterte Fenster behalten ihr Clustering-Label
+    labels[sample] = sample_labels
+
+    if online_labels is not None:
+        labels = align_labels(labels, online_labels)
+    return labels
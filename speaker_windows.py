@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Sprachfenster für die Sprechererkennung
+Schneidet die Sprachstücke des gemeinsamen VAD in überlappende Fenster fester
+Länge (Standard 1.5 s, Hop 0.75 s) auf der Sample-Uhr.
+"""
+
+import numpy as np
+from typing import List, Tuple
+
+
+class SpeechWindowAccumulator:
+    """
+    Sammelt Sprach-Audio zu Embedding-Fenstern
+
+    add() bekommt (start_sample, audio) wie ein Sprach-Listener. Lückenlos
+    aneinander anschließende Stücke bilden einen Lauf; daraus werden Fenster
+    [start, start + window) im Abstand hop geschnitten. Endet ein Lauf (Lücke
+    zum nächsten Stück oder flush()), wird der noch nicht abgedeckte Rest als
+    letztes Fenster ausgegeben, sofern der Lauf mindestens min_window lang ist.
+    Gepuffert wird höchstens ein Fenster plus das zuletzt übergebene Stück.
+    """
+
+    def __init__(self, sample_rate: int = 16000, window: float = 1.5, hop: float = 0.75,
+                 min_window: float = 1.0):
+        if hop <= 0 or hop > window:
+            raise ValueError("hop muss in (0, window] liegen")
+        self.sample_rate = sample_rate
+        self.window_samples = int(window * sample_rate)
+        self.hop_samples = int(hop * sample_rate)
+        self.min_samples = int(min_window * sample_rate)
+        self.reset()
+
+    def reset(self):
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0     # Sample-Position von _buffer[0]
+        self._run_start = None     # Beginn des offenen Laufs
+        self._next_window = 0      # Start des nächsten vollen Fensters
+        self._covered_until = 0    # Ende des letzten ausgegebenen Fensters
+
+    @property
+    def _run_end(self) -> int:
+        return self._buffer_start + len(self._buffer)
+
+    def add(self, start_sample: int, audio: np.ndarray) -> List[Tuple[int, np.ndarray]]:
+        """Sprachstück anhängen, fertige Fenster als (window_start, audio) zurückgeben"""
+        audio = np.asarray(audio, dtype=np.float32).ravel()
+        windows = []
+        if self._run_start is not None and start_sample != self._run_end:
+            windows.extend(self.flush())
+        if self._run_start is None:
+            self._run_start = start_sample
+            self._buffer_start = start_sample
+            self._next_window = start_sample
+            self._covered_until = start_sample
+
+        self._buffer = np.concatenate([self._buffer, audio])
+        while self._run_end - self._next_window >= self.window_samples:
+            offset = self._next_window - self._buffer_start
+            windows.append((self._next_window, self._buffer[offset:offset + self.window_samples].copy()))
+            self._covered_until = self._next_window + self.window_samples
+            self._next_window += self.hop_samples
+
+        # Nur das letzte Fenster behalten (deckt das nächste volle und das Rest-Fenster ab)
+        keep_from = max(self._run_start, self._run_end - self.window_samples)
+        if keep_from > self._buffer_start:
+            self._buffer = self._buffer[keep_from - self._buffer_start:]
+            self._buffer_start = keep_from
+        return windows
+
+    def flush(self) -> List[Tuple[int, np.ndarray]]:
+        """Offenen Lauf abschließen und ggf. das Rest-Fenster ausgeben"""
+        windows = []
+        if self._run_start is not None:
+            run_end = self._run_end
+            run_length = run_end - self._run_start
+            if run_end > self._covered_until and run_length >= self.min_samples:
+                start = max(self._run_start, run_end - self.window_samples)
+                windows.append((start, self._buffer[start - self._buffer_start:].copy()))
+        self.reset()
+        return windows
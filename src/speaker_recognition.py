@@ -6,44 +6,120 @@ ECAPA-TDNN based Speaker Diarization für therapeutische Anwendungen
 Fokus: Real-time Performance + Therapeutische Genauigkeit
 """
 
+import os
 import numpy as np
-import torch
 import threading
 import queue
+import time
 import collections
 from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
 import logging
-from dataclasses import dataclass
 from PyQt6.QtCore import QObject, pyqtSignal
 
-# SpeechBrain für ECAPA-TDNN
-try:
-    from speechbrain.pretrained import EncoderClassifier
-    SPEECHBRAIN_AVAILABLE = True
-except ImportError:
-    SPEECHBRAIN_AVAILABLE = False
-    logging.warning("SpeechBrain nicht verfügbar - Speaker Recognition deaktiviert")
+from inference_workers import InferenceWorker, WorkerConfig, encode_batch_with_ecapa
+from thread_budget import get_thread_budget, apply_torch_threads
+from speaker_windows import SpeechWindowAccumulator
+from speaker_change import SpeakerChangeDetector
+from voiceprint_library import VoiceprintLibrary
+from speaker_refinement import refine_speaker_labels
+from marker_timeline import ChunkedTable
+from embedding_cache import EmbeddingCache, audio_key
 
-# Sklearn für Clustering
-from sklearn.cluster import AgglomerativeClustering
-from sklearn.metrics.pairwise import cosine_similarity
-
-@dataclass
 class SpeakerProfile:
-    """Speaker-Profil für therapeutische Sitzungen"""
-    speaker_id: int
-    speaker_type: str  # 'therapist', 'patient', 'unknown'
-    enrollment_embeddings: List[np.ndarray]
-    confidence_history: List[float]
-    last_seen: datetime
-    total_speaking_time: float
-    average_embedding: Optional[np.ndarray] = None
+    """
+    Speaker-Profil für therapeutische Sitzungen
+    
+    Speicher und Kosten je Aufruf bleiben über beliebig lange Sitzungen
+    konstant: Konfidenzen liegen in einem NumPy-Ring fester Kapazität plus
+    laufender Summe (Mittel über die ganze Sitzung in O(1)), das mittlere
+    Embedding ist eine laufende Summe, und als Beispiel-Embeddings wird eine
+    gleichverteilte Stichprobe (Reservoir Sampling) fester Größe gehalten.
+    """
+    
+    __slots__ = ('speaker_id', 'speaker_type', 'last_seen', 'total_speaking_time', 'voiceprint',
+                 '_confidences', '_confidence_count', '_confidence_sum',
+                 '_embedding_sum', '_embedding_count', '_exemplars', '_rng')
+    
+    def __init__(self, speaker_id: int, speaker_type: str, last_seen: datetime,
+                 embedding_dim: int = 192, history: int = 256, exemplars: int = 32,
+                 total_speaking_time: float = 0.0):
+        self.speaker_id = speaker_id
+        self.speaker_type = speaker_type  # 'therapist', 'patient', 'unknown'
+        self.last_seen = last_seen
+        self.total_speaking_time = total_speaking_time
+        self.voiceprint: Optional[str] = None  # Name des erkannten Stimmabdrucks aus der Bibliothek
+        
+        self._confidences = np.zeros(history, dtype=np.float32)
+        self._confidence_count = 0
+        self._confidence_sum = 0.0
+        self._embedding_sum = np.zeros(embedding_dim, dtype=np.float64)
+        self._embedding_count = 0
+        self._exemplars = np.zeros((exemplars, embedding_dim), dtype=np.float32)
+        self._rng = np.random.default_rng(speaker_id)
+    
+    # ------------------------------------------------------------- Konfidenz
+    
+    def add_confidence(self, confidence: float):
+        self._confidences[self._confidence_count % len(self._confidences)] = confidence
+        self._confidence_count += 1
+        self._confidence_sum += confidence
+    
+    @property
+    def n_confidences(self) -> int:
+        return self._confidence_count
+    
+    @property
+    def confidence_mean(self) -> float:
+        """Mittlere Konfidenz über die ganze Sitzung"""
+        return self._confidence_sum / self._confidence_count if self._confidence_count else 0.0
+    
+    def recent_confidence(self, n: int) -> float:
+        """Mittlere Konfidenz der letzten n Zuordnungen (n <= Ring-Kapazität)"""
+        n = min(n, self._confidence_count, len(self._confidences))
+        if n == 0:
+            return 0.0
+        slots = (self._confidence_count - n + np.arange(n)) % len(self._confidences)
+        return float(self._confidences[slots].mean())
+    
+    # ------------------------------------------------------------ Embeddings
+    
+    def add_embedding(self, embedding: np.ndarray):
+        """Embedding in Mittelwert und Reservoir-Stichprobe aufnehmen"""
+        capacity = len(self._exemplars)
+        if self._embedding_count < capacity:
+            self._exemplars[self._embedding_count] = embedding
+        else:
+            slot = self._rng.integers(0, self._embedding_count + 1)
+            if slot < capacity:
+                self._exemplars[slot] = embedding
+        self._embedding_sum += embedding
+        self._embedding_count += 1
+    
+    @property
+    def n_embeddings(self) -> int:
+        return self._embedding_count
+    
+    @property
+    def average_embedding(self) -> Optional[np.ndarray]:
+        if self._embedding_count == 0:
+            return None
+        return (self._embedding_sum / self._embedding_count).astype(np.float32)
+    
+    @property
+    def exemplars(self) -> np.ndarray:
+        """Gleichverteilte Stichprobe der Embeddings (höchstens exemplars Zeilen)"""
+        return self._exemplars[:min(self._embedding_count, len(self._exemplars))]
 
 class OnlineSpeakerCluster:
     """
     Online Clustering für Real-time Speaker Diarization
     TRAPV4-inspiriert mit therapeutischen Anpassungen
+    
+    Die Cluster-Zentren liegen L2-normalisiert als zusammenhängende
+    float32-Matrix (eine Zeile pro Sprecher) vor; die Kosinus-Ähnlichkeit zu
+    allen Sprechern ist ein einziges Matrix-Vektor-Produkt, Momentum-Updates
+    schreiben direkt in die Zeile.
     """
     
     def __init__(self, 
@@ -57,8 +133,11 @@ class OnlineSpeakerCluster:
         self.momentum = momentum
         self.max_silence_gap = max_silence_gap
         
-        # Cluster state
-        self.cluster_centers = {}  # speaker_id -> embedding centroid
+        # Cluster state: Zentren-Matrix (wächst durch Verdoppeln), Zeile -> speaker_id
+        self.centers = np.zeros((0, 0), dtype=np.float32)
+        self.center_ids = np.zeros(0, dtype=np.int64)
+        self.n_centers = 0
+        self._rows = {}  # speaker_id -> Zeile in centers
         self.speaker_profiles = {}  # speaker_id -> SpeakerProfile
         self.current_speaker = None
         self.last_speech_time = None
@@ -68,6 +147,35 @@ class OnlineSpeakerCluster:
         self.embedding_history = collections.deque(maxlen=100)
         self.confidence_history = collections.deque(maxlen=50)
         
+    @property
+    def cluster_centers(self) -> Dict[int, np.ndarray]:
+        """Zentren als speaker_id -> Vektor (Kopien, für Analyse/UI)"""
+        return {int(speaker_id): self.centers[row].copy()
+                for row, speaker_id in enumerate(self.center_ids[:self.n_centers])}
+    
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        embedding = np.asarray(embedding, dtype=np.float32).ravel()
+        return embedding / max(float(np.linalg.norm(embedding)), 1e-12)
+    
+    def similarities(self, embedding: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Kosinus-Ähnlichkeit eines normalisierten Embeddings zu allen Zentren: (speaker_ids, sims)"""
+        if self.n_centers == 0:
+            return self.center_ids[:0], np.zeros(0, dtype=np.float32)
+        return self.center_ids[:self.n_centers], self.centers[:self.n_centers] @ embedding
+    
+    def center(self, speaker_id: int) -> np.ndarray:
+        """Zentrum eines Sprechers (View auf die Matrix-Zeile)"""
+        return self.centers[self._rows[speaker_id]]
+    
+    def best_match(self, embedding: np.ndarray) -> Tuple[Optional[int], float]:
+        """Ähnlichster Sprecher (ohne Stickiness) und seine Ähnlichkeit"""
+        speaker_ids, sims = self.similarities(self._normalize(embedding))
+        if len(sims) == 0:
+            return None, 0.0
+        best = int(np.argmax(sims))
+        return int(speaker_ids[best]), float(sims[best])
+    
     def update_cluster(self, embedding: np.ndarray, timestamp: datetime) -> Tuple[int, float]:
         """
         Online clustering update mit TRAPV4-style parameters
@@ -76,30 +184,26 @@ class OnlineSpeakerCluster:
             (speaker_id, confidence)
         """
         # Normalisieren des embeddings
-        embedding = embedding / np.linalg.norm(embedding)
+        embedding = self._normalize(embedding)
         
         # Check for silence gap
         silence_gap = 0.0
         if self.last_speech_time:
             silence_gap = (timestamp - self.last_speech_time).total_seconds()
         
-        # Berechne similarities zu bestehenden clustern
-        similarities = {}
-        for speaker_id, center in self.cluster_centers.items():
-            sim = cosine_similarity([embedding], [center])[0][0]
-            
-            # Stickiness bonus für aktuellen Speaker (außer bei langen Pausen)
-            if (speaker_id == self.current_speaker and 
+        # Similarities zu allen clustern in einem Matrix-Vektor-Produkt
+        speaker_ids, similarities = self.similarities(embedding)
+        
+        # Stickiness bonus für aktuellen Speaker (außer bei langen Pausen)
+        if (self.current_speaker in self._rows and
                 silence_gap < self.max_silence_gap):
-                sim += self.stickiness_delta
-                
-            similarities[speaker_id] = sim
+            similarities[self._rows[self.current_speaker]] += self.stickiness_delta
         
         # Bestimme besten match
-        if similarities:
-            best_speaker = max(similarities.items(), key=lambda x: x[1])
-            best_similarity = best_speaker[1]
-            best_speaker_id = best_speaker[0]
+        if len(similarities):
+            best = int(np.argmax(similarities))
+            best_similarity = float(similarities[best])
+            best_speaker_id = int(speaker_ids[best])
             
             # Adaptive threshold basierend auf history
             adaptive_tau = self._get_adaptive_threshold()
@@ -128,7 +232,8 @@ class OnlineSpeakerCluster:
         # Update speaker profile
         if self.current_speaker in self.speaker_profiles:
             profile = self.speaker_profiles[self.current_speaker]
-            profile.confidence_history.append(confidence)
+            profile.add_confidence(confidence)
+            profile.add_embedding(embedding)
             profile.last_seen = timestamp
         
         return self.current_speaker, confidence
@@ -148,14 +253,37 @@ class OnlineSpeakerCluster:
             return self.tau
     
     def _update_cluster_center(self, speaker_id: int, new_embedding: np.ndarray):
-        """Update cluster center mit momentum"""
-        if speaker_id in self.cluster_centers:
-            old_center = self.cluster_centers[speaker_id]
-            new_center = (self.momentum * old_center + 
-                         (1 - self.momentum) * new_embedding)
-            self.cluster_centers[speaker_id] = new_center / np.linalg.norm(new_center)
-        else:
-            self.cluster_centers[speaker_id] = new_embedding
+        """Update cluster center mit momentum (in place in der Zentren-Matrix)"""
+        if speaker_id not in self._rows:
+            self._set_center(speaker_id, new_embedding)
+            return
+        
+        center = self.centers[self._rows[speaker_id]]
+        center *= self.momentum
+        center += (1 - self.momentum) * new_embedding
+        center /= max(float(np.linalg.norm(center)), 1e-12)
+    
+    def _set_center(self, speaker_id: int, embedding: np.ndarray):
+        """Zentrum setzen bzw. als neue Zeile anhängen"""
+        embedding = self._normalize(embedding)
+        if speaker_id in self._rows:
+            self.centers[self._rows[speaker_id]] = embedding
+            return
+        
+        if self.n_centers == len(self.centers):
+            capacity = max(8, 2 * len(self.centers))
+            centers = np.zeros((capacity, len(embedding)), dtype=np.float32)
+            ids = np.zeros(capacity, dtype=np.int64)
+            if self.n_centers:
+                centers[:self.n_centers] = self.centers[:self.n_centers]
+                ids[:self.n_centers] = self.center_ids[:self.n_centers]
+            self.centers, self.center_ids = centers, ids
+        
+        row = self.n_centers
+        self.centers[row] = embedding
+        self.center_ids[row] = speaker_id
+        self._rows[speaker_id] = row
+        self.n_centers += 1
     
     def _create_new_speaker(self, embedding: np.ndarray, timestamp: datetime) -> int:
         """Erstelle neuen Speaker"""
@@ -163,18 +291,16 @@ class OnlineSpeakerCluster:
         self.next_speaker_id += 1
         
         # Initialize cluster center
-        self.cluster_centers[speaker_id] = embedding
+        self._set_center(speaker_id, embedding)
         
         # Create speaker profile
         profile = SpeakerProfile(
             speaker_id=speaker_id,
             speaker_type='unknown',
-            enrollment_embeddings=[embedding],
-            confidence_history=[0.8],
             last_seen=timestamp,
-            total_speaking_time=0.0,
-            average_embedding=embedding
+            embedding_dim=len(embedding)
         )
+        profile.add_confidence(0.8)
         self.speaker_profiles[speaker_id] = profile
         
         return speaker_id
@@ -187,22 +313,51 @@ class SpeakerRecognitionSystem(QObject):
     """
     TRAPV4-inspirierte Speaker Recognition für therapeutische Anwendungen
     Integration mit TransRapport marker_system.py
+
+    Als Pipeline-Stufe registriert sich process_speech_segment als Sprach-Listener
+    des LiveTranscriber: Sprach-Audio wird zu überlappenden Fenstern
+    (window_duration, window_hop) gesammelt und asynchron eingebettet. Jedes
+    Fenster wird mit seiner Sample-Position als speaker_segment gemeldet.
+    Fenster, die länger als latency_budget Sekunden in der Queue warten, werden
+    verworfen; bei voller Queue fällt das älteste Fenster heraus. Der Worker
+    bündelt wartende Fenster zu Micro-Batches (ein encode_batch mit wav_lens).
     """
     
     # Qt Signale
     speaker_detected = pyqtSignal(int, float, str)  # speaker_id, confidence, speaker_type
     speaker_enrolled = pyqtSignal(int, str)         # speaker_id, speaker_type
     speaker_changed = pyqtSignal(int, int)          # old_speaker_id, new_speaker_id
+    speaker_segment = pyqtSignal(int, int, int, float)  # start_sample, end_sample, speaker_id, confidence
     
     def __init__(self, 
                  embedding_model: str = "speechbrain/spkrec-ecapa-voxceleb",
                  clustering_threshold: float = 0.7,
                  min_segment_duration: float = 1.0,
                  max_speakers: int = 4,
-                 sample_rate: int = 16000):
+                 sample_rate: int = 16000,
+                 window_duration: float = 1.5,
+                 window_hop: float = 0.75,
+                 latency_budget: float = 2.0,
+                 queue_size: int = 16,
+                 batch_size: int = 8,
+                 batch_timeout: float = 0.05,
+                 voiceprint_directory: Optional[str] = None,
+                 voiceprint_threshold: float = 0.75,
+                 refine_threshold: float = 0.5,
+                 refine_pca_components: Optional[int] = None,
+                 exported_model: Optional[str] = None,
+                 change_detection: bool = True,
+                 keepalive: float = 4.0,
+                 change_penalty: float = 1.0,
+                 embedding_cache_directory: Optional[str] = None,
+                 embedding_cache_mb: float = 256.0,
+                 use_worker_process: bool = False,
+                 worker_threads: Optional[int] = None,
+                 worker_cpu_affinity: Optional[List[int]] = None):
         super().__init__()
         
         self.embedding_model_name = embedding_model
+        self.exported_model = exported_model  # Pfad von ecapa_export (ONNX/TorchScript int8)
         self.clustering_threshold = clustering_threshold
         self.min_segment_duration = min_segment_duration
         self.max_speakers = max_speakers
@@ -211,7 +366,13 @@ class SpeakerRecognitionSystem(QObject):
         # Model loading
         self.embedding_model = None
         self.is_model_loaded = False
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.device = "cpu"  # SpeechBrain-Pfad: torch.device, gesetzt in _initialize_model
+        
+        # ECAPA optional in eigenem Prozess
+        self.use_worker_process = use_worker_process
+        self.worker_threads = worker_threads if worker_threads is not None else get_thread_budget().torch_threads
+        self.worker_cpu_affinity = worker_cpu_affinity
+        self.inference_worker = None
         
         # Online clustering
         self.online_cluster = OnlineSpeakerCluster(
@@ -225,10 +386,29 @@ class SpeakerRecognitionSystem(QObject):
         self.audio_buffer = collections.deque(maxlen=1000)
         self.embedding_buffer = collections.deque(maxlen=100)
         
-        # Threading für async processing
-        self.processing_queue = queue.Queue(maxsize=50)
+        # Sprachfenster auf der Sample-Uhr
+        self.windows = SpeechWindowAccumulator(sample_rate, window_duration, window_hop, min_segment_duration)
+        self.window_hop = window_hop
+        
+        # Threading für async processing: (start_sample|None, audio, timestamp, enqueued)
+        self.latency_budget = latency_budget
+        self.processing_queue = queue.Queue(maxsize=queue_size)
         self.is_processing = False
         self.processing_thread = None
+        self.windows_submitted = 0
+        self.windows_dropped = 0   # bei voller Queue verdrängt
+        self.windows_stale = 0     # Latenzbudget überschritten
+        
+        # Sprecherwechsel-Erkennung: Embeddings nur an Wechseln und alle keepalive Sekunden
+        self.change_detector = SpeakerChangeDetector(
+            sample_rate, keepalive=keepalive, penalty=change_penalty
+        ) if change_detection else None
+        self.windows_carried = 0   # Sprecher ohne Embedding fortgeschrieben
+        self._last_embedding = None  # (embedding, confidence) des letzten eingebetteten Fensters
+        
+        # Micro-Batching: bis zu batch_size Fenster je encode_batch, höchstens batch_timeout Wartezeit
+        self.batch_size = max(1, batch_size)
+        self.batch_timeout = batch_timeout
         
         # Speaker enrollment
         self.enrolled_speakers = {
@@ -236,18 +416,83 @@ class SpeakerRecognitionSystem(QObject):
             'patient': None
         }
         
+        # Alle Fenster-Embeddings der Sitzung (float16, chunkweise) für das Nachclustering
+        self.session_embeddings: Optional[ChunkedTable] = None
+        self.refine_threshold = refine_threshold
+        self.refine_pca_components = refine_pca_components
+        
+        # Persistente Stimmabdrücke: bekannte Sprecher ohne erneutes Enrollment erkennen
+        self.voiceprints = None
+        self.voiceprint_threshold = voiceprint_threshold
+        if voiceprint_directory:
+            try:
+                self.voiceprints = VoiceprintLibrary(voiceprint_directory)
+                logging.info(f"Stimmabdruck-Bibliothek geladen: {len(self.voiceprints)} Einträge")
+            except Exception as e:
+                logging.error(f"Stimmabdruck-Bibliothek nicht verfügbar: {e}")
+        
+        # Inhaltsadressierter Embedding-Cache (erneute Analyse, wiederholtes Enrollment)
+        self.embedding_cache = None
+        if embedding_cache_directory:
+            try:
+                self.embedding_cache = EmbeddingCache(
+                    embedding_cache_directory, self._embedding_model_key(),
+                    max_bytes=int(embedding_cache_mb * 1024 * 1024)
+                )
+                logging.info(f"Embedding-Cache geladen: {len(self.embedding_cache)} Einträge")
+            except Exception as e:
+                logging.error(f"Embedding-Cache nicht verfügbar: {e}")
+        
         # Performance monitoring
-        self.processing_times = collections.deque(maxlen=100)
+        self.processing_times = collections.deque(maxlen=100)  # Sekunden je Fenster
+        self.batch_sizes = collections.deque(maxlen=100)
         
         self._initialize_model()
     
+    def _embedding_model_key(self) -> str:
+        """Modellname plus Version für den Cache (exportiertes Artefakt: Pfad und Änderungszeit)"""
+        if self.exported_model:
+            path = os.path.abspath(self.exported_model)
+            return f"export:{path}:{os.path.getmtime(path) if os.path.exists(path) else 0}"
+        try:
+            from importlib.metadata import version
+            return f"{self.embedding_model_name}:speechbrain-{version('speechbrain')}"
+        except Exception:
+            return self.embedding_model_name
+    
     def _initialize_model(self):
         """ECAPA-TDNN Model initialization"""
-        if not SPEECHBRAIN_AVAILABLE:
-            logging.error("SpeechBrain nicht verfügbar - Speaker Recognition deaktiviert")
+        if self.use_worker_process:
+            self._initialize_worker_process()
+            return
+        
+        if self.exported_model:
+            try:
+                from ecapa_export import ExportedEcapaEncoder
+                self.embedding_model = ExportedEcapaEncoder(
+                    self.exported_model, num_threads=get_thread_budget().torch_threads,
+                    require_agreement=True
+                )
+                self.is_model_loaded = True
+                logging.info(f"Exportiertes ECAPA-Model geladen: {self.embedding_model.path}")
+                return
+            except Exception as e:
+                logging.error(f"Exportiertes ECAPA-Model nicht ladbar ({e}) - nutze SpeechBrain")
+        
+        # SpeechBrain (und torch) erst hier importieren: mit exportiertem Modell
+        # bleiben beide aus dem Prozess
+        try:
+            import torch
+            from speechbrain.pretrained import EncoderClassifier
+        except Exception as e:  # ImportError oder inkompatibles torchaudio beim Import
+            logging.error(f"SpeechBrain nicht verfügbar ({e}) - Speaker Recognition deaktiviert")
             return
         
         try:
+            self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+            # torch-Threads auf das zentrale Budget begrenzen
+            apply_torch_threads()
+            
             logging.info(f"Lade ECAPA-TDNN Model: {self.embedding_model_name}")
             self.embedding_model = EncoderClassifier.from_hparams(
                 source=self.embedding_model_name,
@@ -261,6 +506,36 @@ class SpeakerRecognitionSystem(QObject):
             logging.error(f"Fehler beim Laden des ECAPA-TDNN Models: {e}")
             self.is_model_loaded = False
     
+    def _initialize_worker_process(self):
+        """ECAPA-TDNN in eigenem Worker-Prozess laden"""
+        logging.info(f"Starte ECAPA-Worker-Prozess: {self.embedding_model_name}")
+        self.inference_worker = InferenceWorker(
+            WorkerConfig(
+                kind="ecapa",
+                model_name=self.embedding_model_name,
+                num_threads=self.worker_threads,
+                cpu_affinity=self.worker_cpu_affinity,
+                options={"savedir": f"models/{self.embedding_model_name.split('/')[-1]}",
+                         "exported_model": self.exported_model}
+            ),
+            ring_capacity=self.sample_rate * 60  # 60 s Audio im Flug
+        )
+        self.is_model_loaded = self.inference_worker.start(wait_timeout=300.0)
+        if self.is_model_loaded:
+            logging.info("ECAPA-Worker bereit")
+        else:
+            logging.error(f"ECAPA-Worker nicht verfügbar: {self.inference_worker.last_error}")
+    
+    def shutdown(self):
+        """Processing stoppen und Worker-Prozess beenden"""
+        self.stop_processing()
+        if self.embedding_cache is not None:
+            self.embedding_cache.flush()
+        if self.inference_worker:
+            self.inference_worker.stop()
+            self.inference_worker = None
+            self.is_model_loaded = False
+    
     def start_processing(self):
         """Start async processing thread"""
         if not self.is_model_loaded:
@@ -271,6 +546,10 @@ class SpeakerRecognitionSystem(QObject):
             return True
         
         self.is_processing = True
+        self.session_embeddings = None
+        self._last_embedding = None
+        if self.change_detector is not None:
+            self.change_detector.reset()
         self.processing_thread = threading.Thread(target=self._processing_loop)
         self.processing_thread.daemon = True
         self.processing_thread.start()
@@ -293,10 +572,16 @@ class SpeakerRecognitionSystem(QObject):
                 self.processing_queue.get_nowait()
             except queue.Empty:
                 break
+        self.windows.reset()
+        if self.change_detector is not None:
+            self.change_detector.reset()
+        if self.embedding_cache is not None:
+            self.embedding_cache.flush()
         
         logging.info("Speaker Recognition Processing gestoppt")
     
-    def process_audio_chunk(self, audio_data: np.ndarray, timestamp: datetime = None) -> Dict:
+    def process_audio_chunk(self, audio_data: np.ndarray, timestamp: datetime = None,
+                            start_sample: Optional[int] = None) -> Dict:
         """
         Process audio chunk für Speaker Recognition
         
@@ -310,78 +595,273 @@ class SpeakerRecognitionSystem(QObject):
             timestamp = datetime.now()
         
         # Audio zu processing queue hinzufügen (non-blocking)
+        item = (start_sample, audio_data.copy(), timestamp, time.monotonic())
+        self.windows_submitted += 1
         try:
-            self.processing_queue.put_nowait((audio_data.copy(), timestamp))
+            self.processing_queue.put_nowait(item)
         except queue.Full:
             # Queue voll - ältesten eintrag entfernen
             try:
                 self.processing_queue.get_nowait()
-                self.processing_queue.put_nowait((audio_data.copy(), timestamp))
-            except queue.Empty:
+                self.windows_dropped += 1
+                self.processing_queue.put_nowait(item)
+            except (queue.Empty, queue.Full):
                 pass
         
         # Aktuelle Speaker-Info zurückgeben
         return self._get_current_speaker_data()
     
+    def process_speech_segment(self, start_sample: int, audio_data: np.ndarray) -> Dict:
+        """
+        Sprachstück aus dem gemeinsamen Pipeline-VAD verarbeiten
+        
+        Passt als Listener für LiveTranscriber.add_speech_listener; so werden nur
+        Sprachbereiche eingebettet, keine Stille. Die Stücke werden zu Fenstern
+        fester Länge gesammelt, jedes volle Fenster wird eingereiht.
+        """
+        if not self.is_model_loaded or not self.is_processing:
+            return self._get_default_speaker_data()
+        
+        for window_start, window in self.windows.add(start_sample, audio_data):
+            self.process_audio_chunk(window, start_sample=window_start)
+        return self._get_current_speaker_data()
+    
+    def end_speech_segment(self):
+        """Sprachsegment beendet: Rest-Fenster des offenen Laufs einreihen"""
+        if not self.is_model_loaded or not self.is_processing:
+            return
+        
+        for window_start, window in self.windows.flush():
+            self.process_audio_chunk(window, start_sample=window_start)
+    
+    def _next_batch(self) -> List[Tuple]:
+        """
+        Bis zu batch_size Fenster aus der Queue holen
+        
+        Nach dem ersten Fenster wird höchstens batch_timeout auf weitere gewartet;
+        Fenster über dem Latenzbudget werden verworfen.
+        """
+        batch = [self.processing_queue.get(timeout=0.1)]
+        deadline = time.monotonic() + self.batch_timeout
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.processing_queue.get(timeout=remaining) if remaining > 0
+                             else self.processing_queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        now = time.monotonic()
+        fresh = [item for item in batch if now - item[3] <= self.latency_budget]
+        self.windows_stale += len(batch) - len(fresh)
+        return fresh
+    
     def _processing_loop(self):
-        """Async processing loop für Speaker Recognition"""
+        """Async processing loop für Speaker Recognition (ein encode_batch je Micro-Batch)"""
         while self.is_processing:
             try:
-                # Audio data aus queue abrufen
-                audio_data, timestamp = self.processing_queue.get(timeout=0.1)
+                batch = self._next_batch()
+                if not batch:
+                    continue
                 
-                # Speaker embedding extrahieren
+                # Nur Fenster an wahrscheinlichen Sprecherwechseln (bzw. Keep-alive) einbetten
+                embed = [self._needs_embedding(item[0], item[1]) for item in batch]
+                
+                # Speaker embeddings extrahieren
                 start_time = datetime.now()
-                embedding = self._extract_speaker_embedding(audio_data)
+                selected = [item[1] for item, needed in zip(batch, embed) if needed]
+                extracted = iter(self._extract_speaker_embeddings(selected) if selected else [])
+                processing_time = (datetime.now() - start_time).total_seconds()
+                if selected:
+                    self.batch_sizes.append(len(selected))
                 
-                if embedding is not None:
+                # Ergebnisse in Queue-Reihenfolge clustern und melden
+                for (start_sample, audio_data, timestamp, _), needed in zip(batch, embed):
+                    if not needed:
+                        self._carry_speaker(start_sample, audio_data)
+                        continue
+                    embedding = next(extracted)
+                    if embedding is None:
+                        continue
+                    
                     # Online clustering
+                    previous_speaker = self.online_cluster.current_speaker
                     speaker_id, confidence = self.online_cluster.update_cluster(
                         embedding, timestamp
                     )
                     
+                    # Sprechzeit: überlappende Fenster zählen nur mit ihrem Hop
+                    profile = self.online_cluster.speaker_profiles[speaker_id]
+                    profile.total_speaking_time += min(len(audio_data) / self.sample_rate, self.window_hop)
+                    self._match_voiceprint(speaker_id)
+                    
                     # Speaker type determination
                     speaker_type = self._determine_speaker_type(speaker_id)
                     
                     # Signal senden
                     self.speaker_detected.emit(speaker_id, confidence, speaker_type)
+                    if previous_speaker is not None and previous_speaker != speaker_id:
+                        self.speaker_changed.emit(previous_speaker, speaker_id)
+                    self._last_embedding = (embedding, float(confidence))
+                    if start_sample is not None:
+                        self._store_embedding(start_sample, len(audio_data), speaker_id, embedding)
+                        self.speaker_segment.emit(start_sample, start_sample + len(audio_data),
+                                                  speaker_id, float(confidence))
                     
-                    # Performance monitoring
-                    processing_time = (datetime.now() - start_time).total_seconds()
-                    self.processing_times.append(processing_time)
+                    # Performance monitoring (Kosten je eingebettetem Fenster)
+                    self.processing_times.append(processing_time / len(selected))
                 
             except queue.Empty:
                 continue
             except Exception as e:
                 logging.error(f"Fehler in Speaker Recognition processing loop: {e}")
     
+    def _needs_embedding(self, start_sample: Optional[int], audio_data: np.ndarray) -> bool:
+        """Wechseldetektor fragen; Fenster ohne Sample-Position werden immer eingebettet"""
+        if self.change_detector is None or start_sample is None:
+            return True
+        return self.change_detector.should_embed(start_sample, audio_data)
+    
+    def _carry_speaker(self, start_sample: int, audio_data: np.ndarray):
+        """Fenster ohne Embedding: aktuellen Sprecher fortschreiben"""
+        speaker_id = self.online_cluster.current_speaker
+        if speaker_id is None or self._last_embedding is None:
+            return  # vorheriges Embedding fehlgeschlagen - nichts fortzuschreiben
+        embedding, confidence = self._last_embedding
+        self.windows_carried += 1
+        profile = self.online_cluster.speaker_profiles[speaker_id]
+        profile.total_speaking_time += min(len(audio_data) / self.sample_rate, self.window_hop)
+        # Das letzte Embedding steht für das fortgeschriebene Fenster, damit das
+        # Nachclustering es zusammen mit seinem Abschnitt umlabelt
+        self._store_embedding(start_sample, len(audio_data), speaker_id, embedding)
+        self.speaker_segment.emit(start_sample, start_sample + len(audio_data), speaker_id, confidence)
+    
     def _extract_speaker_embedding(self, audio_data: np.ndarray) -> Optional[np.ndarray]:
         """ECAPA-TDNN Embedding extraction"""
+        return self._extract_speaker_embeddings([audio_data])[0]
+    
+    def _extract_speaker_embeddings(self, segments: List[np.ndarray]) -> List[Optional[np.ndarray]]:
+        """ECAPA-TDNN Embeddings mehrerer Segmente in einem Batch (None für ungültige Segmente)"""
+        embeddings: List[Optional[np.ndarray]] = [None] * len(segments)
         try:
             # Audio preprocessing
-            if len(audio_data) < self.sample_rate * self.min_segment_duration:
-                return None  # Zu kurzes segment
-            
-            # Ensure correct format
-            if audio_data.dtype != np.float32:
-                audio_data = audio_data.astype(np.float32)
+            prepared = {}
+            for index, audio_data in enumerate(segments):
+                if len(audio_data) < self.sample_rate * self.min_segment_duration:
+                    continue  # Zu kurzes segment
+                
+                # Ensure correct format
+                audio_data = np.asarray(audio_data, dtype=np.float32)
+                
+                # Normalize
+                peak = np.max(np.abs(audio_data))
+                if peak == 0:
+                    continue
+                prepared[index] = audio_data / peak
             
-            # Normalize
-            audio_data = audio_data / np.max(np.abs(audio_data))
+            if not prepared:
+                return embeddings
             
-            # Convert to tensor
-            audio_tensor = torch.tensor(audio_data).unsqueeze(0).to(self.device)
+            # Zuerst im Embedding-Cache nachsehen (gleiches Audio, gleiches Modell)
+            keys = {}
+            if self.embedding_cache is not None:
+                for index in list(prepared):
+                    keys[index] = audio_key(prepared[index])
+                    cached = self.embedding_cache.get(keys[index])
+                    if cached is not None:
+                        embeddings[index] = cached
+                        del prepared[index]
+                if not prepared:
+                    return embeddings
             
-            # Extract embedding
-            with torch.no_grad():
-                embedding = self.embedding_model.encode_batch(audio_tensor)
-                embedding = embedding.squeeze().cpu().numpy()
+            # Extract embeddings (im Worker-Prozess oder lokal)
+            indices = list(prepared)
+            if self.inference_worker is not None:
+                lengths = [len(prepared[index]) for index in indices]
+                result = self.inference_worker.submit(
+                    np.concatenate([prepared[index] for index in indices]), {"lengths": lengths}
+                ).result(timeout=10.0)
+                results = list(np.asarray(result))
+            else:
+                results = encode_batch_with_ecapa(
+                    self.embedding_model, [prepared[index] for index in indices], self.device
+                )
             
-            return embedding
+            for index, embedding in zip(indices, results):
+                embeddings[index] = embedding
+                if index in keys:
+                    self.embedding_cache.put(keys[index], embedding)
             
         except Exception as e:
             logging.error(f"Fehler bei Embedding-Extraktion: {e}")
-            return None
+        return embeddings
+    
+    def _store_embedding(self, start_sample: int, length: int, speaker_id: int, embedding: np.ndarray):
+        """Fenster-Embedding für das Nachclustering aufheben (~0.4 KB je Fenster bei 192 Dimensionen)"""
+        if self.session_embeddings is None:
+            dtype = np.dtype([('start', np.int64), ('end', np.int64), ('speaker', np.int16),
+                              ('embedding', np.float16, (len(embedding),))])
+            self.session_embeddings = ChunkedTable(dtype, chunk_size=4096)
+        self.session_embeddings.append((start_sample, start_sample + length, speaker_id,
+                                        np.asarray(embedding, dtype=np.float16)))
+    
+    def refine_speakers(self, distance_threshold: Optional[float] = None,
+                        pca_components: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Nachclustering aller Fenster der Sitzung (nach stop_processing aufrufen)
+        
+        Aufgespaltene Sprecher werden zusammengeführt; die neuen IDs werden auf
+        die Online-IDs abgebildet, damit gleichbleibende Sprecher ihre ID behalten.
+        
+        Returns:
+            (Fenster-Starts, neue Sprecher-IDs) für MarkerTimeline.relabel_speakers
+        """
+        if self.session_embeddings is None or len(self.session_embeddings) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        
+        rows = self.session_embeddings.rows()
+        start_time = time.perf_counter()
+        labels = refine_speaker_labels(
+            rows['embedding'],
+            online_labels=rows['speaker'],
+            distance_threshold=self.refine_threshold if distance_threshold is None else distance_threshold,
+            max_speakers=self.max_speakers,
+            pca_components=self.refine_pca_components if pca_components is None else pca_components
+        )
+        changed = int(np.count_nonzero(labels != rows['speaker']))
+        logging.info(f"Nachclustering: {len(np.unique(rows['speaker']))} -> {len(np.unique(labels))} Sprecher, "
+                     f"{changed}/{len(rows)} Fenster umbenannt ({time.perf_counter() - start_time:.2f}s)")
+        return rows['start'], labels
+    
+    def _match_voiceprint(self, speaker_id: int):
+        """Noch unbekannten Sprecher in der Stimmabdruck-Bibliothek suchen (Zentrum als Anfrage)"""
+        profile = self.online_cluster.speaker_profiles[speaker_id]
+        if self.voiceprints is None or profile.voiceprint is not None:
+            return
+        
+        match = self.voiceprints.identify(self.online_cluster.center(speaker_id), self.voiceprint_threshold)
+        if match is None:
+            return
+        
+        profile.voiceprint = match.name
+        profile.speaker_type = match.role
+        if match.role in self.enrolled_speakers:
+            self.enrolled_speakers[match.role] = speaker_id
+            self.speaker_enrolled.emit(speaker_id, match.role)
+        logging.info(f"Stimmabdruck erkannt: {match.name} ({match.role}) -> ID {speaker_id}, "
+                     f"Ähnlichkeit {match.similarity:.2f}")
+    
+    def remember_speaker(self, speaker_id: int, name: str, speaker_type: str = 'unknown') -> bool:
+        """Zentrum eines Sitzungs-Sprechers als Stimmabdruck speichern"""
+        if self.voiceprints is None or speaker_id not in self.online_cluster.speaker_profiles:
+            return False
+        
+        profile = self.online_cluster.speaker_profiles[speaker_id]
+        self.voiceprints.add(name, speaker_type, self.online_cluster.center(speaker_id),
+                             profile.confidence_mean, n_samples=profile.n_confidences)
+        profile.voiceprint = name
+        profile.speaker_type = speaker_type
+        return True
     
     def _determine_speaker_type(self, speaker_id: int) -> str:
         """Bestimme Speaker-Type basierend auf patterns"""
@@ -396,22 +876,23 @@ class SpeakerRecognitionSystem(QObject):
             
             # Heuristic basierend auf speaking patterns
             if profile.total_speaking_time > 30.0:  # Viel geredet = wahrscheinlich Therapeut
-                if len(profile.confidence_history) > 10:
-                    avg_confidence = np.mean(profile.confidence_history[-10:])
-                    if avg_confidence > 0.8:
+                if profile.n_confidences > 10:
+                    if profile.recent_confidence(10) > 0.8:
                         return 'therapist'
             
             return 'unknown'
         
         return 'unknown'
     
-    def enroll_speaker(self, speaker_type: str, audio_samples: List[np.ndarray]) -> bool:
+    def enroll_speaker(self, speaker_type: str, audio_samples: List[np.ndarray],
+                       name: Optional[str] = None) -> bool:
         """
         Speaker Enrollment für bekannte Therapeut/Patient
         
         Args:
             speaker_type: 'therapist' oder 'patient'
             audio_samples: List von audio chunks für enrollment
+            name: Name für die Stimmabdruck-Bibliothek (sonst nur für diese Sitzung)
         """
         if not self.is_model_loaded:
             return False
@@ -440,6 +921,13 @@ class SpeakerRecognitionSystem(QObject):
             # Update enrollment
             self.enrolled_speakers[speaker_type] = speaker_id
             
+            # Dauerhaft speichern; Qualität = Konsistenz der Enrollment-Embeddings
+            if self.voiceprints is not None and name:
+                normalized = np.asarray(embeddings) / np.linalg.norm(embeddings, axis=1, keepdims=True)
+                quality = float(np.mean(normalized @ avg_embedding))
+                self.voiceprints.add(name, speaker_type, avg_embedding, quality, n_samples=len(embeddings))
+                self.online_cluster.speaker_profiles[speaker_id].voiceprint = name
+            
             # Signal senden
             self.speaker_enrolled.emit(speaker_id, speaker_type)
             
@@ -455,21 +943,16 @@ class SpeakerRecognitionSystem(QObject):
                                        embeddings: List[np.ndarray]) -> int:
         """Finde bestehenden oder erstelle neuen enrolled speaker"""
         # Check existing speakers
-        best_match = None
-        best_similarity = 0.0
-        
-        for speaker_id, center in self.online_cluster.cluster_centers.items():
-            similarity = cosine_similarity([avg_embedding], [center])[0][0]
-            if similarity > best_similarity and similarity > 0.8:  # High threshold für enrollment
-                best_similarity = similarity
-                best_match = speaker_id
+        best_match, best_similarity = self.online_cluster.best_match(avg_embedding)
+        if best_similarity <= 0.8:  # High threshold für enrollment
+            best_match = None
         
         if best_match is not None:
             # Update existing speaker
             profile = self.online_cluster.speaker_profiles[best_match]
             profile.speaker_type = speaker_type
-            profile.enrollment_embeddings.extend(embeddings)
-            profile.average_embedding = avg_embedding
+            for embedding in embeddings:
+                profile.add_embedding(self.online_cluster._normalize(embedding))
             return best_match
         else:
             # Create new speaker
@@ -477,8 +960,8 @@ class SpeakerRecognitionSystem(QObject):
             speaker_id = self.online_cluster._create_new_speaker(avg_embedding, timestamp)
             profile = self.online_cluster.speaker_profiles[speaker_id]
             profile.speaker_type = speaker_type
-            profile.enrollment_embeddings = embeddings
-            profile.average_embedding = avg_embedding
+            for embedding in embeddings:
+                profile.add_embedding(self.online_cluster._normalize(embedding))
             return speaker_id
     
     def get_current_speaker_data(self) -> Dict:
@@ -491,7 +974,7 @@ class SpeakerRecognitionSystem(QObject):
         
         if current_speaker is not None and current_speaker in self.online_cluster.speaker_profiles:
             profile = self.online_cluster.speaker_profiles[current_speaker]
-            confidence = np.mean(profile.confidence_history[-5:]) if profile.confidence_history else 0.0
+            confidence = profile.recent_confidence(5)
             
             return {
                 'speaker_id': current_speaker,
@@ -515,15 +998,25 @@ class SpeakerRecognitionSystem(QObject):
     
     def get_performance_stats(self) -> Dict:
         """Performance-Statistiken"""
+        queue_stats = {
+            'windows_submitted': self.windows_submitted,
+            'windows_dropped': self.windows_dropped,
+            'windows_stale': self.windows_stale,
+            'windows_carried': self.windows_carried,
+            **({'embedding_cache': self.embedding_cache.stats()} if self.embedding_cache is not None else {}),
+            'queue_size': self.processing_queue.qsize(),
+            'avg_batch_size': float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0
+        }
         if not self.processing_times:
-            return {'avg_processing_time': 0.0, 'max_processing_time': 0.0}
+            return {'avg_processing_time': 0.0, 'max_processing_time': 0.0, **queue_stats}
         
         times = list(self.processing_times)
         return {
             'avg_processing_time': np.mean(times),
             'max_processing_time': np.max(times),
             'min_processing_time': np.min(times),
-            'processing_samples': len(times)
+            'processing_samples': len(times),
+            **queue_stats
         }
     
     def is_real_time_capable(self) -> bool:
@@ -542,9 +1035,10 @@ class SpeakerRecognitionSystem(QObject):
             profiles[speaker_id] = {
                 'speaker_id': profile.speaker_id,
                 'speaker_type': profile.speaker_type,
-                'confidence_avg': np.mean(profile.confidence_history) if profile.confidence_history else 0.0,
+                'confidence_avg': profile.confidence_mean,
                 'last_seen': profile.last_seen.isoformat() if profile.last_seen else None,
                 'total_speaking_time': profile.total_speaking_time,
-                'enrollment_samples': len(profile.enrollment_embeddings)
+                'enrollment_samples': profile.n_embeddings,
+                'voiceprint': profile.voiceprint
             }
         return profiles
\ No newline at end of file
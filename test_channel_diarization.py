@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test der Kanalenergie-Diarisierung
+"""
+
+import numpy as np
+
+from channel_diarization import ChannelEnergyDiarizer, apply_hysteresis
+
+SR = 16000
+
+
+def test_hysteresis_suppresses_short_runs_and_keeps_open_tail():
+    candidates = np.array([0, 0, -1, 1, 0, 0, 1, 1, 1, 1, -1, 1, 0, 0])
+    labels, open_from = apply_hysteresis(candidates, current=0, min_frames=4)
+    np.testing.assert_array_equal(labels[:12], [0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1])
+    # Letzter Lauf (Sprecher 0, 2 Frames) ist noch offen
+    assert open_from == 12
+
+
+def test_dominant_microphone_with_crosstalk_and_backchannel():
+    rng = np.random.default_rng(0)
+    # Turns: (Sprecher, Start, Ende) in Sekunden; 0.1 s "mhm" von Sprecher 1 in Turn 1
+    turns = [(0, 0.5, 4.0), (1, 4.3, 7.0), (0, 7.2, 9.5)]
+    backchannel = (1, 2.0, 2.1)
+    speech = np.zeros((10 * SR, 2), dtype=np.float32)
+    for speaker, start, end in turns + [backchannel]:
+        voice = rng.standard_normal(int((end - start) * SR)).astype(np.float32) * 0.1
+        speech[int(start * SR):int(end * SR), speaker] += voice
+        speech[int(start * SR):int(end * SR), 1 - speaker] += 0.4 * voice  # Übersprechen (-8 dB)
+    speech += 0.001 * rng.standard_normal(speech.shape).astype(np.float32)
+
+    diarizer = ChannelEnergyDiarizer(SR, crosstalk=0.3, min_switch=0.3)
+    segments, changes = [], []
+    diarizer.speaker_segment.connect(lambda start, end, speaker, confidence: segments.append((start, end, speaker)))
+    diarizer.speaker_changed.connect(lambda old, new: changes.append((old, new)))
+    diarizer.start_processing()
+
+    # Sprachstücke wie vom VAD: je Turn in 1-s-Stücken, Segmentende nach dem Turn
+    pieces = []
+    for _, start, end in turns:
+        for piece in np.arange(start, end, 1.0):
+            piece_end = min(piece + 1.0, end)
+            pieces.append((int(piece * SR), int(piece_end * SR), piece_end == end))
+    for block_start in range(0, len(speech), 1024):
+        diarizer.process_channels(block_start, speech[block_start:block_start + 1024])
+        block_end = min(block_start + 1024, len(speech))
+        while pieces and pieces[0][1] <= block_end:
+            start, end, last = pieces.pop(0)
+            diarizer.process_speech_segment(start, np.zeros(end - start, dtype=np.float32))
+            if last:
+                diarizer.end_speech_segment()
+
+    assert changes == [(0, 1), (1, 0)]
+    frame = diarizer.frame_length
+    for speaker, start, end in turns:
+        covered = sum(min(e, end * SR) - max(s, start * SR) for s, e, spk in segments
+                      if spk == speaker and s < end * SR and e > start * SR)
+        assert covered >= (end - start) * SR - 2 * frame
+    # Nur Sprachbereiche werden gemeldet
+    assert all(any(s >= int(a * SR) - frame and e <= int(b * SR) + frame for _, a, b in turns)
+               for s, e, _ in segments)
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test der DSP-Kernel gegen librosa (Referenz, optional)
+"""
+
+import numpy as np
+import pytest
+import dsp
+
+librosa = pytest.importorskip("librosa")
+
+SR = 16000
+
+
+@pytest.fixture
+def signal():
+    t = np.arange(2 * SR) / SR
+    noise = 0.05 * np.random.default_rng(0).standard_normal(len(t))
+    y = 0.4 * np.sin(2 * np.pi * 180 * t) + 0.2 * np.sin(2 * np.pi * 360 * t) + noise
+    y[5000:7000] = 0.0  # digitale Stille (Sonderfälle bei ZCR und Normierung)
+    return y.astype(np.float32)
+
+
+def test_stft_and_frame_features_match_librosa(signal):
+    kwargs = dict(n_fft=512, hop_length=256)
+    np.testing.assert_allclose(dsp.stft(signal, **kwargs), librosa.stft(signal, **kwargs), atol=1e-4)
+    np.testing.assert_allclose(dsp.rms(y=signal), librosa.feature.rms(y=signal), rtol=1e-5)
+    np.testing.assert_allclose(dsp.zero_crossing_rate(signal), librosa.feature.zero_crossing_rate(signal))
+    np.testing.assert_allclose(dsp.spectral_centroid(y=signal, sr=SR, **kwargs),
+                               librosa.feature.spectral_centroid(y=signal, sr=SR, **kwargs), rtol=1e-4)
+    np.testing.assert_array_equal(dsp.spectral_rolloff(y=signal, sr=SR, **kwargs),
+                                  librosa.feature.spectral_rolloff(y=signal, sr=SR, **kwargs))
+
+
+def test_piptrack_matches_librosa(signal):
+    pitches, magnitudes = dsp.piptrack(y=signal, sr=SR, fmin=80, fmax=400, threshold=0.1)
+    ref_pitches, ref_magnitudes = librosa.piptrack(y=signal, sr=SR, fmin=80, fmax=400, threshold=0.1)
+    np.testing.assert_array_equal(pitches > 0, ref_pitches > 0)
+    np.testing.assert_allclose(pitches, ref_pitches, rtol=1e-4, atol=1e-3)
+    np.testing.assert_allclose(magnitudes, ref_magnitudes, rtol=1e-4, atol=1e-3)
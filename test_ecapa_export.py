@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test des exportierbaren ECAPA-Graphen und der Export-Laufzeit
+"""
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from ecapa_export import (ExportedEcapaEncoder, dft_basis, dft_stft, sentence_normalize,
+                          traceable_length_to_mask)
+from inference_workers import encode_batch_with_ecapa
+
+
+def test_dft_convolution_matches_torch_stft():
+    wavs = torch.from_numpy(np.random.default_rng(0).standard_normal((2, 7999)).astype(np.float32))
+    window = torch.hamming_window(400)
+
+    expected = torch.view_as_real(torch.stft(
+        wavs, 400, 160, 400, window=window, center=True, pad_mode='constant', return_complex=True
+    )).transpose(1, 2)
+    result = dft_stft(wavs, dft_basis(window, 400), 160)
+
+    assert result.shape == expected.shape
+    assert torch.allclose(result, expected, atol=2e-3)
+
+
+def test_sentence_normalization_ignores_padding_frames():
+    feats = torch.randn(2, 10, 4)
+    feats[1, 5:] = 100.0  # Padding
+    normalized = sentence_normalize(feats, torch.tensor([1.0, 0.5]))
+
+    assert torch.allclose(normalized[0], feats[0] - feats[0].mean(dim=0))
+    assert torch.allclose(normalized[1, :5], feats[1, :5] - feats[1, :5].mean(dim=0))
+
+
+class _MaskedMean(torch.nn.Module):
+    def forward(self, wavs: torch.Tensor, wav_lens: torch.Tensor) -> torch.Tensor:
+        valid = torch.round(wav_lens * wavs.shape[1])
+        mask = (torch.arange(wavs.shape[1])[None, :] < valid[:, None]).float()
+        mean = (wavs * mask).sum(dim=1) / valid
+        return torch.stack([mean, valid], dim=1).unsqueeze(1)
+
+
+def test_exported_torchscript_encoder_runs_batches_with_numpy_io(tmp_path):
+    path = str(tmp_path / "model.pt")
+    torch.jit.trace(_MaskedMean(), (torch.zeros(2, 100), torch.ones(2))).save(path)
+    encoder = ExportedEcapaEncoder(path)
+
+    segments = [np.full(n, float(n), dtype=np.float32) for n in (300, 1000, 900, 280)]
+    embeddings = encode_batch_with_ecapa(encoder, segments, "cpu")
+
+    for segment, embedding in zip(segments, embeddings):
+        np.testing.assert_allclose(embedding, [len(segment), len(segment)], rtol=1e-5)
+
+
+class _MaskedSum(torch.nn.Module):
+    def forward(self, x: torch.Tensor, lengths: torch.Tensor) -> torch.Tensor:
+        mask = traceable_length_to_mask(lengths * x.shape[1], max_len=x.shape[1])
+        return (x * mask).sum(dim=1)
+
+
+def test_traced_masks_follow_the_batch_size():
+    """Die Batch-Größe des Beispiels darf nicht als Konstante im Graphen landen"""
+    traced = torch.jit.trace(_MaskedSum(), (torch.ones(2, 10), torch.ones(2)), check_trace=False)
+    result = traced(torch.ones(5, 8), torch.tensor([1.0, 0.5, 0.25, 1.0, 0.75]))
+    np.testing.assert_allclose(result.numpy(), [8, 4, 2, 8, 6])
+
+
+def test_speaker_runtime_requires_passed_agreement(tmp_path):
+    """Die Sprechererkennung lädt nur Exporte mit bestandener Prüfung gegen float32"""
+    import json
+    from ecapa_export import METADATA_FILE
+
+    torch.jit.trace(_MaskedMean(), (torch.zeros(2, 100), torch.ones(2))).save(str(tmp_path / "model.pt"))
+    with pytest.raises(ValueError):
+        ExportedEcapaEncoder(str(tmp_path / "model.pt"), require_agreement=True)
+
+    metadata = {"artifact": "model.pt", "agreement": {"mean": 0.95, "min": 0.9, "segments": 8}}
+    (tmp_path / METADATA_FILE).write_text(json.dumps(metadata))
+    with pytest.raises(ValueError):
+        ExportedEcapaEncoder(str(tmp_path), require_agreement=True)
+
+    metadata["agreement"] = {"mean": 0.998, "min": 0.991, "segments": 8}
+    (tmp_path / METADATA_FILE).write_text(json.dumps(metadata))
+    assert ExportedEcapaEncoder(str(tmp_path), require_agreement=True).format == "torchscript"
+
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test des inhaltsadressierten Embedding-Caches
+"""
+
+import numpy as np
+import pytest
+
+from embedding_cache import EmbeddingCache, audio_key
+
+
+def test_cache_persists_per_model_and_evicts_least_recently_used(tmp_path):
+    rng = np.random.default_rng(0)
+    windows = [rng.uniform(-1, 1, 24000).astype(np.float32) for _ in range(40)]
+    embeddings = rng.standard_normal((40, 192)).astype(np.float32)
+
+    # Platz für 32 Einträge; nach 32 Einfügungen Fenster 0 erneut benutzen
+    cache = EmbeddingCache(str(tmp_path), "ecapa:v1", max_bytes=32 * 192 * 2, evict_fraction=0.125)
+    for window, embedding in zip(windows[:32], embeddings[:32]):
+        cache.put(audio_key(window), embedding)
+    assert cache.get(audio_key(windows[0])) is not None
+    for window, embedding in zip(windows[32:], embeddings[32:]):
+        cache.put(audio_key(window), embedding)
+    cache.flush()
+
+    reopened = EmbeddingCache(str(tmp_path), "ecapa:v1", max_bytes=32 * 192 * 2)
+    assert len(reopened) == 32
+    np.testing.assert_allclose(reopened.get(audio_key(windows[0])), embeddings[0], rtol=1e-3, atol=1e-3)
+    np.testing.assert_allclose(reopened.get(audio_key(windows[39])), embeddings[39], rtol=1e-3, atol=1e-3)
+    # Die ältesten unbenutzten Einträge wurden verdrängt
+    assert reopened.get(audio_key(windows[1])) is None
+
+    # Anderes Modell, anderer Cache; anderes Audio, anderer Schlüssel
+    assert EmbeddingCache(str(tmp_path), "ecapa:v2").get(audio_key(windows[0])) is None
+    assert audio_key(windows[0]) != audio_key(windows[0] * 0.5)
+
+
+def test_speaker_system_reuses_cached_embeddings(tmp_path):
+    pytest.importorskip("torch")
+    from src.speaker_recognition import SpeakerRecognitionSystem
+
+    class CountingEncoder:
+        numpy_io = True
+        calls = 0
+
+        def encode_batch(self, wavs, wav_lens):
+            CountingEncoder.calls += len(wavs)
+            return wavs[:, :192].reshape(len(wavs), 1, 192)
+
+    system = SpeakerRecognitionSystem(embedding_cache_directory=str(tmp_path))
+    system.embedding_model = CountingEncoder()
+    rng = np.random.default_rng(1)
+    windows = [rng.uniform(-1, 1, 24000).astype(np.float32) for _ in range(4)]
+
+    first = system._extract_speaker_embeddings(windows)
+    second = system._extract_speaker_embeddings(windows[:2] + [rng.uniform(-1, 1, 24000).astype(np.float32)])
+
+    assert CountingEncoder.calls == 5
+    np.testing.assert_allclose(second[0], first[0], atol=1e-3)
+    assert system.embedding_cache.stats()['hits'] == 2
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test des gemeinsamen Frame-Front-Ends
+"""
+
+import numpy as np
+from ring_buffer import AudioRingBuffer
+from feature_frontend import FeatureFrontEnd
+from pitch_tracker import yin_frames
+
+
+def _test_signal(seconds=2.0, sample_rate=16000):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    rng = np.random.default_rng(0)
+    return (0.5 * np.sin(2 * np.pi * 220 * t) + 0.05 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def test_incremental_matches_single_update():
+    """Blockweise Updates liefern dieselben Frames wie ein einziger Update-Aufruf"""
+    signal = _test_signal()
+
+    ring_a, frontend_a = AudioRingBuffer(32000), FeatureFrontEnd(window_frames=61)
+    for i in range(0, len(signal), 1024):
+        ring_a.write(signal[i:i + 1024])
+        frontend_a.update(ring_a)
+
+    ring_b, frontend_b = AudioRingBuffer(32000), FeatureFrontEnd(window_frames=61)
+    ring_b.write(signal)
+    frontend_b.update(ring_b)
+
+    a, b = frontend_a.window_features(), frontend_b.window_features()
+    assert a.n_frames == b.n_frames == 61
+    np.testing.assert_array_equal(a.frame_starts, b.frame_starts)
+    np.testing.assert_allclose(a.magnitudes, b.magnitudes, rtol=1e-5, atol=1e-5)
+    np.testing.assert_allclose(a.rms, b.rms, rtol=1e-5)
+
+
+def test_spectral_features_of_pure_tone():
+    """Schwerpunkt eines reinen Tons liegt nahe seiner Frequenz"""
+    t = np.arange(16000) / 16000
+    tone = np.sin(2 * np.pi * 1000 * t).astype(np.float32)
+
+    ring, frontend = AudioRingBuffer(16000), FeatureFrontEnd(window_frames=61)
+    ring.write(tone)
+    frontend.update(ring)
+    features = frontend.window_features()
+
+    assert abs(np.median(features.centroid) - 1000) < 60
+    np.testing.assert_allclose(features.rms, 1 / np.sqrt(2), rtol=0.02)
+
+
+def test_pitch_frames_share_spectral_frame_centers():
+    """f0[i] wird um dieselbe Mitte berechnet wie rms[i] (längerer YIN-Frame, gleiche Frame-Mitte)"""
+    t = np.arange(24000) / 16000
+    signal = np.where(t < 0.75, np.sin(2 * np.pi * 150 * t), np.sin(2 * np.pi * 250 * t)).astype(np.float32)
+
+    ring, frontend = AudioRingBuffer(32000), FeatureFrontEnd(window_frames=61)
+    for i in range(0, len(signal), 1000):
+        ring.write(signal[i:i + 1000])
+        frontend.update(ring)
+    features = frontend.window_features()
+
+    assert features.n_frames == 61
+    half = frontend.pitch_tracker.frame_length // 2
+    centers = features.frame_starts + frontend.n_fft // 2
+    pitch_frames = np.stack([signal[c - half:c + half] for c in centers])
+    expected, _ = yin_frames(pitch_frames, 16000)
+    np.testing.assert_allclose(features.f0, expected, rtol=1e-4)
+
+
+if __name__ == "__main__":
+    test_incremental_matches_single_update()
+    test_spectral_features_of_pure_tone()
+    test_pitch_frames_share_spectral_frame_centers()
+    print("Front-End-Tests erfolgreich")
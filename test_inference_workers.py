@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test des Shared-Memory-Ring-Buffers für Inferenz-Worker
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from inference_workers import (InferenceWorker, SharedAudioRing, WorkerConfig, WorkerCrashedError,
+                               encode_batch_with_ecapa, length_buckets)
+
+
+def test_ring_roundtrip_with_wraparound():
+    """Geschriebene Blöcke werden auch über die Ring-Grenze hinweg korrekt gelesen"""
+    ring = SharedAudioRing(capacity=1000)
+    try:
+        reader = SharedAudioRing(capacity=1000, name=ring.name, create=False)
+
+        first = np.arange(700, dtype=np.float32)
+        second = np.arange(700, 1300, dtype=np.float32)
+        assert ring.write(first) == 0
+        assert ring.write(second) == 700
+
+        block = reader.read(700, 600)
+        assert block is not None
+        np.testing.assert_array_equal(block, second)
+
+        reader.close()
+    finally:
+        ring.close()
+        ring.unlink()
+
+
+def test_ring_detects_overwritten_and_future_ranges():
+    """Überschriebene oder noch nicht geschriebene Bereiche liefern None"""
+    ring = SharedAudioRing(capacity=100)
+    try:
+        ring.write(np.zeros(80, dtype=np.float32))
+        ring.write(np.ones(80, dtype=np.float32))
+
+        assert ring.read(0, 10) is None       # bereits überschrieben
+        assert ring.read(150, 20) is None     # noch nicht geschrieben
+        np.testing.assert_array_equal(ring.read(80, 80), np.ones(80, dtype=np.float32))
+    finally:
+        ring.close()
+        ring.unlink()
+
+
+class _HookedArray(np.ndarray):
+    """Ruft nach dem ersten Slice-Zugriff einen Rückruf auf (simuliert den anderen Prozess)"""
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._fire()
+
+    def __getitem__(self, key):
+        result = super().__getitem__(key)
+        self._fire()
+        return result
+
+    def _fire(self):
+        hook = getattr(self, 'hook', None)
+        if hook is not None:
+            self.hook = None
+            hook()
+
+
+def _hook(array, callback):
+    view = array.view(_HookedArray)
+    view.hook = callback
+    return view
+
+
+def test_ring_detects_read_interleaved_with_write():
+    """Ein Lesevorgang, der sich mit einem Schreibvorgang überschneidet, liefert None statt gemischter Daten"""
+    ring = SharedAudioRing(capacity=100)
+    try:
+        reader = SharedAudioRing(capacity=100, name=ring.name, create=False)
+        ring.write(np.zeros(100, dtype=np.float32))
+
+        # Leser kommt, während der Schreiber mitten im Kopieren ist (total_written noch alt)
+        results = []
+        ring._data = _hook(ring._data, lambda: results.append(reader.read(0, 60)))
+        ring.write(np.ones(50, dtype=np.float32))
+        assert ring.total_written == 150
+        assert results == [None]
+
+        # Schreiber überholt einen laufenden Lesevorgang
+        reader._data = _hook(reader._data, lambda: ring.write(np.full(30, 2, dtype=np.float32)))
+        assert reader.read(50, 60) is None
+        np.testing.assert_array_equal(reader.read(120, 60)[-30:], np.full(30, 2, dtype=np.float32))
+
+        reader.close()
+    finally:
+        ring.close()
+        ring.unlink()
+
+
+class _MeanEncoder:
+    """Embedding = Mittelwert der gültigen Samples (prüft wav_lens und Reihenfolge)"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode_batch(self, wavs, wav_lens):
+        import torch
+        self.calls += 1
+        lengths = (wav_lens * wavs.shape[1]).round().long()
+        means = [wavs[row, :length].mean() for row, length in enumerate(lengths)]
+        return torch.stack(means).reshape(-1, 1, 1)
+
+
+def test_batched_embeddings_scatter_back_in_order():
+    """Ein encode_batch je Längen-Bucket, Padding fließt nicht ein"""
+    segments = [np.full(n, value, dtype=np.float32) for n, value in
+                [(24000, 1.0), (16000, 2.0), (23000, 3.0), (4000, 4.0), (20000, 5.0)]]
+    assert length_buckets([len(s) for s in segments]) == [[0, 2, 4], [1], [3]]
+
+    model = _MeanEncoder()
+    embeddings = encode_batch_with_ecapa(model, segments, "cpu")
+    assert model.calls == 3
+    np.testing.assert_allclose([e[0] for e in embeddings], [1.0, 2.0, 3.0, 4.0, 5.0])
+
+
+def _summing_handler(config):
+    """Test-Handler im Worker: Summe des Audios, Absturz oder Fehler auf Anfrage"""
+    def handle(audio, params):
+        if params.get("crash"):
+            os._exit(3)
+        if params.get("fail"):
+            raise ValueError("absichtlicher Fehler")
+        return float(audio.sum())
+    return handle
+
+
+def _broken_factory(config):
+    raise RuntimeError("Modell fehlt")
+
+
+def test_worker_results_errors_and_crash_restart():
+    """Ergebnisse und Fehler kommen an; Abstürze lassen offene Jobs scheitern und starten neu"""
+    worker = InferenceWorker(WorkerConfig(kind="test", model_name="", factory=_summing_handler),
+                             ring_capacity=10000, max_restarts=1)
+    try:
+        assert worker.start(wait_timeout=60)
+        assert worker.submit(np.ones(100, dtype=np.float32)).result(timeout=30) == 100.0
+        with pytest.raises(RuntimeError, match="absichtlicher Fehler"):
+            worker.submit(np.ones(10, dtype=np.float32), {"fail": True}).result(timeout=30)
+
+        # Erster Absturz: Job scheitert, Worker startet neu und rechnet weiter
+        with pytest.raises(WorkerCrashedError):
+            worker.submit(np.ones(10, dtype=np.float32), {"crash": True}).result(timeout=30)
+        assert worker.wait_ready(60)
+        assert worker.restart_count == 1
+        assert worker.submit(np.full(50, 2.0, dtype=np.float32)).result(timeout=30) == 100.0
+
+        # Zweiter Absturz überschreitet max_restarts: Worker gibt auf
+        with pytest.raises(WorkerCrashedError):
+            worker.submit(np.ones(10, dtype=np.float32), {"crash": True}).result(timeout=30)
+        worker.wait_ready(30)
+        assert not worker.is_ready
+        assert "aufgegeben" in worker.last_error
+        with pytest.raises(WorkerCrashedError):
+            worker.submit(np.ones(10, dtype=np.float32)).result(timeout=5)
+    finally:
+        worker.stop()
+
+
+def test_worker_reports_model_load_failure():
+    """Kann das Modell nicht geladen werden, scheitert start() ohne Neustartschleife"""
+    worker = InferenceWorker(WorkerConfig(kind="test", model_name="", factory=_broken_factory),
+                             ring_capacity=1000)
+    try:
+        assert not worker.start(wait_timeout=60)
+        assert "Modell fehlt" in worker.last_error
+        assert worker.restart_count == 0
+        with pytest.raises(WorkerCrashedError):
+            worker.submit(np.ones(10, dtype=np.float32)).result(timeout=5)
+    finally:
+        worker.stop()
+
+
+if __name__ == "__main__":
+    test_ring_roundtrip_with_wraparound()
+    test_ring_detects_overwritten_and_future_ranges()
+    test_batched_embeddings_scatter_back_in_order()
+    test_worker_results_errors_and_crash_restart()
+    test_worker_reports_model_load_failure()
+    print("Ring-Buffer-Tests erfolgreich")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test der gebündelten Marker-Auslieferung
+"""
+
+import numpy as np
+import pytest
+from PyQt6.QtCore import QCoreApplication
+from marker_system import MarkerSystem
+from marker_publisher import MarkerPublisher, MarkerSnapshot
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def _voice(seconds, sample_rate=16000):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return sum((0.3 / k) * np.sin(2 * np.pi * k * 150 * t) for k in range(1, 5)).astype(np.float32)
+
+
+def test_many_hops_coalesce_into_one_snapshot(app):
+    marker_system = MarkerSystem(sample_rate=16000)
+    publisher = MarkerPublisher(marker_system)
+    snapshots, emotions = [], []
+    publisher.markers_updated.connect(snapshots.append)
+    publisher.emotion_detected.connect(lambda e, c: emotions.append(e))
+
+    marker_system.is_active = True
+    signal = _voice(3.0)
+    for i in range(0, len(signal), 1024):
+        marker_system.process_audio_chunk(signal[i:i + 1024])
+
+    publisher.flush()
+    publisher.flush()  # unveränderter Snapshot wird nicht erneut gesendet
+
+    assert len(snapshots) == 1
+    assert isinstance(snapshots[0], MarkerSnapshot)
+    assert snapshots[0].sample == marker_system.current_markers['sample'] > 0
+    assert abs(snapshots[0].pitch_mean - 150) < 5
+    assert not hasattr(snapshots[0], '__dict__')
+    assert len(emotions) == 1
+
+
+def test_emotion_only_on_change_and_pauses_forwarded(app):
+    marker_system = MarkerSystem(sample_rate=16000)
+    publisher = MarkerPublisher(marker_system)
+    snapshots, emotions, pauses = [], [], []
+    publisher.markers_updated.connect(snapshots.append)
+    publisher.emotion_detected.connect(lambda e, c: emotions.append(e))
+    publisher.pause_detected.connect(pauses.append)
+
+    marker_system.is_active = True
+    signal = _voice(4.0)
+    for i in range(0, len(signal), 4000):
+        marker_system.process_audio_chunk(signal[i:i + 4000])
+        publisher.flush()
+
+    marker_system.pause_detected.emit(1.5)
+    publisher.flush()
+
+    # gleichbleibender Ton: nur die ersten Confidence-Schritte der Glättung werden gemeldet
+    assert set(emotions) == {'neutral'}
+    assert len(emotions) < len(snapshots)
+    assert pauses == [1.5]
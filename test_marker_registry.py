@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test der Marker-Plugins und des Schedulers
+"""
+
+import time
+import numpy as np
+from marker_system import MarkerSystem
+from marker_registry import FunctionMarker, MarkerSpec
+
+SR = 16000
+
+
+def _feed(marker_system, seconds):
+    t = np.arange(int(seconds * SR)) / SR
+    signal = (0.3 * np.sin(2 * np.pi * 150 * t)).astype(np.float32)
+    for i in range(0, len(signal), marker_system.hop_size):
+        marker_system.process_audio_chunk(signal[i:i + marker_system.hop_size])
+
+
+def test_custom_marker_runs_at_declared_hop():
+    marker_system = MarkerSystem(sample_rate=SR)
+    marker_system.is_active = True
+    calls = []
+
+    def loudness(context):
+        calls.append(context.sample)
+        return {'db': float(20 * np.log10(np.mean(context.features.rms) + 1e-10))}
+
+    marker_system.register_marker(FunctionMarker(
+        MarkerSpec('loudness', hop=0.5, window=0.5, inputs=('rms',), schema={'db': -100.0}), loudness
+    ))
+    assert marker_system.current_markers['loudness']['db'] == -100.0
+
+    _feed(marker_system, 5.0)
+    stats = marker_system.registry.stats()
+    assert stats['loudness']['calls'] == (stats['affect']['calls'] + 1) // 2
+    assert np.all(np.diff(calls) == SR // 2)
+    assert marker_system.current_markers['loudness']['db'] > -20
+
+
+def test_f0_is_computed_lazily_and_charged_to_its_consumers():
+    """F0 nur für fällige f0-Marker; die Front-End-Zeit landet in deren Kosten"""
+    marker_system = MarkerSystem(sample_rate=SR)
+    marker_system.is_active = True
+    registry, frontend = marker_system.registry, marker_system.frontend
+
+    update_pitch = frontend.update_pitch
+    frontend.update_pitch = lambda ring: time.sleep(0.005) or update_pitch(ring)
+    _feed(marker_system, 2.0)
+
+    stats = registry.stats()
+    assert stats['prosody']['avg_ms'] >= 5.0
+    assert stats['affect']['avg_ms'] < 5.0
+    assert stats['tempo']['avg_ms'] < 5.0
+    assert marker_system.current_markers['prosody']['pitch_mean'] > 100
+
+    # Ohne f0-Verbraucher bleibt der F0-Tracker stehen, die STFT läuft weiter
+    registry.costs['prosody'].enabled = False
+    pitch_frames, stft_frames = frontend.pitch_tracker.next_frame, frontend.next_frame
+    _feed(marker_system, 1.0)
+    assert frontend.pitch_tracker.next_frame == pitch_frames
+    assert frontend.next_frame > stft_frames
+
+
+def test_marker_is_thinned_then_disabled_under_load():
+    marker_system = MarkerSystem(sample_rate=SR)
+    marker_system.is_active = True
+    registry = marker_system.registry
+    registry.adapt_interval = 1
+
+    marker_system.register_marker(FunctionMarker(
+        MarkerSpec('slow', inputs=('audio',), schema={'value': 0}, max_cost_ms=50.0),
+        lambda context: time.sleep(0.002) or {'value': 1}
+    ))
+
+    strides = []
+    for _ in range(40):
+        _feed(marker_system, 0.25)
+        registry.adapt(backlog=1.0)
+        strides.append(registry.costs['slow'].stride)
+
+    stats = registry.stats()
+    assert stats['slow']['enabled'] is False
+    assert stats['slow']['skipped'] > 0
+    assert max(strides) == registry.max_stride
+    # Essentielle Marker laufen weiter in jedem Takt
+    assert stats['tempo']['enabled'] and stats['tempo']['stride'] == 1
+
+
+def test_over_budget_marker_is_disabled_then_retried():
+    """Überschreitung je Aufruf schaltet direkt ab; bei Luft folgt ein Probeaufruf mit frischer Messung"""
+    marker_system = MarkerSystem(sample_rate=SR)
+    marker_system.is_active = True
+    registry = marker_system.registry
+    registry.adapt_interval = 1
+    delay = [0.002]
+
+    marker_system.register_marker(FunctionMarker(
+        MarkerSpec('slow', inputs=('audio',), schema={'value': 0}, max_cost_ms=0.5),
+        lambda context: time.sleep(delay[0]) or {'value': 1}
+    ))
+
+    _feed(marker_system, 1.0)
+    assert registry.adapt(backlog=0.0) == 'slow'
+    cost = registry.costs['slow']
+    assert not cost.enabled and cost.stride == 1  # nicht erst ausgedünnt
+
+    # Probeaufruf fällt durch: wieder aus, längere Wartezeit
+    while not cost.enabled:
+        _feed(marker_system, 0.25)
+        registry.adapt(backlog=0.0)
+    _feed(marker_system, 0.25)
+    registry.adapt(backlog=0.0)
+    assert not cost.enabled and cost.disables == 2
+
+    # Marker ist wieder günstig: Probeaufruf besteht, Marker bleibt an
+    delay[0] = 0.0
+    while not cost.enabled:
+        _feed(marker_system, 0.25)
+        registry.adapt(backlog=0.0)
+    for _ in range(5):
+        _feed(marker_system, 0.25)
+        registry.adapt(backlog=0.0)
+    assert cost.enabled and cost.disables == 0
+    assert cost.avg_ms < 0.5
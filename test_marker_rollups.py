@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test der Rollup-Pyramide
+"""
+
+import numpy as np
+import pytest
+from marker_rollups import RollupPyramid
+from marker_timeline import MarkerTimeline
+
+SR = 16000
+
+
+def _frames(n, seed=0):
+    rng = np.random.default_rng(seed)
+    samples = (np.arange(n) + 1) * 4000          # 4 Hz
+    valence = rng.uniform(-1, 1, n)
+    pitch = np.where(rng.random(n) < 0.3, 0.0, rng.uniform(90, 250, n))
+    energy = rng.uniform(0, 0.2, n)
+    return samples, valence, pitch, energy
+
+
+def _reference(samples, values, start, end, valid=None):
+    base = 10 * SR
+    lo, hi = (start // base) * base, -(-end // base) * base
+    mask = (samples >= lo) & (samples < hi)
+    if valid is not None:
+        mask &= valid
+    return values[mask]
+
+
+def test_range_queries_match_numpy():
+    samples, valence, pitch, energy = _frames(4 * 3600)  # eine Stunde
+    rollups = RollupPyramid(SR)
+    for i in range(len(samples)):
+        rollups.update(samples[i], valence[i], pitch[i], energy[i])
+
+    rng = np.random.default_rng(1)
+    for _ in range(20):
+        start, end = np.sort(rng.integers(0, samples[-1], 2))
+        stats = rollups.summarize(start, end + 1)
+
+        ref_valence = _reference(samples, valence, start, end + 1)
+        ref_pitch = _reference(samples, pitch, start, end + 1, pitch > 0)
+        assert stats['valence'].count == len(ref_valence)
+        assert stats['valence'].mean == pytest.approx(ref_valence.mean())
+        assert stats['valence'].var == pytest.approx(ref_valence.var())
+        assert stats['valence'].min == pytest.approx(ref_valence.min())
+        assert stats['pitch'].count == len(ref_pitch)
+        assert stats['pitch'].mean == pytest.approx(ref_pitch.mean())
+        assert stats['pitch'].max == pytest.approx(ref_pitch.max())
+        assert stats['positive'].mean == pytest.approx(np.mean(ref_valence > 0.3))
+
+
+def test_bulk_load_equals_incremental_updates():
+    samples, valence, pitch, energy = _frames(5000, seed=2)
+    incremental, bulk = RollupPyramid(SR), RollupPyramid(SR)
+    for i in range(len(samples)):
+        incremental.update(samples[i], valence[i], pitch[i], energy[i])
+    bulk.add_rows(samples[:2000], valence[:2000], pitch[:2000], energy[:2000])
+    bulk.add_rows(samples[2000:], valence[2000:], pitch[2000:], energy[2000:])
+
+    for level in (10, 60, 300):
+        a, b = incremental.series(level, 'energy'), bulk.series(level, 'energy')
+        np.testing.assert_array_equal(a['count'], b['count'])
+        np.testing.assert_allclose(a['mean'], b['mean'])
+        np.testing.assert_allclose(a['var'], b['var'], atol=1e-12)
+
+
+def test_timeline_stats_survive_reload(tmp_path):
+    directory = str(tmp_path / "markers")
+    timeline = MarkerTimeline(chunk_size=64, storage_dir=directory)
+    samples, valence, pitch, energy = _frames(1000, seed=3)
+    for i in range(len(samples)):
+        timeline.append(int(samples[i]), valence[i], 0.5, pitch[i], energy[i], 0.0)
+    timeline.flush()
+
+    loaded = MarkerTimeline.load(directory, chunk_size=64)
+    before, after = timeline.stats(), loaded.stats()
+    assert after['valence'].count == before['valence'].count == 1000
+    assert after['pitch'].mean == pytest.approx(before['pitch'].mean, rel=1e-6)
+    assert after['energy'].var == pytest.approx(before['energy'].var, rel=1e-5)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test der Marker-Zeitleiste
+"""
+
+import os
+import numpy as np
+from marker_timeline import MarkerTimeline
+from session_manager import SessionManager
+
+
+def _fill(timeline, n):
+    for i in range(n):
+        timeline.append((i + 1) * 4000, np.sin(i / 10), 0.5, 100 + i % 50, 0.01 * (i % 7), 0.0,
+                        'happy' if i % 3 else 'sad')
+
+
+def test_appends_across_chunks_keep_full_resolution():
+    timeline = MarkerTimeline(chunk_size=64)
+    _fill(timeline, 1000)
+
+    rows = timeline.rows()
+    assert len(rows) == len(timeline) == 1000
+    np.testing.assert_array_equal(rows['sample'], (np.arange(1000) + 1) * 4000)
+    np.testing.assert_array_equal(timeline.tail(10)['sample'], rows['sample'][-10:])
+    assert timeline.emotion_names(rows[:3]) == ['sad', 'happy', 'happy']
+
+
+def test_incremental_flush_and_reload(tmp_path):
+    directory = str(tmp_path / "markers")
+    timeline = MarkerTimeline(chunk_size=64, storage_dir=directory)
+    _fill(timeline, 200)
+    timeline.add_pause(16000, 32000)
+
+    # Drei volle Chunks liegen schon ohne flush() auf der Platte
+    assert len([f for f in os.listdir(directory) if f.startswith("markers_")]) == 3
+
+    timeline.flush()
+    loaded = MarkerTimeline.load(directory, chunk_size=64)
+    np.testing.assert_array_equal(loaded.rows(), timeline.rows())
+    np.testing.assert_allclose(loaded.pause_durations(), [1.0])
+
+
+def test_session_summary_uses_whole_timeline(tmp_path):
+    manager = SessionManager()
+    manager.sessions_dir = str(tmp_path)
+    session = manager.create_session("Test")
+
+    timeline = MarkerTimeline()
+    _fill(timeline, 500)
+    timeline.add_pause(0, 24000)
+    session = manager.update_session_markers(session, timeline)
+
+    summary = session['markers_summary']
+    assert summary['pauses']['count'] == 1
+    assert abs(summary['prosody']['avg_pitch'] - np.mean(100 + np.arange(500) % 50)) < 1e-3
+    assert abs(sum(summary['emotions'].values()) - 100) < 1e-6
+
+    segments = [(4000, 20000, "Guten Tag", 0), (24000, 40000, "Hallo", 1)]
+    session = manager.update_session_transcript(session, "Guten Tag Hallo", segments)
+
+    path = manager.save_session(session)
+    loaded = manager.load_session(path)
+    restored = manager.load_markers(loaded)
+    assert len(restored) == 500
+    assert manager.load_transcript_segments(loaded) == segments
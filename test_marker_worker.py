@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test des Marker-Analyse-Workers
+"""
+
+import time
+import numpy as np
+import pytest
+from marker_system import MarkerSystem
+
+
+def _voice(seconds=2.0, sample_rate=16000):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return sum((0.3 / k) * np.sin(2 * np.pi * k * 150 * t) for k in range(1, 5)).astype(np.float32)
+
+
+def test_worker_publishes_snapshots():
+    """Audio über submit_audio wird im Worker analysiert und als Snapshot veröffentlicht"""
+    marker_system = MarkerSystem(sample_rate=16000)
+    marker_system.start()
+    try:
+        signal = _voice()
+        for i in range(0, len(signal), 1024):
+            assert marker_system.submit_audio(signal[i:i + 1024])
+
+        deadline = time.time() + 5.0
+        while marker_system.input_queue.qsize() and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+
+        markers = marker_system.current_markers
+        assert markers['timestamp'] is not None
+        assert abs(markers['prosody']['pitch_mean'] - 150) < 5
+        assert marker_system.get_queue_stats()['chunks_dropped'] == 0
+    finally:
+        marker_system.stop()
+
+
+def test_register_marker_while_worker_runs():
+    """Registrierungen aus einem anderen Thread stören den laufenden Worker nicht"""
+    from marker_registry import FunctionMarker, MarkerSpec
+
+    marker_system = MarkerSystem(sample_rate=16000, analysis_hop=0.064)
+    marker_system.start()
+    try:
+        signal = _voice(4.0)
+        for index, i in enumerate(range(0, len(signal), 1024)):
+            marker_system.submit_audio(signal[i:i + 1024])
+            if index % 4 == 0:
+                marker_system.register_marker(FunctionMarker(
+                    MarkerSpec(f'extra{index}', inputs=('rms',), schema={'value': 0.0}),
+                    lambda context: {'value': float(np.mean(context.features.rms))}
+                ))
+
+        deadline = time.time() + 10.0
+        while marker_system.input_queue.qsize() and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+
+        names = [name for name in marker_system.registry.names if name.startswith('extra')]
+        assert len(names) == 16
+        assert all(name in marker_system.current_markers for name in names)
+        assert marker_system.current_markers['extra0']['value'] > 0
+    finally:
+        marker_system.stop()
+
+
+def test_snapshot_is_read_only():
+    marker_system = MarkerSystem(sample_rate=16000)
+    snapshot = marker_system.current_markers
+    with pytest.raises(TypeError):
+        snapshot['prosody']['pitch_mean'] = 1.0
+
+    # Kopien dürfen verändert werden, der Snapshot bleibt unverändert
+    copy = marker_system.get_current_markers()
+    copy['prosody']['pitch_mean'] = 1.0
+    assert marker_system.current_markers['prosody']['pitch_mean'] == 0.0
+
+
+def test_full_queue_drops_oldest_chunks():
+    """Ohne laufenden Worker läuft die Queue voll; Überlauf wird gezählt, nicht blockiert"""
+    marker_system = MarkerSystem(sample_rate=16000, input_queue_size=4)
+    marker_system.is_active = True  # aktiv, aber ohne Worker-Thread
+
+    for _ in range(10):
+        assert marker_system.submit_audio(np.zeros(1024, dtype=np.float32))
+
+    stats = marker_system.get_queue_stats()
+    assert stats['queue_size'] == 4
+    assert stats['chunks_dropped'] == 6
+    assert stats['samples_dropped'] == 6 * 1024
+
+
+def test_shared_vad_events_drive_pauses():
+    """Mit shared_vad kommen Pausen aus den Pipeline-Ereignissen, frame-genau auf der Sample-Uhr"""
+    from vad_stream import VADEvent
+
+    marker_system = MarkerSystem(sample_rate=16000, shared_vad=True)
+    assert marker_system.vad is None
+    marker_system.is_active = True
+    pauses = []
+    marker_system.pause_detected.connect(pauses.append)
+
+    marker_system.submit_vad([VADEvent('speech_start', 4800), VADEvent('speech_end', 24000)], 28800)
+    marker_system.process_audio_chunk(np.zeros(16000, dtype=np.float32))
+    marker_system.submit_vad([VADEvent('speech_start', 43200)], 48000)
+    marker_system.process_audio_chunk(np.zeros(4000, dtype=np.float32))
+
+    assert pauses == [pytest.approx(1.2)]  # 0.3 s Anfangsstille liegt unter min_pause_duration
+
+
+def test_vad_events_ignored_when_inactive():
+    """submit_vad nach stop() puffert nichts mehr"""
+    from vad_stream import VADEvent
+
+    marker_system = MarkerSystem(sample_rate=16000, shared_vad=True)
+    marker_system.submit_vad([VADEvent('speech_start', 4800)], 16000)
+
+    assert len(marker_system.vad_events) == 0
+    assert marker_system.vad_position == 0
+
+
+def test_second_recording_continues_timeline():
+    """Start -> Stop -> Start: die Zeitleiste läuft weiter statt wieder bei Sample 0 zu beginnen"""
+    from vad_stream import VADEvent
+
+    marker_system = MarkerSystem(sample_rate=16000, shared_vad=True)
+    timeline = marker_system.timeline
+    signal = _voice(2.0)
+    for _ in range(2):
+        marker_system.start()
+        try:
+            marker_system.submit_vad([VADEvent('speech_end', 0), VADEvent('speech_start', 16000)], 32000)
+            for i in range(0, len(signal), 4000):
+                marker_system.process_audio_chunk(signal[i:i + 4000])
+        finally:
+            marker_system.stop()
+
+    samples = timeline.column('sample')
+    assert len(samples) > 0 and np.all(np.diff(samples) > 0)
+    assert samples[-1] == 2 * len(signal)
+    first_end = len(signal)
+    assert timeline.pause_rows().tolist() == [(0, 16000), (first_end, first_end + 16000)]
+
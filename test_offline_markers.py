@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test der Offline-Marker-Extraktion
+"""
+
+import numpy as np
+from marker_system import MarkerSystem
+from offline_markers import OfflineMarkerExtractor
+
+SR = 16000
+
+
+def _speech_like(seconds, seed=0):
+    """Harmonisches Signal mit gleitender F0, periodisch von Pausen unterbrochen"""
+    t = np.arange(int(seconds * SR)) / SR
+    f0 = 150 + 40 * np.sin(2 * np.pi * 0.1 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / SR
+    voice = sum((0.3 / k) * np.sin(k * phase) for k in range(1, 6))
+    gate = np.sin(2 * np.pi * 0.15 * t) > -0.2
+    noise = 0.003 * np.random.default_rng(seed).standard_normal(len(t))
+    return (voice * gate + noise).astype(np.float32)
+
+
+def test_offline_matches_live_marker_system():
+    """Gleiche Analysezeitpunkte und Feature-Werte wie der blockweise Live-Betrieb"""
+    signal = _speech_like(30)
+
+    live_system = MarkerSystem(sample_rate=SR, shared_vad=False)
+    live_system.is_active = True
+    for i in range(0, len(signal), live_system.hop_size):
+        live_system.process_audio_chunk(signal[i:i + live_system.hop_size])
+    live = live_system.timeline.rows()
+
+    offline_timeline = OfflineMarkerExtractor(sample_rate=SR).extract(signal)
+    offline = offline_timeline.rows()
+
+    np.testing.assert_array_equal(offline['sample'], live['sample'])
+    for column in ('valence', 'pitch', 'energy', 'confidence'):
+        np.testing.assert_allclose(offline[column], live[column], rtol=1e-4, atol=1e-4)
+    assert np.mean(offline['emotion'] == live['emotion']) > 0.95
+
+    # Abgeschlossene Pausen sind frame-genau identisch
+    np.testing.assert_array_equal(offline_timeline.pause_rows(), live_system.timeline.pause_rows())
+
+
+def test_short_audio_gives_empty_timeline():
+    assert len(OfflineMarkerExtractor(sample_rate=SR).extract(np.zeros(SR // 2, dtype=np.float32))) == 0
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test des vektorisierten F0-Trackers
+"""
+
+import numpy as np
+from ring_buffer import AudioRingBuffer
+from pitch_tracker import StreamingPitchTracker, yin_frames
+
+
+def _harmonic(f0, seconds=1.0, sample_rate=16000):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return sum((0.5 / k) * np.sin(2 * np.pi * k * f0 * t) for k in range(1, 5)).astype(np.float32)
+
+
+def test_harmonic_tones_are_tracked():
+    """F0 harmonischer Töne im Sprachbereich wird auf unter 1 % genau getroffen"""
+    for f0 in (90.0, 150.0, 240.0, 350.0):
+        frames = np.lib.stride_tricks.sliding_window_view(_harmonic(f0), 1024)[::256]
+        estimate, voiced_prob = yin_frames(frames, 16000)
+        assert np.all(estimate > 0)
+        assert abs(np.median(estimate) - f0) / f0 < 0.01
+        assert np.median(voiced_prob) > 0.8
+
+
+def test_noise_is_unvoiced():
+    noise = np.random.default_rng(0).standard_normal(16000).astype(np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(noise, 1024)[::256]
+    estimate, _ = yin_frames(frames, 16000)
+    assert np.count_nonzero(estimate) <= len(estimate) // 10
+
+
+def test_streaming_matches_batch():
+    """Blockweise Updates liefern dieselben F0-Werte wie ein einziger Aufruf"""
+    signal = _harmonic(180.0, seconds=2.0)
+
+    ring_a, tracker_a = AudioRingBuffer(32000), StreamingPitchTracker()
+    for i in range(0, len(signal), 1024):
+        ring_a.write(signal[i:i + 1024])
+        tracker_a.update(ring_a)
+
+    ring_b, tracker_b = AudioRingBuffer(32000), StreamingPitchTracker()
+    ring_b.write(signal)
+    tracker_b.update(ring_b)
+
+    starts_a, f0_a, _ = tracker_a.window_pitch()
+    starts_b, f0_b, _ = tracker_b.window_pitch()
+    np.testing.assert_array_equal(starts_a, starts_b)
+    np.testing.assert_allclose(f0_a, f0_b, rtol=1e-4)
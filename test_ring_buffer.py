@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test des Audio-Ring-Buffers
+"""
+
+import numpy as np
+from ring_buffer import AudioRingBuffer
+
+
+def test_latest_after_wraparound():
+    """Die letzten Samples kommen auch nach mehrfachem Umlauf in der richtigen Reihenfolge"""
+    ring = AudioRingBuffer(capacity=1000)
+    signal = np.arange(3500, dtype=np.float32)
+    for i in range(0, len(signal), 300):
+        ring.write(signal[i:i + 300])
+
+    assert ring.total_written == 3500
+    assert len(ring) == 1000
+    np.testing.assert_array_equal(ring.latest(1000), signal[-1000:])
+    np.testing.assert_array_equal(ring.read(3000, 250), signal[3000:3250])
+    assert ring.read(2000, 10) is None
+
+
+def test_write_larger_than_capacity():
+    """Ein Block größer als der Ring behält nur die neuesten Samples"""
+    ring = AudioRingBuffer(capacity=100)
+    ring.write(np.arange(10, dtype=np.float32))
+    ring.write(np.arange(250, dtype=np.float32))
+
+    assert ring.total_written == 260
+    np.testing.assert_array_equal(ring.latest(100), np.arange(150, 250, dtype=np.float32))
+
+
+if __name__ == "__main__":
+    test_latest_after_wraparound()
+    test_write_larger_than_capacity()
+    print("Ring-Buffer-Tests erfolgreich")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test der Sprecherwechsel-Erkennung
+"""
+
+import numpy as np
+
+from speaker_change import SpeakerChangeDetector
+from speaker_windows import SpeechWindowAccumulator
+
+SR = 16000
+
+
+def _voice(f0, formants, seconds, rng):
+    """Harmonische mit Formant-Hüllkurve, leichtem Vibrato und Silbenrhythmus"""
+    t = np.arange(int(seconds * SR)) / SR
+    phase = 2 * np.pi * np.cumsum(f0 * (1 + 0.08 * np.sin(2 * np.pi * 3 * t))) / SR
+    audio = np.zeros(len(t))
+    for h in range(1, int(4000 / f0)):
+        gain = sum(np.exp(-0.5 * ((h * f0 - fc) / 150.0) ** 2) for fc in formants) + 0.02
+        audio += gain * np.sin(h * phase) / np.sqrt(h)
+    audio *= 0.6 + 0.4 * np.abs(np.sin(2 * np.pi * 4 * t))
+    return (audio + 0.01 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def test_changes_are_found_and_embeddings_are_gated():
+    rng = np.random.default_rng(1)
+    voices = [(110, (600, 1100, 2500)), (210, (400, 2000, 2900))]
+    turns, audio, position = [], [], 0
+    for i in range(12):
+        seconds = rng.uniform(4, 10)
+        audio.append(_voice(*voices[i % 2], seconds, rng))
+        turns.append(position)
+        position += int(seconds * SR)
+    audio = np.concatenate(audio)
+
+    detector = SpeakerChangeDetector(SR, keepalive=4.0)
+    windows = SpeechWindowAccumulator(SR)
+    changes = []
+    for start in range(0, len(audio), 1024):
+        for window_start, window in windows.add(start, audio[start:start + 1024]):
+            before = detector.changes
+            detector.should_embed(window_start, window)
+            if detector.changes > before:
+                changes.append(window_start)
+
+    changes, boundaries = np.array(changes), np.array(turns[1:])
+    # Jeder Wechsel wird erkannt, kein Fehlalarm mitten im Abschnitt
+    assert all(np.any(np.abs(changes - b) <= 1.5 * SR) for b in boundaries)
+    assert all(np.any(np.abs(boundaries - c) <= 1.5 * SR) for c in changes)
+    assert detector.embedded_ratio < 0.4
+
+
+def test_gap_and_keepalive_force_embeddings():
+    rng = np.random.default_rng(2)
+    detector = SpeakerChangeDetector(SR, keepalive=2.0, max_gap=1.0)
+    audio = _voice(150, (700, 1200, 2600), 12.0, rng)
+    hop, length = 12000, 24000
+
+    decisions = [detector.should_embed(s, audio[s:s + length]) for s in range(0, 6 * SR, hop)]
+    assert decisions[0]
+    # Ohne Wechsel etwa alle keepalive Sekunden ein Embedding
+    assert 2 <= sum(decisions) <= 4
+
+    # Nach einer Pause über max_gap wird wieder eingebettet
+    assert detector.should_embed(9 * SR, audio[9 * SR:9 * SR + length])
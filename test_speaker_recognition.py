@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test des Online-Sprecher-Clusterings
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("sklearn")
+from sklearn.metrics.pairwise import cosine_similarity
+from src.speaker_recognition import OnlineSpeakerCluster, SpeakerProfile
+
+
+def _voices(n_speakers, n_windows, dim=192, noise=0.3, seed=0):
+    rng = np.random.default_rng(seed)
+    voices = rng.standard_normal((n_speakers, dim))
+    labels = rng.integers(0, n_speakers, n_windows)
+    return labels, voices[labels] + noise * rng.standard_normal((n_windows, dim))
+
+
+def test_matrix_scoring_matches_pairwise_cosine():
+    cluster = OnlineSpeakerCluster(tau=0.5)
+    labels, embeddings = _voices(6, 300)
+    start = datetime.now()
+    for i, embedding in enumerate(embeddings):
+        cluster.update_cluster(embedding, start + timedelta(seconds=0.75 * i))
+
+    assert cluster.n_centers == len(cluster.speaker_profiles) == 6
+    np.testing.assert_allclose(np.linalg.norm(cluster.centers[:cluster.n_centers], axis=1), 1.0, rtol=1e-5)
+
+    query = embeddings[0] / np.linalg.norm(embeddings[0])
+    speaker_ids, sims = cluster.similarities(query.astype(np.float32))
+    centers = cluster.cluster_centers
+    reference = [cosine_similarity([query], [centers[int(s)]])[0][0] for s in speaker_ids]
+    np.testing.assert_allclose(sims, reference, rtol=1e-5)
+
+    # Gleiche Stimme -> gleicher Sprecher
+    assigned = np.array([cluster.best_match(e)[0] for e in embeddings])
+    for label in range(6):
+        assert len(set(assigned[labels == label])) == 1
+
+
+def test_carried_windows_keep_speaker_without_embedding():
+    import threading
+    import time
+    from PyQt6.QtCore import Qt
+    from src.speaker_recognition import SpeakerRecognitionSystem
+
+    system = SpeakerRecognitionSystem(batch_timeout=0.0, keepalive=3.0)
+    embedded = []
+
+    def fake_extract(segments):
+        embedded.extend(segments)
+        return [np.ones(192, dtype=np.float32) for _ in segments]
+
+    system._extract_speaker_embeddings = fake_extract
+    segments = []
+    system.speaker_segment.connect(lambda start, end, speaker, confidence: segments.append(start),
+                                   Qt.ConnectionType.DirectConnection)
+
+    # Gleichbleibendes Signal: nach dem ersten Fenster nur Keep-alive-Embeddings
+    rng = np.random.default_rng(0)
+    t = np.arange(10 * 16000) / 16000
+    audio = (sum(np.sin(2 * np.pi * 150 * h * t) / h for h in range(1, 20))
+             + 0.05 * rng.standard_normal(len(t))).astype(np.float32)
+    starts = list(range(0, 8 * 16000, 12000))
+    for start in starts:
+        system.processing_queue.put((start, audio[start:start + 24000], datetime.now(), time.monotonic()))
+    system.is_processing = True
+    worker = threading.Thread(target=system._processing_loop)
+    worker.start()
+    while len(segments) < len(starts) and worker.is_alive():
+        time.sleep(0.01)
+    system.is_processing = False
+    worker.join()
+
+    assert segments == starts
+    assert 2 <= len(embedded) <= 4
+    assert system.windows_carried == len(starts) - len(embedded)
+    assert len(system.session_embeddings) == len(starts)
+
+
+def test_profile_memory_stays_bounded_over_long_sessions():
+    profile = SpeakerProfile(0, 'unknown', datetime.now(), embedding_dim=8, history=64, exemplars=16)
+    sizes = (profile._confidences.nbytes, profile._exemplars.nbytes)
+
+    # Drei Stunden bei 0.75 s Hop
+    n = int(3 * 3600 / 0.75)
+    confidences = np.linspace(0.0, 1.0, n, dtype=np.float32)
+    for i in range(n):
+        profile.add_confidence(float(confidences[i]))
+        profile.add_embedding(np.full(8, i, dtype=np.float32))
+
+    assert (profile._confidences.nbytes, profile._exemplars.nbytes) == sizes
+    assert profile.n_confidences == profile.n_embeddings == n
+    assert profile.confidence_mean == pytest.approx(confidences.mean(), rel=1e-4)
+    assert profile.recent_confidence(10) == pytest.approx(confidences[-10:].mean(), rel=1e-5)
+    np.testing.assert_allclose(profile.average_embedding, (n - 1) / 2, rtol=1e-6)
+
+    # Reservoir: Stichprobe über die ganze Sitzung verteilt
+    picked = np.sort(profile.exemplars[:, 0])
+    assert len(picked) == 16 and len(np.unique(picked)) == 16
+    assert picked[0] < n / 4 and picked[-1] > 3 * n / 4
+
+
+def test_exported_model_path_does_not_import_speechbrain(tmp_path):
+    """Mit exportiertem Modell bleibt SpeechBrain aus dem Prozess (Startzeit)"""
+    import json
+    import subprocess
+    import sys
+    import torch
+    from ecapa_export import METADATA_FILE
+
+    class _Mean(torch.nn.Module):
+        def forward(self, wavs, wav_lens):
+            return wavs.mean(dim=1, keepdim=True).repeat(1, 192).unsqueeze(1)
+
+    torch.jit.trace(_Mean(), (torch.zeros(2, 100), torch.ones(2))).save(str(tmp_path / "model.pt"))
+    (tmp_path / METADATA_FILE).write_text(json.dumps(
+        {"artifact": "model.pt", "agreement": {"mean": 0.999, "min": 0.995, "segments": 8}}))
+
+    code = (
+        "import sys\n"
+        "from src.speaker_recognition import SpeakerRecognitionSystem\n"
+        f"system = SpeakerRecognitionSystem(exported_model={str(tmp_path)!r})\n"
+        "print(system.is_model_loaded, 'speechbrain' in sys.modules)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            env={**os.environ, "QT_QPA_PLATFORM": "offscreen"})
+    assert result.stdout.split()[-2:] == ["True", "False"]
+
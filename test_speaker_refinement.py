@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test des Sprecher-Nachclusterings
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+from speaker_refinement import refine_speaker_labels
+from marker_timeline import MarkerTimeline
+
+
+def _session(n_windows, n_speakers=2, dim=192, noise=0.25, seed=0):
+    rng = np.random.default_rng(seed)
+    voices = rng.standard_normal((n_speakers, dim))
+    truth = (np.arange(n_windows) // 40) % n_speakers           # Sprecherwechsel alle 30 s
+    embeddings = voices[truth] + noise * rng.standard_normal((n_windows, dim)) * np.sqrt(dim) / 10
+    return truth, embeddings.astype(np.float16)
+
+
+def test_fragmented_speaker_is_merged_and_ids_kept():
+    truth, embeddings = _session(400)
+    online = truth.copy()
+    online[200:240] = 2                                          # Sprecher 0 fälschlich als ID 2
+
+    labels = refine_speaker_labels(embeddings, online, distance_threshold=0.5, max_speakers=4)
+    np.testing.assert_array_equal(labels, truth)
+
+
+def test_long_session_is_subsampled_and_relabels_timeline():
+    truth, embeddings = _session(20000, n_speakers=3, seed=1)   # ~4 h bei 0.75 s Hop
+    online = np.where(truth == 2, 5, truth)
+    labels = refine_speaker_labels(embeddings, online, max_speakers=2, max_points=2000)
+    assert len(np.unique(labels)) == 2
+
+    timeline = MarkerTimeline(chunk_size=4096)
+    starts = np.arange(len(online)) * 12000
+    for start, speaker in zip(starts, online):
+        timeline.add_speaker(int(start), int(start) + 24000, int(speaker), 0.9)
+    changed = timeline.relabel_speakers(starts, labels)
+    assert changed == np.count_nonzero(labels != online)
+    np.testing.assert_array_equal(timeline.speaker_rows()['speaker'], labels)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test der Sprachfenster und des Sprecher-Joins
+"""
+
+import numpy as np
+from speaker_windows import SpeechWindowAccumulator
+from marker_timeline import MarkerTimeline
+
+SR = 16000
+
+
+def test_windows_follow_sample_clock_across_blocks_and_gaps():
+    windows = SpeechWindowAccumulator(SR, window=1.5, hop=0.75, min_window=1.0)
+    audio = np.arange(10 * SR, dtype=np.float32)
+
+    # 3.2 s Sprache in 1024er-Blöcken, dann Lücke, dann 0.5 s (zu kurz für ein Fenster)
+    out = []
+    for start in range(SR, SR + int(3.2 * SR), 1024):
+        end = min(start + 1024, SR + int(3.2 * SR))
+        out.extend(windows.add(start, audio[start:end]))
+    out.extend(windows.add(6 * SR, audio[6 * SR:int(6.5 * SR)]))
+    out.extend(windows.flush())
+
+    starts = [start for start, _ in out]
+    assert starts == [SR, SR + 12000, SR + 24000, SR + int(3.2 * SR) - 24000]
+    for start, window in out:
+        assert len(window) == 24000
+        np.testing.assert_array_equal(window, audio[start:start + 24000])
+
+
+def test_interval_join_assigns_speakers_to_segments_and_frames():
+    timeline = MarkerTimeline(chunk_size=4)
+    hop, length = 12000, 24000
+    for i in range(10):
+        timeline.add_speaker(i * hop, i * hop + length, 0 if i < 5 else 1, 0.9)
+
+    assert timeline.speakers_until == 9 * hop + length
+    assert timeline.speaker_for_interval(0, 4 * hop)[0] == 0
+    speaker, share = timeline.speaker_for_interval(7 * hop, 9 * hop)
+    assert speaker == 1 and share == 1.0
+    assert timeline.speaker_for_interval(20 * hop, 21 * hop) == (-1, 0.0)
+
+    samples = np.array([1000, 3 * hop, 8 * hop, 20 * hop])
+    np.testing.assert_array_equal(timeline.speaker_at(samples), [0, 0, 1, -1])
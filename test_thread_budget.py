@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test des zentralen Thread-Budgets
+"""
+
+from thread_budget import compute_thread_budget, load_thread_budget
+
+
+def test_budget_fits_core_count():
+    """Standard-Budget überbucht typische Laptop-CPUs nicht"""
+    for cores, expected in [(4, (2, 1, 1)), (8, (4, 2, 1)), (16, (8, 4, 3))]:
+        budget = compute_thread_budget(cores)
+        assert (budget.whisper_threads, budget.torch_threads, budget.blas_threads) == expected
+        assert budget.whisper_threads + budget.torch_threads + budget.blas_threads <= cores
+
+
+def test_budget_overrides_from_config(tmp_path):
+    """Einzelwerte aus [PERFORMANCE] überschreiben das abgeleitete Budget"""
+    config_path = tmp_path / "config.ini"
+    config_path.write_text("[PERFORMANCE]\nthread_budget = 8\ntorch_threads = 3\n")
+
+    budget = load_thread_budget(str(config_path))
+    assert budget.total == 8
+    assert budget.whisper_threads == 4
+    assert budget.torch_threads == 3
+    assert budget.blas_threads == 1
+
+
+if __name__ == "__main__":
+    test_budget_fits_core_count()
+    print("Thread-Budget-Tests erfolgreich")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test des Streaming-VAD
+"""
+
+import numpy as np
+from vad_stream import StreamingVAD
+
+SAMPLE_RATE = 16000
+
+
+def _bursts(spans, seconds=6.0):
+    """Harmonische 'Sprache' in den angegebenen Zeitbereichen über leisem Rauschen"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    audio = 0.002 * np.random.default_rng(0).standard_normal(len(t))
+    voice = sum((0.3 / k) * np.sin(2 * np.pi * k * 150 * t) for k in range(1, 5))
+    for start, end in spans:
+        a, b = int(start * SAMPLE_RATE), int(end * SAMPLE_RATE)
+        audio[a:b] += voice[a:b]
+    return audio.astype(np.float32)
+
+
+def _run(audio, block):
+    vad = StreamingVAD(sample_rate=SAMPLE_RATE, backend="energy")
+    events = []
+    for i in range(0, len(audio), block):
+        events += vad.process(audio[i:i + block])
+    return vad, [(e.kind, e.sample) for e in events]
+
+
+def test_onsets_and_offsets_are_frame_exact():
+    """Grenzen liegen auf den Frame-Grenzen der echten Sprachabschnitte (30 ms = 480 Samples)"""
+    _, events = _run(_bursts([(0.96, 2.4), (4.02, 5.4)]), 1000)
+    assert events == [('speech_start', 32 * 480), ('speech_end', 80 * 480),
+                      ('speech_start', 134 * 480), ('speech_end', 180 * 480)]
+
+
+def test_hysteresis_ignores_short_blips_and_gaps():
+    """Ein 60 ms-Knacken startet keine Sprache, eine 150 ms-Lücke beendet sie nicht"""
+    audio = _bursts([(0.99, 1.05), (2.4, 3.0), (3.15, 4.2)])
+    _, events = _run(audio, 1024)
+    assert [kind for kind, _ in events] == ['speech_start', 'speech_end']
+
+
+def test_block_size_does_not_change_result():
+    audio = _bursts([(0.96, 2.4), (3.3, 3.36), (4.02, 5.4)])
+    vad_a, events_a = _run(audio, 333)
+    vad_b, events_b = _run(audio, 4000)
+    assert events_a == events_b
+
+    starts_a, mask_a = vad_a.speech_mask()
+    starts_b, mask_b = vad_b.speech_mask()
+    np.testing.assert_array_equal(starts_a, starts_b)
+    np.testing.assert_array_equal(mask_a, mask_b)
+    assert starts_a[1] - starts_a[0] == 480
+
+
+def test_current_pause_counts_from_offset():
+    vad, events = _run(_bursts([(0.96, 2.4)], seconds=4.0), 1000)
+    assert events[-1] == ('speech_end', 80 * 480)
+    assert abs(vad.current_pause() - (vad.processed_samples / SAMPLE_RATE - 2.4)) < 1e-9
+
+
+def test_quietest_boundary_picks_energy_dip():
+    audio = _bursts([(0.5, 1.5), (1.62, 3.0)], seconds=3.5)
+    vad, _ = _run(audio, 1024)
+    cut = vad.quietest_boundary(int(1.0 * SAMPLE_RATE), int(2.0 * SAMPLE_RATE))
+    assert int(1.5 * SAMPLE_RATE) <= cut < int(1.62 * SAMPLE_RATE)
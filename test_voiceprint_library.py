@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Test der Stimmabdruck-Bibliothek
+"""
+
+import numpy as np
+from voiceprint_library import VoiceprintLibrary
+
+
+def _embeddings(n, dim=192, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def test_library_persists_and_identifies(tmp_path):
+    directory = str(tmp_path / "voiceprints")
+    voices = _embeddings(100)
+    library = VoiceprintLibrary(directory)
+    for i, voice in enumerate(voices):           # über die Startkapazität (64) hinaus
+        library.add(f"client_{i}", 'patient', voice, quality=0.9)
+    library.add("therapist_a", 'therapist', voices[0] + 5.0)
+    library.add("client_3", 'patient', voices[3], n_samples=3)   # Aktualisieren statt Duplikat
+    library.remove("client_7")
+
+    loaded = VoiceprintLibrary(directory)
+    assert len(loaded) == 100
+    rng = np.random.default_rng(1)
+    match = loaded.identify(voices[42] + 0.2 * rng.standard_normal(192))
+    assert match.name == "client_42" and match.role == 'patient' and match.similarity > 0.9
+    assert all(m.name != "client_7" for m in loaded.search(voices[7], k=5))
+    assert loaded.entries_by_role()['therapist'] == ["therapist_a"]
+
+
+def test_removed_entries_do_not_displace_matches(tmp_path):
+    """Gelöschte Zeilen zählen nicht gegen k, auch wenn alle aktiven Treffer schlechter als 0 sind"""
+    library = VoiceprintLibrary(str(tmp_path / "voiceprints"), dim=4)
+    basis = np.eye(4, dtype=np.float32)
+    for i in range(4):
+        library.add(f"v{i}", 'patient', basis[0] + 0.5 * basis[i])
+    library.remove("v1")
+    library.remove("v2")
+
+    matches = library.search(-basis[0], k=2)
+    assert sorted(m.name for m in matches) == ["v0", "v3"]
+
+
+def test_ivf_index_agrees_with_brute_force(tmp_path):
+    voices = _embeddings(3000, seed=2)
+    library = VoiceprintLibrary(str(tmp_path / "voiceprints"), index_threshold=1000, n_probe=8)
+    for i, voice in enumerate(voices):
+        library.add(f"v{i}", 'patient', voice, save=False)
+    library.save()
+    assert library._index is not None
+    # Auch eine von der Platte geladene Bibliothek nutzt sofort den Index
+    assert VoiceprintLibrary(library.directory, index_threshold=1000)._index is not None
+
+    rng = np.random.default_rng(3)
+    queries = rng.choice(3000, 50, replace=False)
+    hits = 0
+    for row in queries:
+        query = voices[row] + 0.3 * rng.standard_normal(192)
+        exact = library.search(query, k=1, exact=True)[0]
+        approx = library.search(query, k=1)[0]
+        assert exact.row == row
+        hits += approx.row == exact.row
+    assert hits >= 45
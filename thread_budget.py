@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Zentrales Thread-Budget
+Verteilt die CPU-Kerne auf CTranslate2 (Whisper), torch (ECAPA) und BLAS (numpy/librosa),
+damit sich die Thread-Pools auf 4-8-Kern-Laptops nicht gegenseitig verdrängen.
+
+Konfiguration in config.ini:
+
+    [PERFORMANCE]
+    thread_budget = auto        ; oder Gesamtzahl Threads, z.B. 6
+    whisper_threads = 0         ; 0 = aus dem Budget ableiten
+    torch_threads = 0
+    blas_threads = 0
+
+Dieses Modul importiert bewusst kein numpy/torch, damit configure_environment()
+vor deren Import aufgerufen werden kann.
+"""
+
+import os
+import configparser
+from dataclasses import dataclass
+from typing import Optional
+
+BLAS_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                 "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.ini")
+_budget: Optional["ThreadBudget"] = None
+
+
+@dataclass(frozen=True)
+class ThreadBudget:
+    """Thread-Zuteilung pro Inferenz-Bibliothek"""
+    total: int
+    whisper_threads: int
+    torch_threads: int
+    torch_interop_threads: int
+    blas_threads: int
+
+
+def compute_thread_budget(total: Optional[int] = None) -> ThreadBudget:
+    """
+    Standard-Budget aus der Kernanzahl ableiten
+
+    Ein Kern bleibt für GUI und Audio-Callback frei. Whisper bekommt die (aufgerundete)
+    Hälfte des Rests, ECAPA zwei Drittel des verbleibenden Anteils, BLAS den Rest
+    (jeweils mindestens ein Thread).
+
+    Beispiele: 4 Kerne -> 2/1/1, 8 Kerne -> 4/2/1, 16 Kerne -> 8/4/3
+    """
+    if total is None or total <= 0:
+        total = os.cpu_count() or 1
+
+    usable = max(1, total - 1)
+    whisper = max(1, (usable + 1) // 2)
+    rest = usable - whisper
+    torch_threads = max(1, rest * 2 // 3)
+    blas = max(1, rest - torch_threads)
+
+    return ThreadBudget(
+        total=total,
+        whisper_threads=whisper,
+        torch_threads=torch_threads,
+        torch_interop_threads=1,
+        blas_threads=blas
+    )
+
+
+def load_thread_budget(config_path: str = _CONFIG_PATH) -> ThreadBudget:
+    """Thread-Budget aus config.ini laden (Abschnitt [PERFORMANCE])"""
+    config = configparser.ConfigParser()
+    if os.path.exists(config_path):
+        config.read(config_path)
+
+    section = config["PERFORMANCE"] if config.has_section("PERFORMANCE") else {}
+
+    total_setting = str(section.get("thread_budget", "auto")).strip().lower()
+    total = None if total_setting in ("", "auto") else int(total_setting)
+    budget = compute_thread_budget(total)
+
+    def override(key: str, default: int) -> int:
+        value = int(section.get(key, 0) or 0)
+        return value if value > 0 else default
+
+    return ThreadBudget(
+        total=budget.total,
+        whisper_threads=override("whisper_threads", budget.whisper_threads),
+        torch_threads=override("torch_threads", budget.torch_threads),
+        torch_interop_threads=budget.torch_interop_threads,
+        blas_threads=override("blas_threads", budget.blas_threads)
+    )
+
+
+def get_thread_budget() -> ThreadBudget:
+    """Prozessweites Thread-Budget (beim ersten Aufruf aus config.ini geladen)"""
+    global _budget
+    if _budget is None:
+        try:
+            _budget = load_thread_budget()
+        except (ValueError, configparser.Error) as e:
+            print(f"Ungültiges Thread-Budget in config.ini ({e}), verwende Standardwerte")
+            _budget = compute_thread_budget()
+    return _budget
+
+
+def configure_environment(budget: Optional[ThreadBudget] = None):
+    """
+    BLAS/OpenMP-Thread-Variablen setzen - muss VOR dem Import von numpy laufen
+
+    Bereits gesetzte Variablen werden respektiert.
+    """
+    budget = budget or get_thread_budget()
+    for var in BLAS_ENV_VARS:
+        os.environ.setdefault(var, str(budget.blas_threads))
+
+
+def apply_blas_limits(budget: Optional[ThreadBudget] = None) -> bool:
+    """BLAS-Thread-Pools nachträglich begrenzen (threadpoolctl, falls installiert)"""
+    budget = budget or get_thread_budget()
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return False
+
+    threadpool_limits(limits=budget.blas_threads, user_api="blas")
+    return True
+
+
+def apply_torch_threads(budget: Optional[ThreadBudget] = None):
+    """torch Intra-/Interop-Threads auf das Budget setzen"""
+    budget = budget or get_thread_budget()
+    import torch
+
+    torch.set_num_threads(budget.torch_threads)
+    try:
+        torch.set_num_interop_threads(budget.torch_interop_threads)
+    except RuntimeError:
+        # Interop-Pool kann nach der ersten parallelen Operation nicht mehr geändert werden
+        pass
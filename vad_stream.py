@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Streaming Voice Activity Detection
+Framing über Strided Views, Sprachmaske pro Frame mit Sample-Indizes,
+Hysterese und frame-genaue Sprach-/Pausengrenzen auf der Sample-Uhr
+"""
+
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+try:
+    import webrtcvad
+    WEBRTC_AVAILABLE = True
+except ImportError:
+    WEBRTC_AVAILABLE = False
+
+
+@dataclass(frozen=True)
+class VADEvent:
+    """Zustandswechsel der geglätteten Sprachmaske"""
+    kind: str    # 'speech_start' oder 'speech_end'
+    sample: int  # absolute Sample-Position (Frame-Grenze)
+
+
+@dataclass(frozen=True)
+class SpeechSegment:
+    """Abgeschlossenes Sprachsegment [start, end) in Samples"""
+    start: int
+    end: int
+
+    def duration(self, sample_rate: int) -> float:
+        return (self.end - self.start) / sample_rate
+
+
+class StreamingVAD:
+    """
+    Streaming-VAD mit Hysterese
+
+    Audio wird in nicht überlappende Frames (Standard 30 ms) zerlegt; Frame k
+    beginnt bei Sample k * frame_size. Pro Frame werden die Rohentscheidung und
+    der geglättete Zustand in Ringen abgelegt. Sprache beginnt erst nach
+    onset_frames aufeinanderfolgenden Sprach-Frames und endet erst nach
+    offset_frames Nicht-Sprach-Frames; die gemeldete Grenze ist aber immer der
+    erste Frame des jeweiligen Laufs, also frame-genau statt zum Analysezeitpunkt.
+
+    Backends:
+        'webrtc' - webrtcvad (falls installiert), eine C-Entscheidung pro Frame
+        'energy' - vollständig vektorisierter Energie-Schwellwert mit adaptivem Rauschboden
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 30, aggressiveness: int = 2,
+                 backend: str = "webrtc", onset_frames: int = 3, offset_frames: int = 10,
+                 history_frames: int = 2000, energy_margin_db: float = 12.0,
+                 energy_floor_db: float = -55.0):
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.onset_frames = max(1, int(onset_frames))
+        self.offset_frames = max(1, int(offset_frames))
+        self.energy_margin_db = energy_margin_db
+        self.energy_floor_db = energy_floor_db
+
+        if backend == "webrtc" and not WEBRTC_AVAILABLE:
+            backend = "energy"
+        self.backend = backend
+        self.vad = webrtcvad.Vad(aggressiveness) if backend == "webrtc" else None
+
+        # Frame-Ringe: Rohentscheidung, geglätteter Zustand und Energie (dB)
+        self.capacity = int(history_frames)
+        self._raw = np.zeros(self.capacity, dtype=bool)
+        self._speech = np.zeros(self.capacity, dtype=bool)
+        self._energy_db = np.full(self.capacity, energy_floor_db, dtype=np.float32)
+
+        self._pending = np.zeros(0, dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        self._pending = np.zeros(0, dtype=np.float32)
+        self.total_samples = 0   # Sample-Uhr (alle jemals übergebenen Samples)
+        self.next_frame = 0      # nächster Frame-Index
+        self.is_speech = False   # geglätteter Zustand
+        self.state_since = 0     # Sample, an dem der aktuelle Zustand begann
+
+        # Laufender Roh-Lauf (kann über mehrere process()-Aufrufe reichen)
+        self._run_value = False
+        self._run_start = 0
+        self._run_length = 0
+
+    # ------------------------------------------------------------------ Framing
+
+    def _frame(self, audio: np.ndarray) -> np.ndarray:
+        """Vollständige Frames als (n, frame_size)-View, Rest für den nächsten Aufruf merken"""
+        if len(self._pending):
+            audio = np.concatenate([self._pending, audio])
+        n_frames = len(audio) // self.frame_size
+        used = n_frames * self.frame_size
+        self._pending = audio[used:].copy()
+        return audio[:used].reshape(n_frames, self.frame_size)
+
+    def _classify(self, frames: np.ndarray, energy_db: np.ndarray) -> np.ndarray:
+        """Rohentscheidung Sprache/Nicht-Sprache pro Frame"""
+        if self.vad is not None:
+            pcm = np.clip(frames * 32767.0, -32768, 32767).astype(np.int16)
+            data = pcm.tobytes()
+            step = self.frame_size * 2
+            return np.fromiter(
+                (self.vad.is_speech(data[i:i + step], self.sample_rate)
+                 for i in range(0, len(data), step)),
+                dtype=bool, count=len(frames)
+            )
+
+        # Energie-Backend: Schwelle = Rauschboden (10. Perzentil der Historie) + Marge
+        known = min(self.next_frame, self.capacity)
+        history = np.concatenate([self._energy_db[:known], energy_db]) if known else energy_db
+        threshold = max(self.energy_floor_db, float(np.percentile(history, 10)) + self.energy_margin_db)
+        return energy_db > threshold
+
+    # --------------------------------------------------------------- Hysterese
+
+    def _apply_hysteresis(self, raw: np.ndarray, first_frame: int) -> Tuple[np.ndarray, List[VADEvent]]:
+        """Geglättete Maske und Zustandswechsel; iteriert über Läufe, nicht über Frames"""
+        n = len(raw)
+        smoothed = np.empty(n, dtype=bool)
+        events = []
+
+        boundaries = np.flatnonzero(raw[1:] != raw[:-1]) + 1
+        starts = np.concatenate([[0], boundaries])
+        ends = np.concatenate([boundaries, [n]])
+
+        for start, end in zip(starts, ends):
+            value = bool(raw[start])
+            if start == 0 and value == self._run_value and self._run_length > 0:
+                run_start = self._run_start
+                run_length = self._run_length + (end - start)
+            else:
+                run_start = first_frame + start
+                run_length = end - start
+
+            needed = self.offset_frames if self.is_speech else self.onset_frames
+            if value != self.is_speech and run_length >= needed:
+                # Wechsel frame-genau am Beginn des Laufs; bereits geschriebene Frames nachziehen
+                self.is_speech = value
+                self.state_since = run_start * self.frame_size
+                events.append(VADEvent('speech_start' if value else 'speech_end', self.state_since))
+
+                smoothed[start:end] = value
+                older = np.arange(max(run_start, first_frame - self.capacity), first_frame)
+                self._speech[older % self.capacity] = value
+            else:
+                smoothed[start:end] = self.is_speech
+
+            self._run_value, self._run_start, self._run_length = value, run_start, run_length
+
+        return smoothed, events
+
+    # ------------------------------------------------------------------- API
+
+    def process(self, audio: np.ndarray) -> List[VADEvent]:
+        """Neue Samples verarbeiten, gibt die dabei entstandenen Zustandswechsel zurück"""
+        audio = np.asarray(audio, dtype=np.float32).ravel()
+        self.total_samples += len(audio)
+
+        frames = self._frame(audio)
+        if len(frames) == 0:
+            return []
+
+        energy_db = (10.0 * np.log10(np.mean(np.square(frames), axis=1) + 1e-10)).astype(np.float32)
+        raw = self._classify(frames, energy_db)
+
+        first_frame = self.next_frame
+        smoothed, events = self._apply_hysteresis(raw, first_frame)
+
+        slots = (first_frame + np.arange(len(frames))) % self.capacity
+        self._raw[slots] = raw
+        self._speech[slots] = smoothed
+        self._energy_db[slots] = energy_db
+        self.next_frame += len(frames)
+
+        return events
+
+    @property
+    def processed_samples(self) -> int:
+        """Sample-Position bis zu der Frames entschieden sind"""
+        return self.next_frame * self.frame_size
+
+    def current_pause(self) -> float:
+        """Dauer der laufenden Pause in Sekunden (0.0 während Sprache)"""
+        if self.is_speech:
+            return 0.0
+        return (self.processed_samples - self.state_since) / self.sample_rate
+
+    def quietest_boundary(self, start: int, end: int) -> int:
+        """Frame-Grenze mit der geringsten Energie im Bereich [start, end) (für Schnitte in langer Sprache)"""
+        first = max(-(-start // self.frame_size), self.next_frame - self.capacity)
+        last = min(end // self.frame_size, self.next_frame)
+        if last <= first:
+            return end
+        frames = np.arange(first, last)
+        return int(frames[np.argmin(self._energy_db[frames % self.capacity])]) * self.frame_size
+
+    def speech_mask(self, n_frames: Optional[int] = None, smoothed: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sprachmaske der letzten n_frames Frames, ältester zuerst
+
+        Returns:
+            (frame_starts, mask) - Start-Sample je Frame und Sprach-Flag
+        """
+        available = min(self.next_frame, self.capacity)
+        n = available if n_frames is None else min(n_frames, available)
+        frame_indices = np.arange(self.next_frame - n, self.next_frame)
+        source = self._speech if smoothed else self._raw
+        return frame_indices * self.frame_size, source[frame_indices % self.capacity]
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TransRapport MVP - Persistente Stimmabdruck-Bibliothek
+Normalisierte Sprecher-Embeddings als memory-mapped float32-Matrix plus
+Metadaten (Name, Rolle, Enrollment-Qualität) in einer JSON-Datei.
+Suche per Matrix-Vektor-Produkt (BLAS) und Top-k, ab einer Bibliotheksgröße
+über einen IVF-Index (grobe k-Means-Zellen, nur die nächsten Zellen exakt).
+"""
+
+import os
+import json
+import threading
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+EMBEDDINGS_FILE = "embeddings.npy"
+METADATA_FILE = "voiceprints.json"
+
+
+@dataclass
+class VoiceprintEntry:
+    """Metadaten eines Stimmabdrucks (Zeile row der Embedding-Matrix)"""
+    row: int
+    name: str
+    role: str             # 'therapist', 'patient', 'unknown'
+    quality: float        # Konsistenz der Enrollment-Embeddings (mittlere Kosinus-Ähnlichkeit)
+    n_samples: int        # Anzahl eingerechneter Embeddings
+    created: str
+    updated: str
+    active: bool = True
+
+
+@dataclass
+class VoiceprintMatch:
+    """Treffer einer Bibliothekssuche"""
+    row: int
+    name: str
+    role: str
+    similarity: float
+    quality: float
+
+
+def _normalize(embedding: np.ndarray) -> np.ndarray:
+    embedding = np.asarray(embedding, dtype=np.float32).ravel()
+    return embedding / max(float(np.linalg.norm(embedding)), 1e-12)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indizes der k größten Werte, absteigend sortiert"""
+    if len(scores) > k:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+class IVFIndex:
+    """
+    Invertierte Dateiliste über normalisierten Vektoren
+
+    Sphärisches k-Means teilt die Zeilen in n_lists Zellen; eine Suche bewertet
+    die Zentroide und scannt nur die n_probe ähnlichsten Zellen exakt.
+    Zeilen, die nach dem Aufbau hinzukommen, werden als Rest linear gescannt.
+    """
+
+    def __init__(self, vectors: np.ndarray, n_lists: Optional[int] = None, n_probe: int = 8,
+                 iterations: int = 10, seed: int = 0):
+        n = len(vectors)
+        self.n_lists = max(1, min(n, n_lists or int(np.sqrt(n))))
+        self.n_probe = min(n_probe, self.n_lists)
+        self.size = n
+
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(n, self.n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, vectors)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            centroids = np.where(empty[:, None], centroids, sums / np.maximum(norms, 1e-12))
+        self.centroids = centroids.astype(np.float32)
+
+        assignment = np.argmax(vectors @ self.centroids.T, axis=1)
+        order = np.argsort(assignment, kind='stable')
+        self.rows = order.astype(np.int64)
+        self.offsets = np.searchsorted(assignment[order], np.arange(self.n_lists + 1))
+
+    def candidates(self, query: np.ndarray) -> np.ndarray:
+        """Zeilen der n_probe nächsten Zellen"""
+        cells = _top_k(self.centroids @ query, self.n_probe)
+        return np.concatenate([self.rows[self.offsets[c]:self.offsets[c + 1]] for c in cells])
+
+
+class VoiceprintLibrary:
+    """
+    Stimmabdrücke auf der Festplatte
+
+    embeddings.npy ist eine memory-mapped float32-Matrix (Kapazität wächst durch
+    Verdoppeln), voiceprints.json hält je Zeile die Metadaten. Gelöschte Einträge
+    werden nur deaktiviert (Zeile auf 0), damit Zeilennummern stabil bleiben.
+    Ab index_threshold aktiven Einträgen wird ein IVFIndex genutzt und neu
+    aufgebaut, sobald die Bibliothek um die Hälfte gewachsen ist.
+    """
+
+    def __init__(self, directory: str, dim: int = 192, index_threshold: int = 20000,
+                 n_probe: int = 8):
+        self.directory = directory
+        self.dim = dim
+        self.index_threshold = index_threshold
+        self.n_probe = n_probe
+        self.entries: List[VoiceprintEntry] = []
+        self._index: Optional[IVFIndex] = None
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        metadata_path = os.path.join(directory, METADATA_FILE)
+        embeddings_path = os.path.join(directory, EMBEDDINGS_FILE)
+        if os.path.exists(metadata_path) and os.path.exists(embeddings_path):
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            self.dim = metadata['dim']
+            self.entries = [VoiceprintEntry(**entry) for entry in metadata['entries']]
+            self._matrix = np.load(embeddings_path, mmap_mode='r+')
+        else:
+            self._matrix = self._create_matrix(embeddings_path, 64)
+        self._names = {entry.name: entry.row for entry in self.entries if entry.active}  # aktive Namen -> Zeile
+        self._active = np.zeros(len(self._matrix), dtype=bool)  # aktiv je Zeile (Maske für die Suche)
+        self._active[list(self._names.values())] = True
+        self._maybe_reindex()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _create_matrix(self, path: str, capacity: int) -> np.ndarray:
+        return np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(capacity, self.dim))
+
+    def _grow(self):
+        """Kapazität verdoppeln (neue Datei, Inhalt kopieren, atomar ersetzen)"""
+        path = os.path.join(self.directory, EMBEDDINGS_FILE)
+        temp_path = path + ".tmp.npy"
+        grown = self._create_matrix(temp_path, 2 * len(self._matrix))
+        grown[:len(self.entries)] = self._matrix[:len(self.entries)]
+        grown.flush()
+        del grown
+        self._matrix.flush()
+        self._matrix = None
+        os.replace(temp_path, path)
+        self._matrix = np.load(path, mmap_mode='r+')
+        self._active = np.concatenate([self._active, np.zeros(len(self._matrix) - len(self._active), dtype=bool)])
+
+    # ---------------------------------------------------------------- Schreiben
+
+    def add(self, name: str, role: str, embedding: np.ndarray, quality: float = 1.0,
+            n_samples: int = 1, save: bool = True) -> int:
+        """
+        Stimmabdruck speichern; ein aktiver Eintrag gleichen Namens wird aktualisiert
+
+        Beim Aktualisieren werden die Embeddings nach n_samples gewichtet gemittelt.
+        Für Massenimporte save=False übergeben und am Ende save() aufrufen.
+
+        Returns:
+            Zeile des Eintrags
+        """
+        embedding = _normalize(embedding)
+        if len(embedding) != self.dim:
+            raise ValueError(f"Embedding-Dimension {len(embedding)} statt {self.dim}")
+        now = datetime.now().isoformat()
+
+        with self._lock:
+            existing = self._find(name)
+            if existing is not None:
+                total = existing.n_samples + n_samples
+                merged = existing.n_samples * self._matrix[existing.row] + n_samples * embedding
+                self._matrix[existing.row] = _normalize(merged)
+                existing.quality = (existing.n_samples * existing.quality + n_samples * quality) / total
+                existing.n_samples = total
+                existing.role = role
+                existing.updated = now
+                row = existing.row
+            else:
+                if len(self.entries) == len(self._matrix):
+                    self._grow()
+                row = len(self.entries)
+                self._matrix[row] = embedding
+                self.entries.append(VoiceprintEntry(row, name, role, float(quality), n_samples, now, now))
+                self._names[name] = row
+                self._active[row] = True
+            if save:
+                self._maybe_reindex()
+                self._write()
+        return row
+
+    def save(self):
+        with self._lock:
+            self._maybe_reindex()
+            self._write()
+
+    def remove(self, name: str) -> bool:
+        with self._lock:
+            entry = self._find(name)
+            if entry is None:
+                return False
+            entry.active = False
+            del self._names[name]
+            self._active[entry.row] = False
+            self._matrix[entry.row] = 0.0
+            self._write()
+            return True
+
+    def _find(self, name: str) -> Optional[VoiceprintEntry]:
+        row = self._names.get(name)
+        return None if row is None else self.entries[row]
+
+    def _maybe_reindex(self):
+        active = len(self)
+        if active < self.index_threshold:
+            self._index = None
+        elif self._index is None or len(self.entries) > 1.5 * self._index.size:
+            self._index = IVFIndex(self._matrix[:len(self.entries)], n_probe=self.n_probe)
+
+    def _write(self):
+        """Metadaten atomar schreiben, Matrix auf die Platte bringen"""
+        self._matrix.flush()
+        path = os.path.join(self.directory, METADATA_FILE)
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump({'dim': self.dim, 'entries': [asdict(entry) for entry in self.entries]},
+                      f, ensure_ascii=False, indent=1)
+        os.replace(path + ".tmp", path)
+
+    # ------------------------------------------------------------------- Suche
+
+    def search(self, embedding: np.ndarray, k: int = 5, exact: bool = False) -> List[VoiceprintMatch]:
+        """Die k ähnlichsten aktiven Stimmabdrücke (Kosinus-Ähnlichkeit, absteigend)"""
+        query = _normalize(embedding)
+        with self._lock:
+            n = len(self.entries)
+            if n == 0:
+                return []
+            if self._index is not None and not exact:
+                rows = np.concatenate([self._index.candidates(query), np.arange(self._index.size, n)])
+                scores = self._matrix[rows] @ query
+            else:
+                rows = np.arange(n)
+                scores = self._matrix[:n] @ query
+
+            # Deaktivierte Zeilen vor der Auswahl ausblenden, damit k aktive Treffer übrig bleiben
+            scores = np.where(self._active[rows], scores, -np.inf)
+            best = _top_k(scores, k)
+            return [
+                VoiceprintMatch(int(rows[i]), self.entries[rows[i]].name, self.entries[rows[i]].role,
+                                float(scores[i]), self.entries[rows[i]].quality)
+                for i in best if np.isfinite(scores[i])
+            ]
+
+    def identify(self, embedding: np.ndarray, threshold: float = 0.75) -> Optional[VoiceprintMatch]:
+        """Bester Treffer über der Schwelle oder None"""
+        matches = self.search(embedding, k=1)
+        if matches and matches[0].similarity >= threshold:
+            return matches[0]
+        return None
+
+    def entries_by_role(self) -> Dict[str, List[str]]:
+        roles: Dict[str, List[str]] = {}
+        for entry in self.entries:
+            if entry.active:
+                roles.setdefault(entry.role, []).append(entry.name)
+        return roles